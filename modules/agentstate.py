@@ -0,0 +1,51 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+
+class PopulationState(object):
+	'''
+	Holds the state of the whole population of traders of one type in arrays, the trader is the row given by his idx.
+	Every trade only updates the running position, cash and the sum of private utilities of the trader, the surplus
+	of the whole population is then computed with a few array reductions at the end of the session.
+	If :param keep_trade_log: is set, every trade is also stored as the (idx, side, price) triple.
+	'''
+	def __init__(self, traders_count: int, keep_trade_log: bool = False) -> None:
+		self.positions = np.zeros(traders_count, dtype = np.int64)
+		self.cash = np.zeros(traders_count, dtype = np.int64)
+		self.private_utility_sums = np.zeros(traders_count, dtype = np.float64)
+		self.trades_counts = np.zeros(traders_count, dtype = np.int64)
+		self.trade_log: Optional[List[Tuple[int, int, int]]] = [] if keep_trade_log else None
+
+
+	def __len__(self) -> int:
+		return len(self.positions)
+
+
+	def record_trade(self, idx: int, side: int, price: int, private_utility: float = 0) -> None:
+		'''
+		The buy (sell) adds (subtracts) 1 to the position and pays (receives) the price.
+		'''
+		if side:
+			self.positions[idx] += 1
+			self.cash[idx] -= price
+		else:
+			self.positions[idx] -= 1
+			self.cash[idx] += price
+		self.private_utility_sums[idx] += private_utility
+		self.trades_counts[idx] += 1
+		if self.trade_log is not None:
+			self.trade_log.append((idx, side, price))
+
+
+	def calculate_surpluses(self, last_price: float) -> np.ndarray:
+		'''
+		Returns the surplus of every trader, which consists of the closed trades (Profit or Loss), of the open position
+		valued at the :param last_price: and of the private utilities.
+		'''
+		return self.cash + self.positions * last_price + self.private_utility_sums
+
+
+	def calculate_total_surplus(self, last_price: float) -> float:
+		return float(self.cash.sum() + self.positions.sum() * last_price + self.private_utility_sums.sum())
@@ -1,5 +1,6 @@
 from typing import List, Optional
 
+import modules.misc
 import modules.trader
 import modules.regulator
 
@@ -12,21 +13,37 @@ class Arbitrageur(modules.trader.Trader):
 	'''
 	def __init__(self, *args, **kwargs) -> None:
 		super(Arbitrageur, self).__init__(*args, **kwargs)
+		# The market can get crossed only when the NBBO changes, the arbitrageur therefore listens to its changes and
+		# hunts only once it is crossed.
+		self.market_is_crossed = False
+		self.regulator.subscribe_to_national_best_bid_and_offer(self.watch_national_best_bid_and_offer)
+
+
+	@staticmethod
+	def is_crossed(national_best_bid_and_offer: modules.misc.NBBO) -> bool:
+		return bool(national_best_bid_and_offer.bid and national_best_bid_and_offer.ask) and \
+			national_best_bid_and_offer.bid > national_best_bid_and_offer.ask
+
+
+	def watch_national_best_bid_and_offer(self, national_best_bid_and_offer: modules.misc.NBBO) -> None:
+		self.market_is_crossed = self.is_crossed(national_best_bid_and_offer)
 
 
 	def hunt_and_kill(self) -> Optional[List[int]]:
 		'''
 		The arbitrageur knows of the correct NBBO thanks to his infinite speed.
-		If the condition of ask being below the bid is fulfilled, the Arbitrageur trades.
+		As long as the ask is below the bid, the Arbitrageur trades, so he sweeps all crossed levels across the exchanges
+		at once and returns all the executed orders together.
 		'''
-		national_best_bid_and_offer = self.get_accurate_national_best_bid_and_offer(
-			current_orders = None,
-			exchanges = self.regulator.historic_exchanges_list[0].exchanges,
-		)
-		if (national_best_bid_and_offer.bid and national_best_bid_and_offer.ask) and \
-		(national_best_bid_and_offer.bid > national_best_bid_and_offer.ask):
-			return self.trade_arbitrage(national_best_bid_and_offer)
-		return []
+		if not self.market_is_crossed:
+			return []
+		list_traders_orders = []
+		national_best_bid_and_offer = self.regulator.market_state.accurate_national_best_bid_and_offer
+		while self.is_crossed(national_best_bid_and_offer):
+			list_traders_orders.extend(self.trade_arbitrage(national_best_bid_and_offer))
+			national_best_bid_and_offer = self.regulator.market_state.accurate_national_best_bid_and_offer
+		self.market_is_crossed = False
+		return list_traders_orders
 
 
 	def trade_arbitrage(self, national_best_bid_and_offer: modules.misc.NBBO) -> List[int]:
@@ -36,9 +53,9 @@ class Arbitrageur(modules.trader.Trader):
 		list_traders_orders = []
 		for count, exchange_name in enumerate((national_best_bid_and_offer.bid_exchange, national_best_bid_and_offer.ask_exchange)):
 			self.side = count
-			list_traders_orders = list_traders_orders + self.execute_order(
+			list_traders_orders.extend(self.execute_order(
 				exchange_name = exchange_name
-			)
+			))
 		return list_traders_orders
 
 
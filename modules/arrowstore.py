@@ -0,0 +1,133 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import collections
+import json
+import os
+import uuid
+
+try:
+	import pyarrow as pa
+except ModuleNotFoundError:
+	pa = None
+
+
+
+# Columns of the response table, in the same order as in the database schema.
+RESPONSE_COLUMNS = (
+	('settings_id', 'int64'),
+	('mean_execution_time', 'float64'),
+	('zero_intelligence_surplus', 'float64'),
+	('marketmaker_surplus', 'float64'),
+	('arbitrageur_profit', 'float64'),
+	('seed', 'int64'),
+	('replication', 'int32'),
+	('execution_time_std', 'float64'),
+	('median_execution_time', 'float64'),
+	('execution_time_95th_percentile', 'float64'),
+	('quoted_spread', 'float64'),
+	('top_of_book_depth', 'float64'),
+)
+PARTITION_PREFIX = 'parameters_set_id='
+# The stopping decisions are few, they are appended as json lines to one file next to the partitions.
+STOPPING_DECISIONS_FILE = 'stopping_decision.jsonl'
+STOPPING_DECISION_COLUMNS = ('settings_id', 'replications', 'reason', 'confidence', 'target_precision', 'half_widths')
+
+
+
+class ArrowBackend(object):
+	'''
+	Stores the responses in the Arrow IPC files, so that the sweeps can be run without the database server.
+	The files are partitioned by the parameters set, every batch of responses is written into a new file of its partition,
+	so the writers never touch the files which were already written. The files are read through a memory map, the columns
+	are therefore not copied into memory until they are used.
+	'''
+	def __init__(self, path: str) -> None:
+		if pa is None:
+			raise ModuleNotFoundError('The pyarrow package is needed to store the results in the Arrow files.')
+		self.path = path
+		self.schema = pa.schema([pa.field(name, pa.type_for_alias(type_name)) for name, type_name in RESPONSE_COLUMNS])
+		os.makedirs(path, exist_ok = True)
+
+
+	def get_partition_path(self, parameters_set_id: int) -> str:
+		return os.path.join(self.path, f'{PARTITION_PREFIX}{parameters_set_id}')
+
+
+	def insert_rows(self, table: str, rows: List[Tuple[Any, ...]], columns: Optional[Sequence[str]] = None) -> None:
+		'''
+		Only the response table is stored in the files, the parameters sets are read from the csv file. The stopping
+		decisions are stored in the json lines file. The values always follow the RESPONSE_COLUMNS (or the
+		STOPPING_DECISION_COLUMNS), the :param columns: are accepted only for the compatibility with the databases.
+		'''
+		if table == 'stopping_decision':
+			with open(os.path.join(self.path, STOPPING_DECISIONS_FILE), 'a') as stopping_decisions_file:
+				for row in rows:
+					stopping_decisions_file.write(json.dumps(dict(zip(STOPPING_DECISION_COLUMNS, row))) + '\n')
+			return
+		if table != 'response':
+			raise ValueError(f'Only the responses can be stored in the Arrow files, not the {table} table.')
+		rows_by_partition: Dict[int, List[Tuple[Any, ...]]] = collections.defaultdict(list)
+		for row in rows:
+			rows_by_partition[row[0]].append(row)
+		for parameters_set_id, partition_rows in rows_by_partition.items():
+			self.write_batch(parameters_set_id, partition_rows)
+
+
+	def write_batch(self, parameters_set_id: int, rows: List[Tuple[Any, ...]]) -> None:
+		columns = list(zip(*rows))
+		batch = pa.RecordBatch.from_arrays(
+			[pa.array(column, type = field.type) for column, field in zip(columns, self.schema)],
+			self.schema.names,
+		)
+		partition_path = self.get_partition_path(parameters_set_id)
+		os.makedirs(partition_path, exist_ok = True)
+		file_path = os.path.join(partition_path, f'part-{uuid.uuid4().hex}.arrow')
+		# The file is written under a temporary name first, so that the readers never see it half written.
+		with pa.OSFile(file_path + '.tmp', 'wb') as sink:
+			writer = pa.ipc.new_file(sink, self.schema)
+			writer.write_batch(batch)
+			writer.close()
+		os.replace(file_path + '.tmp', file_path)
+
+
+	def get_file_paths(self, parameters_set_ids: Optional[Iterable[int]] = None) -> List[str]:
+		if parameters_set_ids is None:
+			partitions = [name for name in sorted(os.listdir(self.path)) if name.startswith(PARTITION_PREFIX)]
+		else:
+			partitions = [f'{PARTITION_PREFIX}{parameters_set_id}' for parameters_set_id in parameters_set_ids]
+		return [
+			os.path.join(self.path, partition, name)
+			for partition in partitions if os.path.isdir(os.path.join(self.path, partition))
+			for name in sorted(os.listdir(os.path.join(self.path, partition))) if name.endswith('.arrow')
+		]
+
+
+	def read_responses(self, parameters_set_ids: Optional[Iterable[int]] = None) -> 'pa.Table':
+		'''
+		Returns all responses of the given parameters sets (of all of them by default) as one table. The data are memory
+		mapped, so reading even millions of responses does not copy them, call to_pandas() on the result to copy them.
+		'''
+		tables = [pa.ipc.open_file(pa.memory_map(file_path)).read_all() for file_path in self.get_file_paths(parameters_set_ids)]
+		if not tables:
+			return self.schema.empty_table()
+		return pa.concat_tables(tables)
+
+
+	def get_completed_replications(self) -> List[Tuple[int, int, int]]:
+		'''
+		Returns the (parameters_set_id, replication, seed) triple of every stored response, only these three columns are
+		read from the memory mapped files.
+		'''
+		responses = self.read_responses()
+		return list(zip(*(responses.column(name).to_pylist() for name in ('settings_id', 'replication', 'seed'))))
+
+
+	def read_stopping_decisions(self) -> List[Dict[str, Any]]:
+		path = os.path.join(self.path, STOPPING_DECISIONS_FILE)
+		if not os.path.exists(path):
+			return []
+		with open(path) as stopping_decisions_file:
+			return [json.loads(line) for line in stopping_decisions_file]
+
+
+	def close(self) -> None:
+		pass
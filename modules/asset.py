@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 import decimal
 
 import numpy as np
@@ -8,24 +8,73 @@ import numpy as np
 class Asset(object):
 	'''
 	The asset price is an exogenous variable, which can be pre-generated before the trading takes place.
+	Instead of recomputing the mean over the whole price history, we keep a running sum and count of the prices,
+	which makes every step O(1). The full price_series is kept only if :param keep_price_series: is set.
 	'''
-	def __init__(self, initial_price: decimal.Decimal, mean_reversion_factor: float, sigma):
-		self.price_series: List[int] = [initial_price]
+	def __init__(self, initial_price: decimal.Decimal, mean_reversion_factor: float, sigma,
+	keep_price_series: bool = False, random_generator: Optional[np.random.Generator] = None):
+		self.random_generator: np.random.Generator = random_generator if random_generator is not None \
+			else np.random.default_rng()
+		self.price_series: Optional[List[int]] = [initial_price] if keep_price_series else None
 		self.mean_reversion_factor: float = mean_reversion_factor
 		self.sigma: float = sigma
-		self.mean_price: float = None
-		self.last_price: int = self.price_series[-1]
+		self._sum_of_prices: float = initial_price
+		self._number_of_prices: int = 1
+		self.mean_price: float = initial_price
+		self.last_price: int = initial_price
+		# Once the path is pre-generated, get_new_price() only moves the position along the array.
+		self._price_path: np.ndarray = None
+		self._path_position: int = 0
+
+
+	def calculate_next_price(self, shock: float) -> int:
+		'''
+		One step of the mean reversion price process, the price is bounded from below by zero.
+		'''
+		return max(int(self.last_price * self.mean_reversion_factor \
+						+ self.mean_price * (1 - self.mean_reversion_factor) \
+						+ shock), 0)
+
+
+	def append_price(self, price: int) -> None:
+		'''
+		Updates the running mean and the last price (and the price_series, if we keep it) with the new price.
+		'''
+		self._sum_of_prices += price
+		self._number_of_prices += 1
+		self.mean_price = self._sum_of_prices / self._number_of_prices
+		self.last_price = price
+		if self.price_series is not None:
+			self.price_series.append(price)
+
+
+	def generate_price_path(self, length: int) -> None:
+		'''
+		Pre-generates the next :param length: prices of the session at once. All the shocks are drawn in a single call,
+		the recursion itself then only does scalar arithmetic. The statistical output is the same as calling
+		get_new_price() :param length: times.
+		'''
+		shocks = self.random_generator.normal(0, self.sigma, length)
+		last_price, mean_reversion_factor = self.last_price, self.mean_reversion_factor
+		sum_of_prices, number_of_prices = self._sum_of_prices, self._number_of_prices
+		price_path = np.empty(length, dtype = np.int64)
+		for i, shock in enumerate(shocks.tolist()):
+			last_price = max(int(last_price * mean_reversion_factor \
+							+ sum_of_prices / number_of_prices * (1 - mean_reversion_factor) \
+							+ shock), 0)
+			sum_of_prices += last_price
+			number_of_prices += 1
+			price_path[i] = last_price
+		self._price_path, self._path_position = price_path, 0
 
 
 	def get_new_price(self):
 		'''
-		We first calculate the value of the mean reversion price process of the asset.
-		For simplicity sake, apart from saving the price_series information, we also calculate the mean and
-		last_price of the price series.
+		Moves the asset one step forward. If the path has been pre-generated, we only advance the index into it,
+		otherwise we draw a new shock and calculate the price on the spot.
 		'''
-		current_price = max(int(self.last_price * self.mean_reversion_factor \
-						+ np.mean(self.price_series) * (1 - self.mean_reversion_factor) \
-						+ np.random.normal(0, self.sigma, 1)), 0)
-		self.price_series.append(int(current_price))
-		self.mean_price = np.mean(self.price_series)
-		self.last_price = self.price_series[-1]
\ No newline at end of file
+		if self._price_path is not None and self._path_position < len(self._price_path):
+			self._path_position += 1
+			self.append_price(int(self._price_path[self._path_position - 1]))
+			return
+		self.append_price(self.calculate_next_price(self.random_generator.normal(0, self.sigma)))
@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional
+import bisect
+import collections
+import orderbook
+
+
+
+class OrderLifetime(object):
+	'''
+	Stores the price of the order along with the time it was added into and removed from the orderbook.
+	Orders which are still resting in the orderbook have the time_removed equal to infinity.
+	The attributes id and price mirror those of the orderbook.types.Order, so both can be used interchangeably.
+	The owner is the trader who submitted the order (if known), so that the trader can look at the orderbook without his
+	own orders.
+	'''
+	__slots__ = ('id', 'price', 'side', 'time_added', 'time_removed', 'owner')
+
+	def __init__(self, order_id: int, price: int, side: int, time_added: float, owner: Any = None) -> None:
+		self.id = order_id
+		self.price = price
+		self.side = side
+		self.time_added = time_added
+		self.time_removed = float('inf')
+		self.owner = owner
+
+
+	def is_alive(self, as_of: float) -> bool:
+		return self.time_added <= as_of < self.time_removed
+
+
+
+class BitemporalOrderBookSide(object):
+	'''
+	One side of the bitemporal orderbook. The prices are kept sorted (ascending) and each price level holds the lifetimes
+	of the orders in the order in which they were added, which gives us the price-time priority.
+	Every price level also counts the orders of each owner, so that the levels holding only the orders of the excluded
+	owner are skipped without looking at the orders.
+	'''
+	def __init__(self, side: int) -> None:
+		self.side = side
+		self.prices: List[int] = []
+		self.levels: Dict[int, Dict[int, OrderLifetime]] = {}
+		self.level_owners: Dict[int, Dict[Any, int]] = {}
+		self.orders: Dict[int, OrderLifetime] = {}
+
+
+	def add(self, order_id: int, price: int, time_added: float, owner: Any = None) -> None:
+		lifetime = OrderLifetime(order_id, price, self.side, time_added, owner)
+		if price not in self.levels:
+			self.levels[price] = {}
+			self.level_owners[price] = {}
+			bisect.insort(self.prices, price)
+		self.levels[price][order_id] = lifetime
+		self.level_owners[price][owner] = self.level_owners[price].get(owner, 0) + 1
+		self.orders[order_id] = lifetime
+
+
+	def remove(self, order_id: int, time_removed: float) -> OrderLifetime:
+		'''
+		The order is only marked as removed, it stays in its price level until it is discarded.
+		'''
+		lifetime = self.orders.pop(order_id)
+		lifetime.time_removed = time_removed
+		return lifetime
+
+
+	def discard(self, lifetime: OrderLifetime) -> None:
+		level, level_owners = self.levels[lifetime.price], self.level_owners[lifetime.price]
+		del level[lifetime.id]
+		level_owners[lifetime.owner] -= 1
+		if not level_owners[lifetime.owner]:
+			del level_owners[lifetime.owner]
+		if not level:
+			del self.levels[lifetime.price]
+			del self.level_owners[lifetime.price]
+			del self.prices[bisect.bisect_left(self.prices, lifetime.price)]
+
+
+	def get_best(self, as_of: float, excluded_owner: Any = None) -> Optional[OrderLifetime]:
+		'''
+		Walks the price levels from the best one and returns the first order which was resting in the orderbook at the
+		time :param as_of: and which does not belong to the :param excluded_owner:. The levels which hold only the orders of
+		the excluded owner are skipped at once, every other level better than the result is scanned order by order,
+		including the orders which were removed but not yet discarded and the excluded owner's orders. The cost therefore
+		grows with the number of orders recorded at the price levels better than the result, that is with the depth of
+		the ladders mixed with other orders and with the orders removed within the longest NBBO delay.
+		'''
+		prices = reversed(self.prices) if self.side else self.prices
+		for price in prices:
+			level = self.levels[price]
+			if excluded_owner is not None and self.level_owners[price].get(excluded_owner, 0) == len(level):
+				continue
+			for lifetime in level.values():
+				if lifetime.is_alive(as_of) and (excluded_owner is None or lifetime.owner != excluded_owner):
+					return lifetime
+		return None
+
+
+	def get_depth(self, price: int, as_of: float) -> int:
+		'''
+		Number of orders at the :param price: which were resting in the orderbook at the time :param as_of:.
+		'''
+		return sum(lifetime.is_alive(as_of) for lifetime in self.levels.get(price, {}).values())
+
+
+
+class BitemporalOrderBook(object):
+	'''
+	Instead of taking snapshots of the orderbook after every event, we store the time each order was added and removed.
+	The orderbook as it looked at any time in the past (which has not been discarded yet) can then be queried from the
+	live structure without copying anything.
+	'''
+	def __init__(self) -> None:
+		self.sides: Dict[int, BitemporalOrderBookSide] = {side: BitemporalOrderBookSide(side) for side in (0, 1)}
+		# Removed orders are stored in the order of their removal, so that we can discard the old ones cheaply.
+		self._removed_orders: collections.deque = collections.deque()
+		# Number of orders of every owner which are still recorded, be it resting or removed but not yet discarded.
+		self.orders_count_by_owner: Dict[Any, int] = collections.Counter()
+
+
+	def add_order(self, side: int, order_id: int, price: int, time_added: float, owner: Any = None) -> None:
+		self.sides[side].add(order_id, price, time_added, owner)
+		self.orders_count_by_owner[owner] += 1
+
+
+	def remove_order(self, side: int, order_id: int, time_removed: float) -> OrderLifetime:
+		lifetime = self.sides[side].remove(order_id, time_removed)
+		self._removed_orders.append(lifetime)
+		return lifetime
+
+
+	def discard_orders_removed_before(self, time: float) -> None:
+		'''
+		Orders removed at or before :param time: will not be seen by any query anymore and we can forget about them.
+		'''
+		while self._removed_orders and self._removed_orders[0].time_removed <= time:
+			lifetime = self._removed_orders.popleft()
+			self.sides[lifetime.side].discard(lifetime)
+			self.orders_count_by_owner[lifetime.owner] -= 1
+			if not self.orders_count_by_owner[lifetime.owner]:
+				del self.orders_count_by_owner[lifetime.owner]
+
+
+	def has_orders_of(self, owner: Any) -> bool:
+		'''
+		Tells whether any order of the :param owner: can still be seen in some view of the orderbook.
+		'''
+		return owner in self.orders_count_by_owner
+
+
+	def as_of(self, time: float, excluded_owner: Any = None) -> 'LaggedOrderBook':
+		return LaggedOrderBook(self, time, excluded_owner)
+
+
+
+class LaggedOrderBookSide(object):
+	'''
+	Read-only view of one side of the orderbook at a given time. It mimics the side of the orderbook.orderbook.NonUniqueIdOrderBook.
+	'''
+	def __init__(self, book_side: BitemporalOrderBookSide, as_of: float, excluded_owner: Any = None) -> None:
+		self._book_side = book_side
+		self._as_of = as_of
+		self._excluded_owner = excluded_owner
+
+
+	def get_best(self) -> OrderLifetime:
+		best = self._book_side.get_best(self._as_of, self._excluded_owner)
+		if best is None:
+			raise orderbook.exceptions.OrderSideEmpty()
+		return best
+
+
+	def get_best_price(self) -> Optional[int]:
+		best = self._book_side.get_best(self._as_of, self._excluded_owner)
+		return best.price if best is not None else None
+
+
+	def __bool__(self) -> bool:
+		return self._book_side.get_best(self._as_of, self._excluded_owner) is not None
+
+
+
+class LaggedOrderBook(object):
+	'''
+	View of the orderbook as it was at the time :param as_of:. The orders of the :param excluded_owner: are not seen in
+	the view, the underlying orderbook is never modified.
+	'''
+	def __init__(self, book: BitemporalOrderBook, as_of: float, excluded_owner: Any = None) -> None:
+		self.as_of = as_of
+		self.excluded_owner = excluded_owner
+		self.bid = LaggedOrderBookSide(book.sides[1], as_of, excluded_owner)
+		self.ask = LaggedOrderBookSide(book.sides[0], as_of, excluded_owner)
+
+
+	def get_side(self, side: orderbook.OrderSide) -> LaggedOrderBookSide:
+		return self.bid if side == orderbook.OrderSide.BID else self.ask
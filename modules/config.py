@@ -0,0 +1,52 @@
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import modules.settings as settings
+
+
+
+class SimulationConfig(NamedTuple):
+	'''
+	All parameters of one simulation. The config is immutable and it is passed explicitly to God, who hands it over to
+	the regulator and the traders, so that any number of configurations can be simulated side by side in one process.
+	The defaults are taken from the settings.
+	'''
+	zero_intelligence_count: int = settings.ZERO_INTELLIGENCE_COUNT
+	zero_intelligence_intensity: float = settings.INTENSITY_ZERO_INTELLIGENCE
+	quantity_max: int = settings.QUANTITY_MAX
+	shading_min: int = settings.SHADING_MIN
+	shading_max: int = settings.SHADING_MAX
+	sigma_utility: float = settings.SIGMA_UTILITY
+	market_maker_count: int = settings.MARKET_MAKERS_COUNT
+	market_maker_intensity: float = settings.INTENSITY_MARKET_MAKER
+	market_maker_number_orders: int = settings.MARKET_MAKER_NUMBER_ORDERS
+	market_maker_number_of_ticks_between_orders: int = settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS
+	market_maker_spread_around_asset: int = settings.MARKET_MAKER_SPREAD_AROUND_ASSET
+	initial_asset_price: float = settings.INITIAL_ASSET_PRICE
+	mean_reversion_factor: float = settings.MEAN_REVERSION_FACTOR
+	sigma_asset: float = settings.SIGMA_ASSET
+	names_of_exchanges: Tuple[str, ...] = settings.NAMES_OF_EXCHANGES
+	national_best_bid_and_offer_delay: float = settings.NATIONAL_BEST_BID_AND_OFFER_DELAY
+	batch_auction_interval: Optional[float] = settings.BATCH_AUCTION_INTERVAL
+	orderbook: str = settings.ORDERBOOK
+	session_length: int = settings.SESSION_LENGTH
+
+
+	@classmethod
+	def from_parameters(cls, parameters: Dict[str, Any]) -> 'SimulationConfig':
+		'''
+		Creates the config from one row of the parameters sets (as stored in the csv file), the parameters which are not
+		part of the row keep their default values.
+		'''
+		return cls(
+			zero_intelligence_count = int(parameters['zero_intelligence_count']),
+			zero_intelligence_intensity = float(parameters['zero_intelligence_intensity']),
+			shading_min = int(parameters['zero_intelligence_shading_min']),
+			shading_max = int(parameters['zero_intelligence_shading_max']),
+			market_maker_count = int(parameters['market_maker_count']),
+			market_maker_intensity = float(parameters['market_maker_intensity']),
+			market_maker_number_orders = int(parameters['market_maker_number_orders']),
+			market_maker_number_of_ticks_between_orders = int(parameters['market_maker_number_of_ticks_between_orders']),
+			market_maker_spread_around_asset = int(parameters['market_maker_spread_around_asset']),
+			national_best_bid_and_offer_delay = int(parameters['national_best_bid_and_offer_delay']),
+			session_length = int(parameters['session_length']),
+		)
@@ -1,13 +1,22 @@
-from typing import Any, List
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+import contextlib
 import os
+import queue
+import sqlite3
+import threading
+import time
 import pandas as pd
 import psycopg2
+import psycopg2.extras
+import psycopg2.pool
 
+import numpy as np
 
+import modules.god
 import modules.settings as settings
 
-'''
-CREATE TABLE settings(
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS settings(
 	id SERIAL PRIMARY KEY,
 	zero_intelligence_count int,
 	zero_intelligence_intensity real,
@@ -22,15 +31,50 @@ CREATE TABLE settings(
 	session_length int
 );
 
-CREATE TABLE response(
+CREATE TABLE IF NOT EXISTS response(
 	settings_id int REFERENCES settings(id),
 	mean_execution_time real,
 	zero_intelligence_surplus real,
 	marketmaker_surplus real,
-	arbitrageur_profit real
+	arbitrageur_profit real,
+	seed bigint,
+	replication int,
+	execution_time_std real,
+	median_execution_time real,
+	execution_time_95th_percentile real,
+	quoted_spread real,
+	top_of_book_depth real
+);
+
+CREATE TABLE IF NOT EXISTS stopping_decision(
+	settings_id int REFERENCES settings(id),
+	replications int,
+	reason text,
+	confidence real,
+	target_precision real,
+	half_widths text
 );
 '''
 
+# Columns which were added to the response table after it was first created. The databases created before are brought
+# up to date when the backend connects, the SQLite databases are always created from the current SCHEMA.
+ADDED_RESPONSE_COLUMNS = (
+	('seed', 'bigint'),
+	('replication', 'int'),
+	('execution_time_std', 'real'),
+	('median_execution_time', 'real'),
+	('execution_time_95th_percentile', 'real'),
+	('quoted_spread', 'real'),
+	('top_of_book_depth', 'real'),
+)
+MIGRATIONS = ''.join(
+	f'ALTER TABLE response ADD COLUMN IF NOT EXISTS {column} {column_type};\n'
+	for column, column_type in ADDED_RESPONSE_COLUMNS
+)
+# The responses are inserted by the names of the columns, the order of the columns in the existing tables might differ.
+RESPONSE_COLUMNS = ('settings_id', ) + modules.god.GodResponse._fields
+STOPPING_DECISION_COLUMNS = ('settings_id', 'replications', 'reason', 'confidence', 'target_precision', 'half_widths')
+
 
 
 def connect_database(dbname: str = settings.DATABASE, user: str = settings.USER,
@@ -45,49 +89,230 @@ password: str = settings.PASSWORD, host: str = settings.SERVER, port: str = sett
 	return conn
 
 
-def fill_parameters_table() -> None:
+def format_columns(columns: Optional[Sequence[str]]) -> str:
+	return f' ({", ".join(columns)})' if columns else ''
+
+
+def convert_response_to_row(parameters_set_id: int, response: Any) -> Tuple[Any, ...]:
+	'''
+	The response is stored along with the id of its parameters set. NumPy scalars are converted to the python ones,
+	so that the database drivers can bind them.
+	'''
+	return (parameters_set_id, ) + tuple(value.item() if isinstance(value, np.generic) else value for value in response)
+
+
+
+class PostgresBackend(object):
+	'''
+	Holds one connection from the pool for its whole life, instead of connecting to the database on every call.
+	The missing tables and columns are created once the connection is made.
+	'''
+	def __init__(self, dbname: str = settings.DATABASE, user: str = settings.USER,
+	password: str = settings.PASSWORD, host: str = settings.SERVER, port: str = settings.PORT) -> None:
+		self._connection_pool = psycopg2.pool.SimpleConnectionPool(
+			minconn = 1,
+			maxconn = 1,
+			dbname = dbname,
+			user = user,
+			password = password,
+			host = host,
+			port = port,
+		)
+		self.connection = self._connection_pool.getconn()
+		self.apply_schema()
+
+
+	def apply_schema(self) -> None:
+		cursor = self.connection.cursor()
+		cursor.execute(SCHEMA)
+		cursor.execute(MIGRATIONS)
+		self.connection.commit()
+		cursor.close()
+
+
+	def execute(self, query: str) -> List[Tuple[Any, ...]]:
+		cursor = self.connection.cursor()
+		cursor.execute(query)
+		rows = cursor.fetchall()
+		cursor.close()
+		return rows
+
+
+	def insert_rows(self, table: str, rows: List[Tuple[Any, ...]], columns: Optional[Sequence[str]] = None) -> None:
+		'''
+		All rows are sent in one statement, the values are bound by the driver. Without the :param columns:, the values
+		have to follow the order of the columns in the table.
+		'''
+		cursor = self.connection.cursor()
+		psycopg2.extras.execute_values(cursor, f'INSERT INTO {table}{format_columns(columns)} VALUES %s', rows)
+		self.connection.commit()
+		cursor.close()
+
+
+	def close(self) -> None:
+		self._connection_pool.putconn(self.connection)
+		self._connection_pool.closeall()
+
+
+
+class SQLiteBackend(object):
+	'''
+	Local database with the same schema as the Postgres one, so that the whole pipeline can be run without the server.
+	'''
+	def __init__(self, path: str) -> None:
+		# The connection is created in one thread and used by the ResultsWriter in another.
+		self.connection = sqlite3.connect(path, check_same_thread = False)
+		self.connection.executescript(SCHEMA)
+
+
+	def execute(self, query: str) -> List[Tuple[Any, ...]]:
+		return self.connection.execute(query).fetchall()
+
+
+	def insert_rows(self, table: str, rows: List[Tuple[Any, ...]], columns: Optional[Sequence[str]] = None) -> None:
+		if not rows:
+			return
+		placeholders = ', '.join('?' * len(rows[0]))
+		self.connection.executemany(f'INSERT INTO {table}{format_columns(columns)} VALUES ({placeholders})', rows)
+		self.connection.commit()
+
+
+	def close(self) -> None:
+		self.connection.close()
+
+
+
+class ResultsWriter(threading.Thread):
+	'''
+	There is one writer per node. The results are put into its queue, which never blocks the caller, and the writer
+	inserts them in bulk once there are :param batch_size: of them, or once :param flush_interval: seconds have passed
+	since the last flush. The simulation therefore never waits for the database. If an insert fails, the writer stops
+	and the error is raised from the next put() or from close().
+	'''
+	def __init__(self, backend: Any, batch_size: int = 100, flush_interval: float = 5.0) -> None:
+		super(ResultsWriter, self).__init__(daemon = True)
+		self.backend = backend
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval
+		self.queue: queue.Queue = queue.Queue()
+		self._rows: List[Tuple[Any, ...]] = []
+		self._last_flush = time.monotonic()
+		self.error: Optional[BaseException] = None
+
+
+	def raise_error(self) -> None:
+		if self.error is not None:
+			raise self.error
+
+
+	def put(self, parameters_set_id: int, list_responses: List[Any]) -> None:
+		self.raise_error()
+		self.queue.put([convert_response_to_row(parameters_set_id, response) for response in list_responses])
+
+
+	def flush(self) -> None:
+		if self._rows:
+			self.backend.insert_rows('response', self._rows, RESPONSE_COLUMNS)
+			self._rows = []
+		self._last_flush = time.monotonic()
+
+
+	def run(self) -> None:
+		'''
+		None in the queue is the signal that there will be no more results. The error of the insert is kept for the
+		caller, the thread would otherwise die with it silently.
+		'''
+		try:
+			while True:
+				try:
+					rows = self.queue.get(timeout = max(self._last_flush + self.flush_interval - time.monotonic(), 0))
+				except queue.Empty:
+					self.flush()
+					continue
+				if rows is None:
+					self.flush()
+					return
+				self._rows.extend(rows)
+				if len(self._rows) >= self.batch_size:
+					self.flush()
+		except Exception as error:
+			self.error = error
+
+
+	def close(self) -> None:
+		'''
+		Writes all remaining results and waits for the writer to finish. Raises the error of the writer, if it failed.
+		'''
+		self.queue.put(None)
+		self.join()
+		self.raise_error()
+
+
+
+@contextlib.contextmanager
+def use_backend(backend: Optional[Any] = None) -> Iterator[Any]:
+	'''
+	Uses the given backend, or connects to the Postgres database just for the duration of the call.
+	'''
+	if backend is not None:
+		yield backend
+		return
+	backend = PostgresBackend()
+	try:
+		yield backend
+	finally:
+		backend.close()
+
+
+def fill_parameters_table(backend: Optional[Any] = None) -> None:
 	'''
 	Fills the database settings table with the values which are stored in the csv file.
 	'''
-	connection = connect_database()
-	cursor = connection.cursor()
 	parameters_file = pd.read_csv(settings.PARAMETERS_SET)
-	columns =  ','.join(parameters_file.columns.values)
-	query = f'INSERT INTO settings ({columns}) VALUES\n'
-	for index, row in parameters_file.iterrows():
-		query += str(tuple(row)) + ',\n'
-	query = query[:-2] + ';'
-	cursor.execute(query)
-	connection.commit()
-	cursor.close()
-	connection.close()
-
-
-def insert_new_results(parameters_set_id:int, list_responses: List[Any]) -> None:
-	connection = connect_database()
-	cursor = connection.cursor()
-	query = 'INSERT INTO response VALUES \n'
-	responses = pd.DataFrame(list_responses)
-	for index, row in responses.iterrows():
-		query += str(tuple((parameters_set_id, )) + tuple(list(row))) + ',\n'
-	query = query[:-2] + ';'
-	cursor.execute(query)
-	connection.commit()
-	cursor.close()
-	connection.close()
-
-
-def get_parameters_table() -> None:
+	with use_backend(backend) as backend:
+		backend.insert_rows('settings', [
+			tuple(value.item() if isinstance(value, np.generic) else value for value in row)
+			for row in parameters_file.itertuples(index = False)
+		])
+
+
+def insert_new_results(parameters_set_id:int, list_responses: List[Any], backend: Optional[Any] = None) -> None:
+	with use_backend(backend) as backend:
+		backend.insert_rows(
+			'response',
+			[convert_response_to_row(parameters_set_id, response) for response in list_responses],
+			RESPONSE_COLUMNS,
+		)
+
+
+def get_parameters_table(backend: Optional[Any] = None) -> List[Tuple[Any, ...]]:
 	'''
 	Gets the database settings table.
 	'''
-	connection = connect_database()
-	cursor = connection.cursor()
-	query = f'SELECT * from settings'
-	cursor.execute(query)
-	settings_table = cursor.fetchall()
-	# connection.commit()
-	cursor.close()
-	connection.close()
+	with use_backend(backend) as backend:
+		return backend.execute('SELECT * from settings')
+
 
-	return settings_table
+def get_completed_replications(backend: Optional[Any] = None) -> List[Tuple[int, int, int]]:
+	'''
+	Returns the (parameters_set_id, replication, seed) triple of every stored response.
+	'''
+	with use_backend(backend) as backend:
+		return backend.execute('SELECT settings_id, replication, seed FROM response')
+
+
+def get_responses(fields: Sequence[str], backend: Optional[Any] = None) -> List[Tuple[Any, ...]]:
+	'''
+	Returns the id of the parameters set along with the given :param fields: of every stored response.
+	'''
+	with use_backend(backend) as backend:
+		return backend.execute(f'SELECT settings_id, {", ".join(fields)} FROM response')
+
+
+def insert_stopping_decisions(rows: List[Tuple[Any, ...]], backend: Optional[Any] = None) -> None:
+	'''
+	The stopping_decision table is created along with the others by the backend, the rows follow the
+	STOPPING_DECISION_COLUMNS.
+	'''
+	with use_backend(backend) as backend:
+		backend.insert_rows('stopping_decision', rows, STOPPING_DECISION_COLUMNS)
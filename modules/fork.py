@@ -0,0 +1,38 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import multiprocessing
+
+import modules.config
+import modules.god
+
+
+
+def simulate_prefix(config: modules.config.SimulationConfig, seed: int, replication: int, fork_time: float,
+list_changes: Sequence[Dict[str, Any]] = ()) -> bytes:
+	'''
+	Simulates the session up to the :param fork_time: once and returns its checkpoint. The history of the exchanges is
+	kept for the longest NBBO delay of the :param list_changes:, so that every continuation sees complete lagged exchanges.
+	'''
+	GOD = modules.god.God(config = config, seed = seed, replication = replication)
+	delays = [changes['national_best_bid_and_offer_delay'] for changes in list_changes if 'national_best_bid_and_offer_delay' in changes]
+	if delays:
+		GOD.keep_history_for(max(delays))
+	GOD.run_until(fork_time)
+	return GOD.checkpoint()
+
+
+def run_fork(task: Tuple[bytes, Dict[str, Any]]) -> modules.god.GodResponse:
+	checkpoint, changes = task
+	return modules.god.God.from_checkpoint(checkpoint, **changes).run_simulation()
+
+
+def run_forks(checkpoint: bytes, list_changes: Sequence[Dict[str, Any]],
+processes: Optional[int] = None) -> List[modules.god.GodResponse]:
+	'''
+	Runs one continuation of the :param checkpoint: for every changes of the config in the :param list_changes:, in the
+	pool of :param processes: workers (or in this process, if it is 1). The responses are in the order of the changes.
+	'''
+	tasks = [(checkpoint, changes) for changes in list_changes]
+	if processes == 1:
+		return [run_fork(task) for task in tasks]
+	with multiprocessing.Pool(processes = processes) as pool:
+		return pool.map(run_fork, tasks)
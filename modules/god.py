@@ -1,27 +1,44 @@
-from typing import Any, List, NamedTuple
-import itertools
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 import numpy as np
-import pandas as pd
-import orderbook
-import random
+import pickle
+import secrets
 
+import modules.agentstate
 import modules.asset
 import modules.arbitrageur
+import modules.config
 import modules.marketmaker
+import modules.profiler
 import modules.regulator
+import modules.scheduler
 import modules.settings as settings
+import modules.tape
 import modules.zerointelligence
 
 
 
 class GodResponse(NamedTuple):
 	'''
-	God response gives us metrics which we then use to 
+	God response gives us metrics which we then use to compare the parameters sets.
+	The execution time quantiles are approximate, they come from the histogram of the execution times. The quoted spread
+	and the top of the book depth are weighted by time and averaged over the exchanges.
 	'''
 	mean_execution_time: float
 	zero_intelligence_surplus: float
 	marketmaker_surplus: float
 	arbitrageur_profit: float
+	seed: int
+	replication: int
+	execution_time_std: float
+	median_execution_time: float
+	execution_time_95th_percentile: float
+	quoted_spread: float
+	top_of_book_depth: float
+
+
+
+# Parameters which can be changed in the middle of the session, when the simulation is forked from a checkpoint.
+FORKABLE_PARAMETERS = ('national_best_bid_and_offer_delay', 'batch_auction_interval')
 
 
 
@@ -29,104 +46,364 @@ class God:
 	'''
 	God knows everything and controls everything.
 	'''
-	def __init__(self) -> None:
-		self._asset = modules.asset.Asset(settings.INITIAL_ASSET_PRICE, settings.MEAN_REVERSION_FACTOR, settings.SIGMA_ASSET)
+	def __init__(self, config: Optional[modules.config.SimulationConfig] = None, seed: Optional[int] = None,
+	replication: int = 0, profile: bool = False, tape_path: Optional[str] = None) -> None:
+		self.config = config if config is not None else modules.config.SimulationConfig()
+		# Every replication has its own random generator spawned from the root seed, the pair of the seed and the
+		# replication is stored with the response, so that any run can be replayed exactly.
+		seed = seed if seed is not None else secrets.randbits(63)
+		self._seed_sequence = np.random.SeedSequence(entropy = seed, spawn_key = (replication, ))
+		self._random_generator = np.random.default_rng(self._seed_sequence)
+		self._asset = modules.asset.Asset(
+			initial_price = self.config.initial_asset_price,
+			mean_reversion_factor = self.config.mean_reversion_factor,
+			sigma = self.config.sigma_asset,
+			random_generator = self._random_generator,
+		)
 		self._regulator: modules.regulator.Regulator = modules.regulator.Regulator(
-			national_best_bid_and_offer_delay = settings.NATIONAL_BEST_BID_AND_OFFER_DELAY,
 			asset = self._asset,
+			config = self.config,
 		)
+		# The positions, cash and private utilities of each trader type are kept together in arrays.
+		self._zero_intelligence_state = modules.agentstate.PopulationState(self.config.zero_intelligence_count)
+		self._market_makers_state = modules.agentstate.PopulationState(self.config.market_maker_count)
 		self._list_zero_intelligence_traders: List[modules.zerointelligence.ZeroIntelligence] = [
 			modules.zerointelligence.ZeroIntelligence(
 				idx = i,
-				quantity_max = settings.QUANTITY_MAX,
-				shading_min = settings.SHADING_MIN,
-				shading_max = settings.SHADING_MAX,
+				quantity_max = self.config.quantity_max,
+				shading_min = self.config.shading_min,
+				shading_max = self.config.shading_max,
+				sigma_utility = self.config.sigma_utility,
 				regulator = self._regulator,
-				default_exchange = random.choice(list(self._regulator.exchanges.keys())),
-			) for i in range(settings.ZERO_INTELLIGENCE_COUNT)
+				random_generator = self._random_generator,
+				population_state = self._zero_intelligence_state,
+				default_exchange = self.choose_random_exchange(),
+			) for i in range(self.config.zero_intelligence_count)
 		]
 		self._market_makers: List[modules.marketmaker.MarketMaker] = [
 			modules.marketmaker.MarketMaker(
 				idx = i,
 				regulator = self._regulator,
-				exchange_name = random.choice(list(self._regulator.exchanges.keys())),
-				number_of_orders = settings.MARKET_MAKER_NUMBER_ORDERS,
-				ticks_between_orders = settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS,
-				spread_around_asset = settings.MARKET_MAKER_SPREAD_AROUND_ASSET,
-			) for i in range(settings.MARKET_MAKERS_COUNT)
+				random_generator = self._random_generator,
+				population_state = self._market_makers_state,
+				exchange_name = self.choose_random_exchange(),
+				number_of_orders = self.config.market_maker_number_orders,
+				ticks_between_orders = self.config.market_maker_number_of_ticks_between_orders,
+				spread_around_asset = self.config.market_maker_spread_around_asset,
+			) for i in range(self.config.market_maker_count)
 		]
-		self._arbitrageur = modules.arbitrageur.Arbitrageur(regulator = self._regulator, idx = 1)
-		self._summarized_entries: pd.Series = None
+		self._arbitrageur = modules.arbitrageur.Arbitrageur(
+			regulator = self._regulator,
+			idx = 1,
+			random_generator = self._random_generator,
+		)
+		self._traders_by_type: Dict[str, List[Any]] = {
+			'ZeroIntelligence': self._list_zero_intelligence_traders,
+			'MarketMaker': self._market_makers,
+		}
+		self._summarized_entries: np.ndarray = None
 		self.summarize_entries()
+		self.presample_zero_intelligence_decisions()
+		# Every event moves the asset one step, we can therefore generate the whole price path at once.
+		self._asset.generate_price_path(len(self._summarized_entries))
 
 		# In the end, we merge all traders into one list.
 		self._all_traders: Dict[modules.misc.TraderIdx: Any] = {
 			modules.misc.TraderIdx(trader._idx, trader.__class__.__name__): trader
 			for trader in self._list_zero_intelligence_traders + self._market_makers
 		}
+		# The entries refer to the traders by the position of their type in settings.TRADER_TYPES.
+		self._traders_by_type_code: List[List[Any]] = [
+			self._traders_by_type.get(trader_type) for trader_type in settings.TRADER_TYPES
+		]
+		# Executed orders of every event are collected in this list, which is emptied once they are settled.
+		self._list_traders_orders: List[modules.misc.TraderOrderIdx] = []
+		self._scheduler = modules.scheduler.Scheduler(self._summarized_entries)
+		self._scheduler.register_handler(modules.scheduler.EventType.ARRIVAL, self.process_arrival)
+		self._scheduler.register_handler(modules.scheduler.EventType.BATCH_AUCTION_CLEAR, self.clear_batch_auction)
+		self._scheduler.register_handler(modules.scheduler.EventType.END_OF_SESSION, self.end_session)
+		# The profiler replaces the handlers by their timed versions, without it the simulation runs untouched.
+		self.profiler: Optional[modules.profiler.Profiler] = None
+		if profile:
+			self.enable_profiler()
+		self.tape: Optional[modules.tape.TapeRecorder] = None
+		if tape_path is not None:
+			self.enable_tape(tape_path)
+		self._session_started = False
+
+
+	def enable_profiler(self) -> None:
+		'''
+		Times every phase of the arrivals, all other events and the lagged views of the exchanges (the snapshots).
+		'''
+		self.profiler = modules.profiler.Profiler()
+		self._scheduler.register_handler(modules.scheduler.EventType.ARRIVAL, self.process_arrival_profiled)
+		self._scheduler.register_handler(
+			modules.scheduler.EventType.BATCH_AUCTION_CLEAR,
+			self.profiler.wrap(self.clear_batch_auction, 'batch_auction', is_event = True)
+		)
+		self.profiler.instrument(self._regulator, 'get_lagged_exchanges', 'snapshot')
+
+
+	def enable_tape(self, path: str) -> None:
+		'''
+		Records every arrival, order add, cancel and fill, new asset price and change of the NBBO to the tape at the
+		:param path:. The tape is closed at the end of the session.
+		'''
+		self.tape = modules.tape.TapeRecorder(path, self.config.names_of_exchanges)
+		self._regulator.tape = self.tape
+		self._scheduler.register_handler(
+			modules.scheduler.EventType.ARRIVAL,
+			self.tape.wrap_arrival(self._scheduler.get_handler(modules.scheduler.EventType.ARRIVAL))
+		)
+		self.tape.attach_asset(self._asset, lambda: self._regulator.current_time)
+		self._regulator.subscribe_to_national_best_bid_and_offer(
+			lambda national_best_bid_and_offer: self.tape.record_national_best_bid_and_offer(
+				self._regulator.current_time, national_best_bid_and_offer
+			)
+		)
+
+
+	def choose_random_exchange(self) -> str:
+		exchange_names = list(self._regulator.exchanges.keys())
+		return exchange_names[self._random_generator.integers(len(exchange_names))]
 
 
-	def generate_entries(self, traders_list: List[Any],	intensity_of_poisson_process: float, traders_count: int) -> pd.Series:
+	def generate_entries(self, intensities_of_poisson_processes: np.ndarray, traders_counts: np.ndarray) -> np.ndarray:
 		'''
-		Creates a grouped series equal in length to the number of zerointelligence traders times the session length.
-		Then randomly (with equal probability) assigns a value to the given trader.
-		It cuts all traders above the original length of the session length.
+		Every trader arrives according to his own poisson process, their superposition is then again a poisson process
+		with the intensity equal to the sum of intensities of all traders. We therefore draw only the number of events of
+		the superposed process, spread them uniformly over the session and assign each event to a trader type with the
+		probability proportional to its total intensity, and to a trader of that type with equal probability.
+		The trader types are given as positions in the :params intensities_of_poisson_processes: and :params traders_counts:.
 		'''
-		summarized_entries_times = np.random.exponential(1 / intensity_of_poisson_process, settings.SESSION_LENGTH * traders_count)
-		grouped_entries_series = pd.Series(
-			index = np.random.choice(traders_list, settings.SESSION_LENGTH * traders_count),
-			data = summarized_entries_times
-		).groupby(level = 0).cumsum()
-		summarized_entries = pd.Series(grouped_entries_series.index, grouped_entries_series)
-		return summarized_entries[summarized_entries.index.values <= settings.SESSION_LENGTH]
+		total_intensities = intensities_of_poisson_processes * traders_counts
+		total_intensity = total_intensities.sum()
+		if not total_intensity > 0:
+			return np.empty(0, dtype = modules.scheduler.ENTRIES_DTYPE)
+		entries_count = self._random_generator.poisson(total_intensity * self.config.session_length)
+		entries = np.empty(entries_count, dtype = modules.scheduler.ENTRIES_DTYPE)
+		entries['timestamp'] = np.sort(self._random_generator.uniform(0, self.config.session_length, entries_count))
+		entries['trader_type'] = self._random_generator.choice(len(total_intensities), entries_count, p = total_intensities / total_intensity)
+		entries['trader_idx'] = self._random_generator.uniform(0, 1, entries_count) * traders_counts[entries['trader_type']]
+		return entries
 
 
 	def summarize_entries(self) -> None:
 		'''
-		Creates two pandas Series out of the two trader types which arrive according to their own poisson process.
-		It then merges the two series and sorts them by the index.
+		Creates one structured array of the entries of both trader types, which arrive according to their own poisson process.
+		The trader type of every entry is the position of the trader type in the settings.TRADER_TYPES.
 		'''
-		zero_intelligence_entries = self.generate_entries(
-			traders_list = self._list_zero_intelligence_traders,
-			traders_count = settings.ZERO_INTELLIGENCE_COUNT,
-			intensity_of_poisson_process = settings.INTENSITY_ZERO_INTELLIGENCE,
+		intensities_of_poisson_processes = np.zeros(len(settings.TRADER_TYPES))
+		traders_counts = np.zeros(len(settings.TRADER_TYPES), dtype = np.int64)
+		for trader_type, intensity_of_poisson_process in (
+			('ZeroIntelligence', self.config.zero_intelligence_intensity),
+			('MarketMaker', self.config.market_maker_intensity)
+		):
+			intensities_of_poisson_processes[settings.TRADER_TYPES.index(trader_type)] = intensity_of_poisson_process
+			traders_counts[settings.TRADER_TYPES.index(trader_type)] = len(self._traders_by_type[trader_type])
+		self._summarized_entries = self.generate_entries(
+			intensities_of_poisson_processes = intensities_of_poisson_processes,
+			traders_counts = traders_counts,
 		)
-		market_maker_entries = self.generate_entries(
-			traders_list = self._market_makers,
-			traders_count = settings.MARKET_MAKERS_COUNT,
-			intensity_of_poisson_process = settings.INTENSITY_MARKET_MAKER,
+
+
+	def presample_zero_intelligence_decisions(self) -> None:
+		'''
+		The entries tell us how many times every ZeroIntelligence trader arrives, so all their random decisions of the
+		session can be drawn up front.
+		'''
+		entries = self._summarized_entries
+		arrivals_counts = np.bincount(
+			entries['trader_idx'][entries['trader_type'] == settings.TRADER_TYPES.index('ZeroIntelligence')],
+			minlength = len(self._list_zero_intelligence_traders),
 		)
-		self._summarized_entries = pd.concat([zero_intelligence_entries, market_maker_entries]).sort_index()
+		for zero_intelligence_trader, arrivals_count in zip(self._list_zero_intelligence_traders, arrivals_counts.tolist()):
+			zero_intelligence_trader.presample_decisions(arrivals_count)
+
+
+	def process_arrival(self, timestamp: float, trader_type: int, trader_idx: int,
+	mark_phase: Optional[Callable[[], None]] = None) -> None:
+		'''
+		The trader arrives and trades, then the arbitrageur checks the market for any arbitrage opportunities.
+		The profiler passes the :param mark_phase:, which is called at the start of the arrival and at the end of every
+		phase of the modules.profiler.ARRIVAL_PHASES.
+		'''
+		if mark_phase is not None:
+			mark_phase()
+		self._regulator.current_time = timestamp
+		self._regulator.asset.get_new_price()
+		if mark_phase is not None:
+			mark_phase()
+		self._regulator.remove_redundant_historic_exchanges()
+		if mark_phase is not None:
+			mark_phase()
+		self._list_traders_orders.extend(self._traders_by_type_code[trader_type][trader_idx].do())
+		if mark_phase is not None:
+			mark_phase()
+		# In the batch auction the orders are never executed between the auctions, there is nothing to arbitrage.
+		if self._regulator.batch_auction_interval is None:
+			self._list_traders_orders.extend(self._arbitrageur.hunt_and_kill())
+		if mark_phase is not None:
+			mark_phase()
+		self.settle_trades()
+		self._regulator.market_quality.observe()
+		if mark_phase is not None:
+			mark_phase()
+
+
+	def process_arrival_profiled(self, timestamp: float, trader_type: int, trader_idx: int) -> None:
+		'''
+		Same as process_arrival(), every phase is timed by the profiler.
+		'''
+		clock, timestamps = self.profiler.clock, []
+		self.process_arrival(timestamp, trader_type, trader_idx, lambda: timestamps.append(clock()))
+		self.profiler.record_arrival(settings.TRADER_TYPES[trader_type], *timestamps)
+
+
+	def clear_batch_auction(self, timestamp: float) -> None:
+		'''
+		The regulator clears the batch auctions on all exchanges and the next auction is scheduled after the batch interval.
+		'''
+		self._regulator.current_time = timestamp
+		self._list_traders_orders.extend(self._regulator.do())
+		self.settle_trades()
+		self._regulator.market_quality.observe()
+		if timestamp + self._regulator.batch_auction_interval <= self.config.session_length:
+			self._scheduler.schedule(
+				timestamp + self._regulator.batch_auction_interval,
+				modules.scheduler.EventType.BATCH_AUCTION_CLEAR
+			)
+
+
+	def end_session(self, timestamp: float) -> None:
+		self._regulator.current_time = timestamp
+		self._scheduler.stop()
+
+
+	def settle_trades(self) -> None:
+		'''
+		Notifies the traders whose resting orders were executed.
+		'''
+		for trader_order_pair in self._list_traders_orders:
+			executed_order = trader_order_pair.order if trader_order_pair.execution_price is None \
+				else trader_order_pair.order._replace(price = trader_order_pair.execution_price)
+			self._all_traders[trader_order_pair.trader_idx].update_position_and_trades(executed_order)
+			del self._all_traders[trader_order_pair.trader_idx].current_orders[trader_order_pair.order.idx]
+		self._list_traders_orders.clear()
+
+
+	def start_session(self) -> None:
+		'''
+		Schedules the end of the session and the first batch auction, only once, no matter how many times the
+		simulation is run further.
+		'''
+		if self._session_started:
+			return
+		self._session_started = True
+		self._scheduler.schedule(self.config.session_length, modules.scheduler.EventType.END_OF_SESSION)
+		if self._regulator.batch_auction_interval is not None:
+			self._scheduler.schedule(self._regulator.batch_auction_interval, modules.scheduler.EventType.BATCH_AUCTION_CLEAR)
+
+
+	def run_until(self, time: float) -> None:
+		'''
+		Simulates all events up to (and including) the :param time:, the rest of the session can be simulated later by
+		run_simulation().
+		'''
+		self.start_session()
+		self._scheduler.run(until = time)
+
+
+	def checkpoint(self) -> bytes:
+		'''
+		Returns the whole state of the simulation (the asset, the exchanges, the order registry, the traders, the
+		scheduler and the state of the random generator) as bytes, from which any number of continuations can be
+		restored by from_checkpoint(). The profiler and the tape are bound to one run and they cannot be checkpointed.
+		If some continuation is going to have a longer NBBO delay, keep_history_for() should be called before the prefix
+		is simulated.
+		'''
+		if self.profiler is not None or self.tape is not None:
+			raise ValueError('The simulation with the profiler or the tape cannot be checkpointed.')
+		return pickle.dumps(self, protocol = pickle.HIGHEST_PROTOCOL)
 
 
-	def run_simulation(self):
+	def keep_history_for(self, national_best_bid_and_offer_delay: float) -> None:
+		'''
+		Keeps the history of the exchanges for the :param national_best_bid_and_offer_delay:, even if no trader has such
+		a delay yet, so that the continuations with that delay see the complete lagged exchanges right from the checkpoint.
+		'''
+		self._regulator.register_national_best_bid_and_offer_delay(national_best_bid_and_offer_delay)
+
+
+	@classmethod
+	def from_checkpoint(cls, checkpoint: bytes, **changes: Any) -> 'God':
+		'''
+		Restores the simulation from the :param checkpoint: and applies the :param changes: of the config to it.
+		'''
+		god = pickle.loads(checkpoint)
+		god.change_config(**changes)
+		return god
+
+
+	def change_config(self, **changes: Any) -> None:
+		'''
+		Changes the parameters of the running simulation, only the NBBO delay and the market design (the batch auction
+		interval) can be changed, every other parameter has already shaped the state of the simulation.
+		Switching from the batch auction back to the continuous trading is not supported, the resting orders might be
+		crossed.
+		'''
+		unsupported_changes = set(changes) - set(FORKABLE_PARAMETERS)
+		if unsupported_changes:
+			raise ValueError(f'Parameters {sorted(unsupported_changes)} cannot be changed in the running simulation.')
+		if 'national_best_bid_and_offer_delay' in changes:
+			national_best_bid_and_offer_delay = changes['national_best_bid_and_offer_delay']
+			self._regulator.register_national_best_bid_and_offer_delay(national_best_bid_and_offer_delay)
+			for trader in self._list_zero_intelligence_traders + self._market_makers + [self._arbitrageur]:
+				trader.national_best_bid_and_offer_delay = national_best_bid_and_offer_delay
+		if 'batch_auction_interval' in changes:
+			batch_auction_interval = changes['batch_auction_interval']
+			if batch_auction_interval is None and self._regulator.batch_auction_interval is not None:
+				raise ValueError('The batch auction cannot be switched back to the continuous trading.')
+			if self._session_started and self._regulator.batch_auction_interval is None and batch_auction_interval is not None:
+				self._scheduler.schedule(
+					self._regulator.current_time + batch_auction_interval,
+					modules.scheduler.EventType.BATCH_AUCTION_CLEAR
+				)
+		self.config = self.config._replace(**changes)
+		self._regulator.config = self.config
+
+
+	def run_simulation(self) -> GodResponse:
 		'''
 		Main function, which is called at the beginning of the simulation.
-		It iterates over all traders in the time in which they arrive and trade. It calls arbitrageur ad hoc, as he is checking
-		the market for any arbitrage opportunities all the time.
-		'''
-		for timestamp, trader in self._summarized_entries.iteritems():
-			list_traders_orders = []
-			self._regulator.current_time = timestamp
-			self._regulator.asset.get_new_price()
-			self._regulator.remove_redundant_historic_exchanges()
-			list_traders_orders = list_traders_orders + trader.do()
-			self._regulator.add_current_exchanges_to_historic_exchanges()
-			list_traders_orders = list_traders_orders + self._arbitrageur.hunt_and_kill()
-			for trader_order_pair in list_traders_orders:
-				self._all_traders[trader_order_pair.trader_idx].update_position_and_trades(trader_order_pair.order)
-				self._all_traders[trader_order_pair.trader_idx].current_orders.remove(trader_order_pair.order)
+		The scheduler calls the traders in the time in which they arrive and trade, along with all other timed events
+		until the end of the session. The arbitrageur is called ad hoc, as he is checking the market for any arbitrage
+		opportunities all the time.
+		If the simulation has been run until some time (or restored from a checkpoint), it continues from there.
+		'''
+		self.start_session()
+		if self.profiler is None:
+			self._scheduler.run()
+		else:
+			start = self.profiler.clock()
+			self._scheduler.run()
+			self.profiler.total_seconds += self.profiler.clock() - start
+		if self.tape is not None:
+			self.tape.close()
 
+		execution_times = self._regulator.execution_times
+		quoted_spread, top_of_book_depth = self._regulator.market_quality.get_means(self._regulator.current_time)
 		return GodResponse(
-			mean_execution_time = np.mean(self._regulator.execution_times),
-			zero_intelligence_surplus = sum([
-				zero_intelligence_trader.calculate_total_surplus()
-				for zero_intelligence_trader in self._list_zero_intelligence_traders
-			]),
-			marketmaker_surplus = sum([
-				marketmaker.calculate_total_surplus()
-				for marketmaker in self._market_makers
-			]),
-			arbitrageur_profit = self._arbitrageur.calculate_total_surplus()
+			mean_execution_time = execution_times.mean,
+			zero_intelligence_surplus = self._zero_intelligence_state.calculate_total_surplus(self._asset.last_price),
+			marketmaker_surplus = self._market_makers_state.calculate_total_surplus(self._asset.last_price),
+			arbitrageur_profit = self._arbitrageur.calculate_total_surplus(),
+			seed = self._seed_sequence.entropy,
+			replication = self._seed_sequence.spawn_key[0],
+			execution_time_std = execution_times.std,
+			median_execution_time = execution_times.quantile(0.5),
+			execution_time_95th_percentile = execution_times.quantile(0.95),
+			quoted_spread = quoted_spread,
+			top_of_book_depth = top_of_book_depth,
 		)
-
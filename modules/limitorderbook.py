@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+import bisect
+import orderbook
+
+
+
+class LimitOrder(object):
+	'''
+	Resting order of a unit quantity. The attributes id and price mirror those of the orderbook.types.Order.
+	'''
+	__slots__ = ('id', 'price')
+
+	def __init__(self, order_id: int, price: int) -> None:
+		self.id = order_id
+		self.price = price
+
+
+	def __repr__(self) -> str:
+		return f'LimitOrder(id={self.id}, price={self.price})'
+
+
+
+class LimitOrderBookSide(object):
+	'''
+	One side of the orderbook. All orders in our simulation are of a unit quantity and at integer prices, we therefore
+	do not need anything more than the sorted list of the prices and the price levels, which hold the orders in the order
+	in which they were added (the dicts keep the insertion order), which gives us the price-time priority.
+	The best price is always at one end of the sorted list and every order can be cancelled by its id directly.
+	'''
+	def __init__(self, is_bid: bool) -> None:
+		self.is_bid = is_bid
+		self.prices: List[int] = []
+		self.levels: Dict[int, Dict[int, LimitOrder]] = {}
+		self.orders: Dict[int, LimitOrder] = {}
+
+
+	def __len__(self) -> int:
+		return len(self.orders)
+
+
+	def __bool__(self) -> bool:
+		return bool(self.orders)
+
+
+	def __iter__(self) -> Iterator[LimitOrder]:
+		'''
+		Iterates over the orders from the best one.
+		'''
+		for price in self.get_prices():
+			yield from self.levels[price].values()
+
+
+	def get_prices(self) -> Iterator[int]:
+		'''
+		Iterates over the price levels from the best one.
+		'''
+		return reversed(self.prices) if self.is_bid else iter(self.prices)
+
+
+	def add(self, order_id: int, price: int) -> None:
+		order = LimitOrder(order_id, price)
+		level = self.levels.get(price)
+		if level is None:
+			level = self.levels[price] = {}
+			bisect.insort(self.prices, price)
+		level[order_id] = order
+		self.orders[order_id] = order
+
+
+	def remove(self, order_id: int) -> LimitOrder:
+		order = self.orders.pop(order_id)
+		level = self.levels[order.price]
+		del level[order_id]
+		if not level:
+			del self.levels[order.price]
+			del self.prices[bisect.bisect_left(self.prices, order.price)]
+		return order
+
+
+	def get_best(self) -> LimitOrder:
+		if not self.prices:
+			raise orderbook.exceptions.OrderSideEmpty()
+		return next(iter(self.levels[self.prices[-1] if self.is_bid else self.prices[0]].values()))
+
+
+	def get_best_price(self) -> Optional[int]:
+		if not self.prices:
+			return None
+		return self.prices[-1] if self.is_bid else self.prices[0]
+
+
+
+class LimitOrderBook(object):
+	'''
+	Orderbook built for our workload of unit-quantity, integer-price orders. It has the same interface as the
+	orderbook.orderbook.NonUniqueIdOrderBook (as far as the regulator uses it), so that the two can be swapped by the
+	settings, and on top of that it can add and cancel many orders of one side at once.
+	'''
+	def __init__(self) -> None:
+		self.bid = LimitOrderBookSide(is_bid = True)
+		self.ask = LimitOrderBookSide(is_bid = False)
+
+
+	def get_side(self, side: orderbook.OrderSide) -> LimitOrderBookSide:
+		return self.bid if side == orderbook.OrderSide.BID else self.ask
+
+
+	def add_order(self, side: orderbook.OrderSide, order_id: int, price: int, quantity: int = 1, position = None,
+	metadata = None) -> None:
+		'''
+		The :param quantity:, :param position: and :param metadata: are accepted for the compatibility only, all orders
+		are of a unit quantity and added to the end of their price level.
+		'''
+		self.get_side(side).add(order_id, price)
+
+
+	def delete_order(self, order_id: int, side: orderbook.OrderSide) -> None:
+		self.get_side(side).remove(order_id)
+
+
+	def fill_order(self, order_id: int, filled_quantity: int, side: orderbook.OrderSide) -> None:
+		'''
+		The orders are of a unit quantity, every fill therefore removes the whole order.
+		'''
+		self.get_side(side).remove(order_id)
+
+
+	def add_orders(self, side: orderbook.OrderSide, order_ids: Iterable[int], prices: Iterable[int]) -> None:
+		book_side = self.get_side(side)
+		for order_id, price in zip(order_ids, prices):
+			book_side.add(order_id, price)
+
+
+	def delete_orders(self, side: orderbook.OrderSide, order_ids: Iterable[int]) -> None:
+		book_side = self.get_side(side)
+		for order_id in order_ids:
+			book_side.remove(order_id)
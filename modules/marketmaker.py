@@ -5,7 +5,6 @@ import math
 import numpy as np
 import pandas as pd
 
-import modules.settings as settings
 import modules.trader
 
 
@@ -37,25 +36,25 @@ class MarketMaker(modules.trader.Trader):
 			ladder_bids = ladder_bids,
 			ladder_asks = ladder_asks
 		)
-		if self.current_orders:
-			for order in self.current_orders:
-				self.delete_order_from_an_exchange(
-					order = order,
-					exchange_name = order.exchange_name,
-					exchanges = self.regulator.exchanges,
-				)
-		self.current_orders = []
+		# Only the orders which are not already resting in the orderbook are sent, the rest of the resting orders
+		# is cancelled by the regulator.
+		self.current_orders, new_quotes = self.regulator.replace_quotes(
+			owner = self.trader_idx,
+			exchange_name = self.exchange_name,
+			current_orders = self.current_orders,
+			ladders = ([int(ask) for ask in trimmed_ladder_asks], [int(bid) for bid in trimmed_ladder_bids]),
+		)
 
 		list_trader_order_tuple = []
 		
-		for side, order_prices in enumerate([trimmed_ladder_asks, trimmed_ladder_bids]):
+		for side, order_prices in enumerate(new_quotes):
 			for order_price in order_prices:
 				response = self.send_order_to_the_exchange(side, order_price)
 				self.side = side
-				list_trader_order_tuple = list_trader_order_tuple + self.process_exchange_response(
+				list_trader_order_tuple.extend(self.process_exchange_response(
 					**response._asdict(),
 					exchange_name = self.exchange_name
-				)
+				))
 		return list_trader_order_tuple
 
 
@@ -66,7 +65,7 @@ class MarketMaker(modules.trader.Trader):
 		price_estimate = self.get_estimate_of_the_fundamental_value_of_the_asset()
 		return tuple(
 			max(price_estimate + 0.5 * offset, 0)
-			for offset in (- settings.MARKET_MAKER_SPREAD_AROUND_ASSET, settings.MARKET_MAKER_SPREAD_AROUND_ASSET)
+			for offset in (- self.spread_around_asset, self.spread_around_asset)
 		)
 
 
@@ -75,9 +74,9 @@ class MarketMaker(modules.trader.Trader):
 		Generates symmetric ladder around the central ladder prices.
 		'''
 		return tuple([
-				central_ladder_price + direction * settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS * count
-				for count in range(settings.MARKET_MAKER_NUMBER_ORDERS)
-				if central_ladder_price + direction * settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS * count > 0
+				central_ladder_price + direction * self.ticks_between_orders * count
+				for count in range(self.number_of_orders)
+				if central_ladder_price + direction * self.ticks_between_orders * count > 0
 			]
 			for central_ladder_price, direction in ((highest_bid, -1), (lowest_ask, 1)) 
 		)
@@ -0,0 +1,71 @@
+from typing import Dict, Optional, Tuple
+
+import modules.bitemporalorderbook
+import modules.misc
+
+
+
+class MarketState(object):
+	'''
+	The state of the market shared by all traders. The estimate of the fundamental value and the lagged NBBO are the same
+	for every trader who acts at the same time, the market state therefore computes them only once and recomputes them only
+	when their inputs change, that is when the time moves, the asset moves or some order is added to or removed from the
+	exchanges. The accurate NBBO is kept up to date by the regulator itself on every change of the top of the books.
+	'''
+	def __init__(self, regulator) -> None:
+		self.regulator = regulator
+		self._fundamental_value_key: Tuple[float, float, float] = None
+		self._fundamental_value: float = None
+		self._lagged_national_best_bid_and_offer: Dict[float, modules.misc.NBBO] = {}
+		self._lagged_national_best_bid_and_offer_key: Tuple[float, int] = None
+
+
+	@property
+	def accurate_national_best_bid_and_offer(self) -> modules.misc.NBBO:
+		return self.regulator.accurate_national_best_bid_and_offer
+
+
+	def get_estimate_of_the_fundamental_value_of_the_asset(self) -> float:
+		'''
+		Represents equation (1), slightly rewritten.
+		'''
+		regulator, asset = self.regulator, self.regulator.asset
+		key = (regulator.current_time, asset.last_price, asset.mean_price)
+		if key != self._fundamental_value_key:
+			self._fundamental_value = asset.mean_price + (asset.last_price - asset.mean_price) * \
+				(1 - regulator.config.mean_reversion_factor) ** (regulator.config.session_length - regulator.current_time)
+			self._fundamental_value_key = key
+		return self._fundamental_value
+
+
+	def get_lagged_national_best_bid_and_offer(self, national_best_bid_and_offer_delay: float,
+	excluded_owner: Optional[modules.misc.TraderIdx] = None) -> modules.misc.NBBO:
+		'''
+		Returns the NBBO of the exchanges as they looked :param national_best_bid_and_offer_delay: ago. The NBBO of every
+		delay is cached until the time moves or the exchanges change. The NBBO without the orders of the
+		:param excluded_owner: is specific to the owner and it is therefore not cached.
+		'''
+		if excluded_owner is not None:
+			return self.consolidate_lagged_exchanges(
+				self.regulator.get_lagged_exchanges(national_best_bid_and_offer_delay, excluded_owner)
+			)
+		key = (self.regulator.current_time, self.regulator.book_version)
+		if key != self._lagged_national_best_bid_and_offer_key:
+			self._lagged_national_best_bid_and_offer.clear()
+			self._lagged_national_best_bid_and_offer_key = key
+		national_best_bid_and_offer = self._lagged_national_best_bid_and_offer.get(national_best_bid_and_offer_delay)
+		if national_best_bid_and_offer is None:
+			national_best_bid_and_offer = self.consolidate_lagged_exchanges(
+				self.regulator.get_lagged_exchanges(national_best_bid_and_offer_delay)
+			)
+			self._lagged_national_best_bid_and_offer[national_best_bid_and_offer_delay] = national_best_bid_and_offer
+		return national_best_bid_and_offer
+
+
+	@staticmethod
+	def consolidate_lagged_exchanges(exchanges: Dict[str, modules.bitemporalorderbook.LaggedOrderBook]) -> modules.misc.NBBO:
+		list_exchange_info = []
+		for exchange_name, exchange in exchanges.items():
+			best_bid, best_ask = exchange.bid.get_best_price(), exchange.ask.get_best_price()
+			list_exchange_info.append(modules.misc.ExchangeInfo(best_bid = best_bid, best_ask = best_ask, exchange = exchange_name))
+		return modules.misc.consolidate_national_best_bid_and_offer(list_exchange_info)
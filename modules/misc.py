@@ -1,4 +1,4 @@
-from typing import NamedTuple
+from typing import Iterable, NamedTuple, Optional
 import random
 import orderbook
 
@@ -61,13 +61,34 @@ class TraderIdx(NamedTuple):
 class TraderOrderIdx(NamedTuple):
 	'''
 	TraderOrderIdx is sent as an exchange response so that we can find the trader and his order and delete them from the
-	:params current_orders: list.
+	:params current_orders: dict.
+	In the batch auction, the order is executed at the uniform clearing price, which is then given as execution_price.
 	'''
 	trader_idx: TraderIdx
 	order: CurrentOrder
+	execution_price: Optional[int] = None
 
 
 
+def consolidate_national_best_bid_and_offer(list_exchange_info: Iterable[ExchangeInfo]) -> NBBO:
+	'''
+	Picks the highest bid and the lowest ask out of the best prices of the individual exchanges.
+	In case of a tie, the exchange which comes first wins.
+	'''
+	bid, ask, bid_exchange, ask_exchange = None, None, None, None
+	for exchange_info in list_exchange_info:
+		if exchange_info.best_bid and (bid is None or exchange_info.best_bid > bid):
+			bid, bid_exchange = exchange_info.best_bid, exchange_info.exchange
+		if exchange_info.best_ask and (ask is None or exchange_info.best_ask < ask):
+			ask, ask_exchange = exchange_info.best_ask, exchange_info.exchange
+	return NBBO(
+		bid = bid,
+		ask = ask,
+		bid_exchange = bid_exchange,
+		ask_exchange = ask_exchange
+	)
+
+
 def side_to_orderbook_type(side: int):
 	'''
 	Converts the integer of 1 (0) into an appropriate side type.
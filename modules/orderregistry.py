@@ -0,0 +1,96 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import modules.misc
+import modules.settings as settings
+
+
+
+class OrderRegistry(object):
+	'''
+	Keeps the information about every resting order, which the exchange itself does not know: who the owner of the order
+	is and when the order was entered. The orders are stored in arrays, every order occupies one slot, which is reclaimed
+	once the order is filled or cancelled, so the memory does not grow with the length of the session.
+	The order ids are unique across both sides and all exchanges and they are never reused, the slot of an order is looked
+	up by its id.
+	'''
+	def __init__(self, names_of_exchanges: Tuple[str, ...], capacity: int = 1024) -> None:
+		self.names_of_exchanges = tuple(names_of_exchanges)
+		self._exchange_codes: Dict[str, int] = {exchange_name: code for code, exchange_name in enumerate(self.names_of_exchanges)}
+		# The owner is stored as the position of his type in the settings.TRADER_TYPES and his idx.
+		self.owner_types = np.zeros(capacity, dtype = np.uint8)
+		self.owner_idxs = np.zeros(capacity, dtype = np.int64)
+		self.sides = np.zeros(capacity, dtype = np.int8)
+		self.prices = np.zeros(capacity, dtype = np.int64)
+		self.exchanges = np.zeros(capacity, dtype = np.uint8)
+		self.entry_times = np.zeros(capacity, dtype = np.float64)
+		self._slots: Dict[int, int] = {}
+		self._free_slots: List[int] = list(range(capacity - 1, -1, -1))
+		self.last_order_id = 0
+
+
+	def __len__(self) -> int:
+		return len(self._slots)
+
+
+	def __contains__(self, order_id: int) -> bool:
+		return order_id in self._slots
+
+
+	def grow(self) -> None:
+		'''
+		Doubles the number of slots, the orders keep their slots.
+		'''
+		capacity = len(self.prices)
+		for name in ('owner_types', 'owner_idxs', 'sides', 'prices', 'exchanges', 'entry_times'):
+			array = getattr(self, name)
+			setattr(self, name, np.concatenate([array, np.zeros(capacity, dtype = array.dtype)]))
+		self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+
+	def register(self, owner: modules.misc.TraderIdx, side: int, price: int, exchange_name: str, time_entry: float) -> int:
+		'''
+		Stores the new order and returns its id.
+		'''
+		if not self._free_slots:
+			self.grow()
+		slot = self._free_slots.pop()
+		self.last_order_id += 1
+		self._slots[self.last_order_id] = slot
+		self.owner_types[slot] = settings.TRADER_TYPES.index(owner.type)
+		self.owner_idxs[slot] = owner.idx
+		self.sides[slot] = side
+		self.prices[slot] = price
+		self.exchanges[slot] = self._exchange_codes[exchange_name]
+		self.entry_times[slot] = time_entry
+		return self.last_order_id
+
+
+	def release(self, order_id: int) -> None:
+		'''
+		Frees the slot of the filled or cancelled order. Orders which were never registered (for example those loaded
+		together with the exchanges) are ignored.
+		'''
+		slot = self._slots.pop(order_id, None)
+		if slot is not None:
+			self._free_slots.append(slot)
+
+
+	def get_owner(self, order_id: int) -> modules.misc.TraderIdx:
+		slot = self._slots[order_id]
+		return modules.misc.TraderIdx(int(self.owner_idxs[slot]), settings.TRADER_TYPES[self.owner_types[slot]])
+
+
+	def get_entry_time(self, order_id: int) -> float:
+		return float(self.entry_times[self._slots[order_id]])
+
+
+	def get_order(self, order_id: int) -> modules.misc.CurrentOrder:
+		slot = self._slots[order_id]
+		return modules.misc.CurrentOrder(
+			idx = order_id,
+			side = int(self.sides[slot]),
+			price = int(self.prices[slot]),
+			exchange_name = self.names_of_exchanges[self.exchanges[slot]],
+		)
@@ -0,0 +1,116 @@
+from typing import Any, Callable, Dict, NamedTuple
+import collections
+import functools
+import time
+
+
+
+# Phases of one arrival in the order in which they happen.
+ARRIVAL_PHASES = ('asset', 'history', 'trader', 'arbitrageur', 'settlement')
+
+
+
+class PhaseStatistics(NamedTuple):
+	count: int
+	seconds: float
+	mean_seconds: float
+
+
+
+class ProfileReport(NamedTuple):
+	'''
+	Summary of the profiled simulation. The phases include the phases of the arrivals as well as the other events and
+	the instrumented methods, the snapshot (the lagged view of the exchanges) is taken inside the trader phase and its
+	time is therefore included in it. The agents are the time spent in the do() of every trader type.
+	'''
+	events_count: int
+	total_seconds: float
+	phases: Dict[str, PhaseStatistics]
+	agents: Dict[str, PhaseStatistics]
+
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {
+			'events_count': self.events_count,
+			'total_seconds': self.total_seconds,
+			'phases': {name: statistics._asdict() for name, statistics in self.phases.items()},
+			'agents': {name: statistics._asdict() for name, statistics in self.agents.items()},
+		}
+
+
+
+class Profiler(object):
+	'''
+	Accumulates the time spent in every phase of the simulation, measured by the monotonic perf_counter clock.
+	God only uses the profiler if he is asked to, otherwise none of the timers is ever called.
+	'''
+	def __init__(self) -> None:
+		self.clock: Callable[[], float] = time.perf_counter
+		self.events_count = 0
+		self.total_seconds = 0.
+		self._phase_seconds: Dict[str, float] = collections.defaultdict(float)
+		self._phase_counts: Dict[str, int] = collections.Counter()
+		self._agent_seconds: Dict[str, float] = collections.defaultdict(float)
+		self._agent_counts: Dict[str, int] = collections.Counter()
+
+
+	def add(self, phase: str, seconds: float) -> None:
+		self._phase_seconds[phase] += seconds
+		self._phase_counts[phase] += 1
+
+
+	def record_arrival(self, trader_type: str, *timestamps: float) -> None:
+		'''
+		The :param timestamps: are the clock readings at the start of the arrival and at the end of every phase of the
+		ARRIVAL_PHASES.
+		'''
+		for phase, start, end in zip(ARRIVAL_PHASES, timestamps, timestamps[1:]):
+			self._phase_seconds[phase] += end - start
+			self._phase_counts[phase] += 1
+		trader_phase = ARRIVAL_PHASES.index('trader')
+		self._agent_seconds[trader_type] += timestamps[trader_phase + 1] - timestamps[trader_phase]
+		self._agent_counts[trader_type] += 1
+		self.events_count += 1
+
+
+	def wrap(self, function: Callable[..., Any], phase: str, is_event: bool = False) -> Callable[..., Any]:
+		'''
+		Returns the :param function: timed as the :param phase:, if :param is_event: is set, every call is also counted
+		as one processed event.
+		'''
+		clock = self.clock
+
+		@functools.wraps(function)
+		def timed_function(*args: Any, **kwargs: Any) -> Any:
+			start = clock()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				self.add(phase, clock() - start)
+				if is_event:
+					self.events_count += 1
+		return timed_function
+
+
+	def instrument(self, instance: Any, method_name: str, phase: str) -> None:
+		'''
+		Replaces the method of the :param instance: (and of this instance only) by its timed version.
+		'''
+		setattr(instance, method_name, self.wrap(getattr(instance, method_name), phase))
+
+
+	@staticmethod
+	def summarize(seconds: Dict[str, float], counts: Dict[str, int]) -> Dict[str, PhaseStatistics]:
+		return {
+			name: PhaseStatistics(count = counts[name], seconds = seconds[name], mean_seconds = seconds[name] / counts[name])
+			for name in seconds if counts[name]
+		}
+
+
+	def get_report(self) -> ProfileReport:
+		return ProfileReport(
+			events_count = self.events_count,
+			total_seconds = self.total_seconds,
+			phases = self.summarize(self._phase_seconds, self._phase_counts),
+			agents = self.summarize(self._agent_seconds, self._agent_counts),
+		)
@@ -1,49 +1,83 @@
-from typing import Dict, List, NamedTuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 import collections
-import copy
 import orderbook
 
+import numpy as np
+
 #import modules.arbitrageur
 import modules.asset
+import modules.bitemporalorderbook
+import modules.config
+import modules.limitorderbook
+import modules.marketstate
 import modules.misc
-import modules.settings as settings
+import modules.orderregistry
+import modules.streamingstatistics
+import modules.tape
 
 
 
-class HistoricExchanges(NamedTuple):
-	'''
-	Slow traders see different NBBO than fast arbitrageur, we therefore keep the historic snapshot of the exchanges in
-	order to show them the 'correct' NBBO based on the NBBO delay.
-	'''
-	exchanges: Dict[str, orderbook.orderbook.NonUniqueIdOrderBook]
-	timestamp: float
+# Implementations of the orderbook which can be chosen in the config.
+ORDERBOOKS: Dict[str, Callable[[], Any]] = {
+	'NonUniqueIdOrderBook': orderbook.orderbook.NonUniqueIdOrderBook,
+	'LimitOrderBook': modules.limitorderbook.LimitOrderBook,
+}
 
 
 
 class Regulator:
-	def __init__(self, national_best_bid_and_offer_delay: float, asset: modules.asset.Asset) -> None:
-		self.national_best_bid_and_offer_delay = national_best_bid_and_offer_delay
+	def __init__(self, asset: modules.asset.Asset, config: Optional[modules.config.SimulationConfig] = None) -> None:
+		# The config is shared with the traders, who read the parameters of the simulation from it. The NBBO delay and
+		# the batch auction interval are read from it as well.
+		self.config = config if config is not None else modules.config.SimulationConfig()
+		# Traders can have their own delay, we need to keep the history of the orderbooks for the longest of them.
+		self.maximum_national_best_bid_and_offer_delay = self.config.national_best_bid_and_offer_delay
 		self.accurate_national_best_bid_and_offer: modules.misc.NBBO = modules.misc.NBBO(None, None, None, None)
 		self.asset = asset
 		self.exchanges: Dict[str, orderbook.orderbook.NonUniqueIdOrderBook] = {
-			exchange_name: orderbook.orderbook.NonUniqueIdOrderBook()
-			for exchange_name in settings.NAMES_OF_EXCHANGES
+			exchange_name: ORDERBOOKS[self.config.orderbook]()
+			for exchange_name in self.config.names_of_exchanges
 		}
-		self.historic_exchanges_list: List[HistoricExchanges] = [
-			HistoricExchanges(
-				exchanges = self.exchanges,
-				timestamp = 0
-			)
-		]
+		# Slow traders see different NBBO than fast arbitrageur. Every order is therefore also recorded along with the
+		# times it was added to and removed from the exchange, so that we can show them the lagged orderbooks.
+		self.order_lifetimes: Dict[str, modules.bitemporalorderbook.BitemporalOrderBook] = {
+			exchange_name: modules.bitemporalorderbook.BitemporalOrderBook()
+			for exchange_name in self.config.names_of_exchanges
+		}
+		# The best bid and ask of every exchange are kept up to date on every add, fill and delete. The consolidated
+		# accurate NBBO is then updated only when some of the best prices changes.
+		self.top_of_book: Dict[str, modules.misc.ExchangeInfo] = {
+			exchange_name: modules.misc.ExchangeInfo(best_bid = None, best_ask = None, exchange = exchange_name)
+			for exchange_name in self.config.names_of_exchanges
+		}
+		self.national_best_bid_and_offer_subscribers: List[Callable[[modules.misc.NBBO], None]] = []
 		self.current_time = 0
-		# Once trader's order is executed, we keep track of it in the execution_times list, in the end we take a mean
-		# of the time it took for a resting order to be executed.
-		self.execution_times: List[float] = []
-		self.last_order_idx: Dict[str, int] = {'bid': 0, 'ask': 0}
-		# Meta will hold information about the trader who is behind the order, as well about the times the order
-		# was added into the orderbook and later executed.
-		self.meta: Dict[order_executed_by_zerointelligence.misc.CurrentOrder, Dict[str, Any]] = {}
-		self.add_current_exchanges_to_historic_exchanges()
+		# Increased on every change of the exchanges, so that the market state knows when its lagged NBBO is outdated.
+		self.book_version = 0
+		self.market_state = modules.marketstate.MarketState(self)
+		# Once trader's order is executed, the time it took for the resting order to be executed is added to the streaming
+		# statistics, which keep only its running mean, variance and histogram.
+		self.execution_times = modules.streamingstatistics.StreamingStatistics(low = 0, high = self.config.session_length)
+		# Time-weighted spread and depth of the exchanges, God observes them after every event.
+		self.market_quality = modules.streamingstatistics.MarketQuality(self)
+		# The registry holds information about the trader who is behind the order, as well about the time the order
+		# was added into the orderbook.
+		self.orders = modules.orderregistry.OrderRegistry(self.config.names_of_exchanges)
+		# If set, every add, cancel and fill is written to the tape.
+		self.tape: Optional[modules.tape.TapeRecorder] = None
+
+
+	@property
+	def national_best_bid_and_offer_delay(self) -> float:
+		return self.config.national_best_bid_and_offer_delay
+
+
+	@property
+	def batch_auction_interval(self) -> Optional[float]:
+		'''
+		If the interval is set, orders are not executed on arrival, but cleared in the batch auction once per interval.
+		'''
+		return self.config.batch_auction_interval
 
 
 	def process_order(self, side: int, order_price: int, exchange_name: str) -> modules.misc.ExchangeResponse:
@@ -54,74 +88,330 @@ class Regulator:
 		There are three cases which can occur. The trade is executed at predetermined price, or it is executed at an even
 		better price. Finally it can be added to the orderbook at the initial price.
 		'''
-		side_type = modules.misc.side_to_orderbook_type(not side)
 		action = 'A'
-		try:
-			best_price = self.exchanges[exchange_name].get_side(side_type).get_best().price
-		except orderbook.exceptions.OrderSideEmpty:
-			best_price = None
-
+		if self.batch_auction_interval is not None:
+			return modules.misc.ExchangeResponse(action, order_price)
+		best_price = self.top_of_book[exchange_name].best_ask if side else self.top_of_book[exchange_name].best_bid
 		if best_price and ((side and best_price <= order_price) or (not side and best_price >= order_price)):
 			order_price = best_price
 			action = 'E'
 		return modules.misc.ExchangeResponse(action, order_price)
 
 
-	def copy_all_orders_from_one_exchange_to_another(self, old_exchange: orderbook.orderbook.NonUniqueIdOrderBook) -> orderbook.orderbook.NonUniqueIdOrderBook:
-		new_exchange = orderbook.orderbook.NonUniqueIdOrderBook()
-		for side in (orderbook.types.OrderSide.ASK, orderbook.types.OrderSide.BID):
-			orders = old_exchange.get_side(side).__iter__()
-			while True:
-				try:
-					new_exchange.add_order(**self.convert_order_to_dictionary(next(orders)))
-				except StopIteration:
-					break
-		return new_exchange
+	def add_order(self, exchange_name: str, side: int, order_id: int, price: int, metadata: Dict[str, Any],
+	owner: Optional[modules.misc.TraderIdx] = None) -> None:
+		self.exchanges[exchange_name].add_order(
+			side = modules.misc.side_to_orderbook_type(side),
+			order_id = order_id,
+			price = price,
+			quantity = 1,
+			position = None,
+			metadata = metadata
+		)
+		self.order_lifetimes[exchange_name].add_order(side, order_id, price, self.current_time, owner)
+		self.book_version += 1
+		if self.tape is not None:
+			self.tape.record(self.current_time, modules.tape.EventCode.ADD, exchange_name, side, owner, order_id, price)
+		best_price = self.top_of_book[exchange_name].best_bid if side else self.top_of_book[exchange_name].best_ask
+		if best_price is None or (side and price > best_price) or (not side and price < best_price):
+			self.update_top_of_book(exchange_name, side, price)
 
 
-	@staticmethod
-	def convert_order_to_dictionary(order):
-		return {
-			'side': order.side,
-			'order_id': order.id,
-			'price': order.price,
-			'quantity': order.quantity,
-			'position': None,
-			'metadata': order.metadata
-		}
+	def delete_order(self, exchange_name: str, side: int, order_id: int) -> None:
+		self.exchanges[exchange_name].delete_order(
+			order_id = order_id,
+			side = modules.misc.side_to_orderbook_type(side)
+		)
+		self.book_version += 1
+		self.orders.release(order_id)
+		lifetime = self.order_lifetimes[exchange_name].remove_order(side, order_id, self.current_time)
+		if self.tape is not None:
+			self.tape.record(self.current_time, modules.tape.EventCode.CANCEL, exchange_name, side, lifetime.owner, order_id, lifetime.price)
+		self.remove_order_from_top_of_book(exchange_name = exchange_name, side = side, lifetime = lifetime)
+
+
+	def fill_order(self, exchange_name: str, side: int, order_id: int) -> None:
+		self.exchanges[exchange_name].fill_order(
+			order_id = order_id,
+			filled_quantity = 1,
+			side = modules.misc.side_to_orderbook_type(side)
+		)
+		self.book_version += 1
+		self.orders.release(order_id)
+		lifetime = self.order_lifetimes[exchange_name].remove_order(side, order_id, self.current_time)
+		if self.tape is not None:
+			self.tape.record(self.current_time, modules.tape.EventCode.FILL, exchange_name, side, lifetime.owner, order_id, lifetime.price)
+		self.remove_order_from_top_of_book(exchange_name = exchange_name, side = side, lifetime = lifetime)
+
+
+	def add_orders(self, exchange_name: str, side: int, prices: Sequence[int],
+	owner: modules.misc.TraderIdx) -> Dict[int, modules.misc.CurrentOrder]:
+		'''
+		Adds the orders of one owner to one side of the exchange at once, the top of the book is then updated only once.
+		Returns the added orders indexed by their ids.
+		'''
+		added_orders = {}
+		for price in prices:
+			order_id = self.orders.register(owner = owner, side = side, price = price, exchange_name = exchange_name,
+				time_entry = self.current_time)
+			added_orders[order_id] = modules.misc.CurrentOrder(order_id, side, price, exchange_name)
+		if not added_orders:
+			return added_orders
+		exchange, orderbook_side = self.exchanges[exchange_name], modules.misc.side_to_orderbook_type(side)
+		if isinstance(exchange, modules.limitorderbook.LimitOrderBook):
+			exchange.add_orders(orderbook_side, added_orders.keys(), prices)
+		else:
+			for order_id, price in zip(added_orders, prices):
+				exchange.add_order(side = orderbook_side, order_id = order_id, price = price, quantity = 1, position = None, metadata = {})
+		for order_id, price in zip(added_orders, prices):
+			self.order_lifetimes[exchange_name].add_order(side, order_id, price, self.current_time, owner)
+		self.book_version += 1
+		if self.tape is not None:
+			for order_id, price in zip(added_orders, prices):
+				self.tape.record(self.current_time, modules.tape.EventCode.ADD, exchange_name, side, owner, order_id, price)
+		best_price = self.top_of_book[exchange_name].best_bid if side else self.top_of_book[exchange_name].best_ask
+		best_added_price = max(prices) if side else min(prices)
+		if best_price is None or (side and best_added_price > best_price) or (not side and best_added_price < best_price):
+			self.update_top_of_book(exchange_name, side, best_added_price)
+		return added_orders
+
+
+	def delete_orders(self, exchange_name: str, side: int, order_ids: Sequence[int]) -> None:
+		'''
+		Cancels the orders of one side of the exchange at once, the top of the book is then updated only once.
+		'''
+		if not order_ids:
+			return
+		exchange, orderbook_side = self.exchanges[exchange_name], modules.misc.side_to_orderbook_type(side)
+		if isinstance(exchange, modules.limitorderbook.LimitOrderBook):
+			exchange.delete_orders(orderbook_side, order_ids)
+		else:
+			for order_id in order_ids:
+				exchange.delete_order(order_id = order_id, side = orderbook_side)
+		self.book_version += 1
+		best_price = self.top_of_book[exchange_name].best_bid if side else self.top_of_book[exchange_name].best_ask
+		best_price_removed = False
+		for order_id in order_ids:
+			self.orders.release(order_id)
+			lifetime = self.order_lifetimes[exchange_name].remove_order(side, order_id, self.current_time)
+			best_price_removed = best_price_removed or lifetime.price == best_price
+			if self.tape is not None:
+				self.tape.record(self.current_time, modules.tape.EventCode.CANCEL, exchange_name, side, lifetime.owner, order_id, lifetime.price)
+		if best_price_removed:
+			self.update_top_of_book(exchange_name, side, self.get_best_price(exchange_name, side))
+
+
+	def replace_quotes(self, owner: modules.misc.TraderIdx, exchange_name: str,
+	current_orders: Dict[int, modules.misc.CurrentOrder],
+	ladders: Tuple[List[int], List[int]]) -> Tuple[Dict[int, modules.misc.CurrentOrder], Tuple[List[int], List[int]]]:
+		'''
+		Brings the quotes of the market maker to the desired :param ladders: (the prices of the asks and of the bids)
+		with as few changes of the orderbook as possible. The :param current_orders: which are still desired stay in the
+		orderbook untouched, all others are cancelled at once. The missing prices are then added at once as well, unless
+		some of them would be executed on the spot. Such prices (and all other missing prices, so that they keep their
+		order) are returned to the market maker, who sends them one by one as any other order.
+		Returns the resting orders of the market maker and the prices of the asks and bids which still have to be sent.
+		'''
+		missing_prices = [collections.Counter(ladder) for ladder in ladders]
+		resting_orders: Dict[int, modules.misc.CurrentOrder] = {}
+		cancelled_order_ids: Dict[Tuple[str, int], List[int]] = collections.defaultdict(list)
+		for order_id, order in current_orders.items():
+			if order.exchange_name == exchange_name and missing_prices[order.side][order.price]:
+				missing_prices[order.side][order.price] -= 1
+				resting_orders[order_id] = order
+			else:
+				cancelled_order_ids[(order.exchange_name, order.side)].append(order_id)
+		for (cancelled_exchange_name, side), order_ids in cancelled_order_ids.items():
+			self.delete_orders(cancelled_exchange_name, side, order_ids)
+		new_quotes: Tuple[List[int], List[int]] = ([], [])
+		for side, ladder in enumerate(ladders):
+			for price in ladder:
+				if missing_prices[side][price]:
+					missing_prices[side][price] -= 1
+					new_quotes[side].append(price)
+		if any(
+			self.process_order(side = side, order_price = price, exchange_name = exchange_name).action == 'E'
+			for side, prices in enumerate(new_quotes) for price in prices
+		):
+			return (resting_orders, new_quotes)
+		for side, prices in enumerate(new_quotes):
+			resting_orders.update(self.add_orders(exchange_name, side, prices, owner))
+		return (resting_orders, ([], []))
+
+
+	def remove_order_from_top_of_book(self, exchange_name: str, side: int, lifetime: modules.bitemporalorderbook.OrderLifetime) -> None:
+		'''
+		Only if the removed order was sitting at the best price, we have to look up the new best price in the exchange.
+		'''
+		best_price = self.top_of_book[exchange_name].best_bid if side else self.top_of_book[exchange_name].best_ask
+		if lifetime.price == best_price:
+			self.update_top_of_book(exchange_name, side, self.get_best_price(exchange_name, side))
+
+
+	def get_best_price(self, exchange_name: str, side: int) -> Optional[int]:
+		try:
+			return self.exchanges[exchange_name].get_side(modules.misc.side_to_orderbook_type(side)).get_best().price
+		except orderbook.exceptions.OrderSideEmpty:
+			return None
+
+
+	def update_top_of_book(self, exchange_name: str, side: int, best_price: Optional[int]) -> None:
+		exchange_info = self.top_of_book[exchange_name]
+		new_exchange_info = exchange_info._replace(best_bid = best_price) if side else exchange_info._replace(best_ask = best_price)
+		if new_exchange_info == exchange_info:
+			return
+		self.top_of_book[exchange_name] = new_exchange_info
+		self.update_national_best_bid_and_offer()
+
+
+	def update_national_best_bid_and_offer(self) -> None:
+		'''
+		Consolidates the top of the books of all exchanges. The subscribers are notified only if the NBBO changed.
+		'''
+		national_best_bid_and_offer = modules.misc.consolidate_national_best_bid_and_offer(self.top_of_book.values())
+		if national_best_bid_and_offer == self.accurate_national_best_bid_and_offer:
+			return
+		self.accurate_national_best_bid_and_offer = national_best_bid_and_offer
+		for subscriber in self.national_best_bid_and_offer_subscribers:
+			subscriber(national_best_bid_and_offer)
+
+
+	def subscribe_to_national_best_bid_and_offer(self, subscriber: Callable[[modules.misc.NBBO], None]) -> None:
+		'''
+		The :param subscriber: is called with the new accurate NBBO every time it changes.
+		'''
+		self.national_best_bid_and_offer_subscribers.append(subscriber)
 
 
-	def add_current_exchanges_to_historic_exchanges(self) -> None:
+	def load_exchanges(self, exchanges: Dict[str, orderbook.orderbook.NonUniqueIdOrderBook]) -> None:
 		'''
-		We insert the new element at the top of the list, as while iterating through the list we can then make a cutoff once
-		we find an old enough (older than settings.NATIONAL_BEST_BID_AND_OFFER_DELAY) historic snapshot of the exchanges.
+		Replaces the exchanges with the supplied ones. All their orders are recorded as if they were added at the current time.
 		'''
-		new_exchanges = {
-			exchange_name: self.copy_all_orders_from_one_exchange_to_another(exchange)
-			for exchange_name, exchange in self.exchanges.items()
+		self.exchanges = exchanges
+		self.book_version += 1
+		self.order_lifetimes = {}
+		for exchange_name, exchange in exchanges.items():
+			self.order_lifetimes[exchange_name] = modules.bitemporalorderbook.BitemporalOrderBook()
+			for side in (0, 1):
+				for order in exchange.get_side(modules.misc.side_to_orderbook_type(side)):
+					self.order_lifetimes[exchange_name].add_order(side, order.id, order.price, self.current_time)
+		self.top_of_book = {
+			exchange_name: modules.misc.ExchangeInfo(
+				best_bid = self.get_best_price(exchange_name, 1),
+				best_ask = self.get_best_price(exchange_name, 0),
+				exchange = exchange_name,
+			) for exchange_name in exchanges
 		}
-		self.historic_exchanges_list.insert(0, 
-			HistoricExchanges(
-				exchanges = new_exchanges,
-				timestamp = self.current_time
-			)
+		self.update_national_best_bid_and_offer()
+
+
+	def register_national_best_bid_and_offer_delay(self, national_best_bid_and_offer_delay: float) -> None:
+		self.maximum_national_best_bid_and_offer_delay = max(
+			self.maximum_national_best_bid_and_offer_delay,
+			national_best_bid_and_offer_delay
 		)
 
 
+	def get_lagged_exchanges(self, national_best_bid_and_offer_delay: Optional[float] = None,
+	excluded_owner: Optional[modules.misc.TraderIdx] = None) -> Dict[str, modules.bitemporalorderbook.LaggedOrderBook]:
+		'''
+		Returns the views of the exchanges as they looked :param national_best_bid_and_offer_delay: ago (by default the
+		delay of the regulator), without the orders of the :param excluded_owner:. Nothing is copied, the views are
+		answered from the order lifetimes.
+		'''
+		if national_best_bid_and_offer_delay is None:
+			national_best_bid_and_offer_delay = self.national_best_bid_and_offer_delay
+		as_of = self.current_time - national_best_bid_and_offer_delay
+		return {
+			exchange_name: order_lifetimes.as_of(as_of, excluded_owner)
+			for exchange_name, order_lifetimes in self.order_lifetimes.items()
+		}
+
+
+	def has_orders_of(self, owner: modules.misc.TraderIdx) -> bool:
+		'''
+		Tells whether any order of the :param owner: can still be seen in the lagged views of the exchanges.
+		'''
+		return any(order_lifetimes.has_orders_of(owner) for order_lifetimes in self.order_lifetimes.values())
+
+
 	def remove_redundant_historic_exchanges(self) -> None:
 		'''
-		The :national_best_bid_and_offer_delay: sets the maximum delay, therefore we can delete historic snapshot of exchanges
-		which are older than the first exchange which is older than :params national_best_bid_and_offer_delay:.
-		We can then refer to the information which slow traders see simply as the last element of :params self.historic_exchanges_list:.
+		The :maximum_national_best_bid_and_offer_delay: sets the maximum delay, no trader will therefore ever look at
+		orders which were removed before the current time minus this delay and we can forget about them.
 		'''
-		for idx, historic_exchange in enumerate(self.historic_exchanges_list):
-			if self.current_time - self.national_best_bid_and_offer_delay >= historic_exchange.timestamp:
-				self.historic_exchanges_list = self.historic_exchanges_list[:max(idx, 1)]
-				return
+		for order_lifetimes in self.order_lifetimes.values():
+			order_lifetimes.discard_orders_removed_before(self.current_time - self.maximum_national_best_bid_and_offer_delay)
 
 
-	def do(self) -> None:
+	def do(self) -> List[modules.misc.TraderOrderIdx]:
 		'''
 		The do function is called only in case of the batch auction, as these require period actions from the Regulator.
 		It gathers all orders which were submitted during the batch interval and processes them accordingly.
-		'''
\ No newline at end of file
+		Orders which are not executed stay in the orderbook for the next batch, unless they are cancelled.
+		'''
+		list_traders_orders = []
+		for exchange_name in self.exchanges:
+			list_traders_orders.extend(self.clear_batch_auction(exchange_name))
+		return list_traders_orders
+
+
+	def clear_batch_auction(self, exchange_name: str) -> List[modules.misc.TraderOrderIdx]:
+		'''
+		All bids and asks resting on the exchange are executed at one uniform price, where the supply and demand cross.
+		The orders are sorted by the price and then by the time of their arrival (the resting orders are stored in the order
+		in which they were added), the executed orders are then simply the first ones on both sides.
+		'''
+		(bid_ids, bid_prices), (ask_ids, ask_prices) = [
+			self.get_orders_sorted_by_priority(exchange_name, side)
+			for side in (1, 0)
+		]
+		clearing_price, executed_count = self.calculate_uniform_clearing_price(bid_prices, ask_prices)
+		list_traders_orders = []
+		for side, order_ids, order_prices in ((1, bid_ids, bid_prices), (0, ask_ids, ask_prices)):
+			for order_id in order_ids[:executed_count].tolist():
+				passive_side_order = self.orders.get_order(order_id)
+				trader_with_passive_limit_order = self.orders.get_owner(order_id)
+				self.execution_times.add(self.current_time - self.orders.get_entry_time(order_id))
+				self.fill_order(exchange_name = exchange_name, side = side, order_id = order_id)
+				list_traders_orders.append(modules.misc.TraderOrderIdx(
+					trader_idx = trader_with_passive_limit_order,
+					order = passive_side_order,
+					execution_price = clearing_price,
+				))
+		return list_traders_orders
+
+
+	def get_orders_sorted_by_priority(self, exchange_name: str, side: int) -> Tuple[np.ndarray, np.ndarray]:
+		'''
+		Returns the ids and prices of the resting orders, best prices first. The sort is stable, so the orders with the same
+		price keep the time priority.
+		'''
+		orders = self.order_lifetimes[exchange_name].sides[side].orders
+		order_ids = np.fromiter(orders.keys(), dtype = np.int64, count = len(orders))
+		order_prices = np.fromiter((lifetime.price for lifetime in orders.values()), dtype = np.int64, count = len(orders))
+		priority = np.argsort(-order_prices if side else order_prices, kind = 'mergesort')
+		return order_ids[priority], order_prices[priority]
+
+
+	@staticmethod
+	def calculate_uniform_clearing_price(bid_prices: np.ndarray, ask_prices: np.ndarray) -> Tuple[Optional[int], int]:
+		'''
+		Given the bid prices sorted from the highest and ask prices sorted from the lowest, the demand (supply) at the price
+		of the i-th bid (ask) is the cumulative quantity of the first i orders, which is simply i + 1 as all orders are of
+		a unit quantity. The supply and demand cross after the last i for which the i-th bid is still above the i-th ask.
+		The clearing price is then the middle of the interval of prices which clear the same quantity.
+		'''
+		crossing_length = min(len(bid_prices), len(ask_prices))
+		executed_count = int(np.count_nonzero(bid_prices[:crossing_length] >= ask_prices[:crossing_length]))
+		if not executed_count:
+			return (None, 0)
+		lowest_price = max(
+			ask_prices[executed_count - 1],
+			bid_prices[executed_count] if executed_count < len(bid_prices) else ask_prices[executed_count - 1]
+		)
+		highest_price = min(
+			bid_prices[executed_count - 1],
+			ask_prices[executed_count] if executed_count < len(ask_prices) else bid_prices[executed_count - 1]
+		)
+		return (int((lowest_price + highest_price) // 2), executed_count)
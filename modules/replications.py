@@ -0,0 +1,126 @@
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+import json
+import math
+import statistics
+
+import modules.god
+import modules.streamingstatistics
+
+
+
+# Fields of the GodResponse whose precision decides about the replications by default.
+DEFAULT_FIELDS = ('zero_intelligence_surplus', 'marketmaker_surplus', 'mean_execution_time')
+
+
+
+class StoppingDecision(NamedTuple):
+	'''
+	The decision about the replications of one parameters set. The reason is 'precision' once the confidence intervals
+	of all fields are narrow enough, 'budget' once the maximum number of replications is reached, and None while more
+	replications are needed. The half widths are relative to the means, if the controller is relative.
+	'''
+	replications: int
+	reason: Optional[str]
+	means: Dict[str, float]
+	half_widths: Dict[str, float]
+
+
+
+def student_t_quantile(p: float, degrees_of_freedom: int) -> float:
+	'''
+	Quantile of the Student's t distribution. It is exact for one and two degrees of freedom, otherwise it is the
+	Cornish-Fisher expansion around the normal quantile, which is accurate to about 1e-2 already for three degrees.
+	'''
+	if degrees_of_freedom == 1:
+		return math.tan(math.pi * (p - 0.5))
+	if degrees_of_freedom == 2:
+		return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+	z, v = statistics.NormalDist().inv_cdf(p), degrees_of_freedom
+	return z + (z ** 3 + z) / (4 * v) \
+		+ (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2) \
+		+ (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3) \
+		+ (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4)
+
+
+
+class ReplicationController(object):
+	'''
+	Decides for every parameters set whether more replications are needed. The replications go on until the half width
+	of the confidence interval of the mean of every of the :param fields: of the GodResponse drops below the
+	:param target_precision: (relative to the absolute value of the mean, if :param relative: is set), but at least
+	:param min_replications: and at most :param max_replications: of them are run. Only the running mean and variance
+	of every field are stored.
+	'''
+	def __init__(self, fields: Sequence[str], target_precision: float, confidence: float = 0.95,
+	min_replications: int = 3, max_replications: int = 10, relative: bool = True) -> None:
+		unknown_fields = set(fields) - set(modules.god.GodResponse._fields)
+		if unknown_fields:
+			raise ValueError(f'Fields {sorted(unknown_fields)} are not part of the GodResponse.')
+		self.fields = tuple(fields)
+		self.target_precision = target_precision
+		self.confidence = confidence
+		self.min_replications = max(min_replications, 2)
+		self.max_replications = max_replications
+		self.relative = relative
+		self._statistics: Dict[int, Dict[str, modules.streamingstatistics.RunningStatistics]] = {}
+
+
+	def get_statistics(self, parameters_set_id: int) -> Dict[str, modules.streamingstatistics.RunningStatistics]:
+		if parameters_set_id not in self._statistics:
+			self._statistics[parameters_set_id] = {
+				field: modules.streamingstatistics.RunningStatistics() for field in self.fields
+			}
+		return self._statistics[parameters_set_id]
+
+
+	def add_values(self, parameters_set_id: int, values: Iterable[float]) -> None:
+		'''
+		Adds the :param values: of the fields (in the order of the fields) of one replication.
+		'''
+		for running_statistics, value in zip(self.get_statistics(parameters_set_id).values(), values):
+			running_statistics.add(value)
+
+
+	def add_response(self, parameters_set_id: int, response: modules.god.GodResponse) -> None:
+		self.add_values(parameters_set_id, [getattr(response, field) for field in self.fields])
+
+
+	def calculate_half_width(self, running_statistics: modules.streamingstatistics.RunningStatistics) -> float:
+		if running_statistics.count < 2 or math.isnan(running_statistics.variance):
+			return float('inf')
+		half_width = student_t_quantile(0.5 + self.confidence / 2, running_statistics.count - 1) \
+			* math.sqrt(running_statistics.variance / running_statistics.count)
+		if not self.relative or half_width == 0:
+			return half_width
+		return half_width / abs(running_statistics.mean) if running_statistics.mean else float('inf')
+
+
+	def get_decision(self, parameters_set_id: int) -> StoppingDecision:
+		field_statistics = self.get_statistics(parameters_set_id)
+		replications = min(running_statistics.count for running_statistics in field_statistics.values()) if field_statistics else 0
+		half_widths = {field: self.calculate_half_width(running_statistics) for field, running_statistics in field_statistics.items()}
+		reason = None
+		if replications >= self.min_replications and all(half_width <= self.target_precision for half_width in half_widths.values()):
+			reason = 'precision'
+		elif replications >= self.max_replications:
+			reason = 'budget'
+		return StoppingDecision(
+			replications = replications,
+			reason = reason,
+			means = {field: running_statistics.mean for field, running_statistics in field_statistics.items()},
+			half_widths = half_widths,
+		)
+
+
+	def convert_decision_to_row(self, parameters_set_id: int, decision: StoppingDecision) -> Tuple[Any, ...]:
+		'''
+		The row of the stopping_decision table, the half widths of the fields are stored as one json object.
+		'''
+		return (
+			parameters_set_id,
+			decision.replications,
+			decision.reason,
+			self.confidence,
+			self.target_precision,
+			json.dumps(decision.half_widths),
+		)
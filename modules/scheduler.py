@@ -0,0 +1,92 @@
+from typing import Any, Callable, Dict, List, Tuple
+import enum
+import heapq
+
+import numpy as np
+
+
+
+# Every entry says at what time which trader arrives, the trader type is the position in settings.TRADER_TYPES.
+ENTRIES_DTYPE = np.dtype([
+	('timestamp', np.float64),
+	('trader_type', np.uint8),
+	('trader_idx', np.uint32),
+])
+
+
+
+class EventType(enum.IntEnum):
+	'''
+	Types of the events which can happen during the session. If two events happen at the same time, the one with
+	the lower value goes first, the session therefore always ends last.
+	'''
+	ARRIVAL = 0
+	BATCH_AUCTION_CLEAR = 1
+	END_OF_SESSION = 2
+
+
+
+class Scheduler(object):
+	'''
+	Discrete-event scheduler. The arrivals of the traders are pre-generated and already sorted, we therefore do not push
+	them onto the heap, but merge them with the heap of all other (timed) events on the fly.
+	Every event is handled by the handler registered for its type, which is called as handler(timestamp, *payload).
+	Arrivals have the payload (trader_type, trader_idx).
+	'''
+	def __init__(self, entries: np.ndarray) -> None:
+		self._arrival_timestamps: List[float] = entries['timestamp'].tolist()
+		self._arrival_trader_types: List[int] = entries['trader_type'].tolist()
+		self._arrival_trader_idxs: List[int] = entries['trader_idx'].tolist()
+		self._next_arrival = 0
+		self._events: List[Tuple[float, EventType, int, Tuple[Any, ...]]] = []
+		# The counter breaks the ties of events of the same type happening at the same time, they are handled in the
+		# order in which they were scheduled. It is a plain integer, so that the scheduler can be pickled.
+		self._scheduled_count = 0
+		self._handlers: Dict[EventType, Callable[..., None]] = {}
+		self._stopped = False
+		self.current_time = 0
+
+
+	def register_handler(self, event_type: EventType, handler: Callable[..., None]) -> None:
+		self._handlers[event_type] = handler
+
+
+	def get_handler(self, event_type: EventType) -> Callable[..., None]:
+		return self._handlers[event_type]
+
+
+	def schedule(self, timestamp: float, event_type: EventType, *payload: Any) -> None:
+		self._scheduled_count += 1
+		heapq.heappush(self._events, (timestamp, event_type, self._scheduled_count, payload))
+
+
+	def stop(self) -> None:
+		self._stopped = True
+
+
+	def run(self, until: float = float('inf')) -> None:
+		'''
+		Handles the events in the order of their timestamps until there are none left, or until the scheduler is stopped.
+		Events after the time :param until: are left for the next run.
+		'''
+		timestamps, trader_types, trader_idxs = self._arrival_timestamps, self._arrival_trader_types, self._arrival_trader_idxs
+		arrivals_count = len(timestamps)
+		events = self._events
+		handle_arrival = self._handlers[EventType.ARRIVAL]
+		next_arrival = self._next_arrival
+		while not self._stopped:
+			if next_arrival < arrivals_count and (not events or (timestamps[next_arrival], EventType.ARRIVAL) < events[0][:2]):
+				if timestamps[next_arrival] > until:
+					break
+				self.current_time = timestamps[next_arrival]
+				handle_arrival(timestamps[next_arrival], trader_types[next_arrival], trader_idxs[next_arrival])
+				next_arrival += 1
+			elif events:
+				if events[0][0] > until:
+					break
+				timestamp, event_type, _, payload = heapq.heappop(events)
+				self.current_time = timestamp
+				self._handlers[event_type](timestamp, *payload)
+			else:
+				break
+		self._next_arrival = next_arrival
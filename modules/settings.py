@@ -25,10 +25,21 @@ SIGMA_ASSET = math.sqrt(5e6)
 # Market (General)
 NAMES_OF_EXCHANGES = ('New York', 'Chicago')
 NATIONAL_BEST_BID_AND_OFFER_DELAY = 0
+# None stands for the continuous trading, otherwise the exchanges run the frequent batch auctions in this interval.
+BATCH_AUCTION_INTERVAL = None
+# Implementation of the exchanges' orderbook, either the 'NonUniqueIdOrderBook' of the orderbook package or our 'LimitOrderBook'.
+ORDERBOOK = 'NonUniqueIdOrderBook'
 TRADER_TYPES = ('Arbitrageur', 'MarketMaker', 'ZeroIntelligence')
 SESSION_LENGTH = int(12e3)
 PARAMETERS_SET = os.path.join(os.path.dirname(__file__), '..', 'parameters.csv')
 
+# Database, the credentials are taken from the environment unless they are set in the settings_dev
+DATABASE = os.environ.get('PGDATABASE', 'postgres')
+USER = os.environ.get('PGUSER', 'postgres')
+PASSWORD = os.environ.get('PGPASSWORD', '')
+SERVER = os.environ.get('PGHOST', 'localhost')
+PORT = os.environ.get('PGPORT', '5432')
+
 try:
 	from modules.settings_dev import *
 except ModuleNotFoundError:
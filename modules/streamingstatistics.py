@@ -0,0 +1,206 @@
+from typing import Dict, Optional, Tuple
+import math
+
+import numpy as np
+
+
+
+class RunningStatistics(object):
+	'''
+	Mean and variance updated with every new value by the Welford's algorithm, nothing but the count, the mean and
+	the sum of the squared deviations is stored.
+	'''
+	def __init__(self) -> None:
+		self.count = 0
+		self.mean = float('nan')
+		self._sum_of_squared_deviations = 0.
+
+
+	def add(self, value: float) -> None:
+		self.count += 1
+		if self.count == 1:
+			self.mean = float(value)
+			return
+		delta = value - self.mean
+		self.mean += delta / self.count
+		self._sum_of_squared_deviations += delta * (value - self.mean)
+
+
+	@property
+	def variance(self) -> float:
+		'''
+		The sample variance, it is not defined for less than two values.
+		'''
+		if self.count < 2:
+			return float('nan')
+		return self._sum_of_squared_deviations / (self.count - 1)
+
+
+	@property
+	def std(self) -> float:
+		return math.sqrt(self.variance)
+
+
+
+class Histogram(object):
+	'''
+	Counts the values in equally wide bins between :param low: and :param high:, values outside of the range are counted
+	in the bins at its edges. The quantiles are then interpolated linearly within the bins, their error within the range
+	is therefore at most the width of one bin.
+	'''
+	def __init__(self, low: float, high: float, bins_count: int = 1000) -> None:
+		self.low = low
+		self.high = high
+		self.bins_count = bins_count
+		self.bin_width = (high - low) / bins_count
+		self.counts = np.zeros(bins_count, dtype = np.int64)
+		self.count = 0
+		self.minimum = float('inf')
+		self.maximum = float('-inf')
+
+
+	def add(self, value: float) -> None:
+		self.counts[min(max(int((value - self.low) / self.bin_width), 0), self.bins_count - 1)] += 1
+		self.count += 1
+		self.minimum = min(self.minimum, value)
+		self.maximum = max(self.maximum, value)
+
+
+	def quantile(self, q: float) -> float:
+		if not self.count:
+			return float('nan')
+		rank = q * self.count
+		cumulative_counts = np.cumsum(self.counts)
+		bin_idx = min(int(np.searchsorted(cumulative_counts, rank, side = 'left')), self.bins_count - 1)
+		count_before = cumulative_counts[bin_idx - 1] if bin_idx else 0
+		fraction = (rank - count_before) / self.counts[bin_idx] if self.counts[bin_idx] else 0.
+		# The edge bins also hold the values outside of the range, they therefore stretch up to the observed extremes.
+		bin_low = self.low + bin_idx * self.bin_width
+		bin_high = bin_low + self.bin_width
+		if bin_idx == 0:
+			bin_low = min(bin_low, self.minimum)
+		if bin_idx == self.bins_count - 1:
+			bin_high = max(bin_high, self.maximum)
+		return float(min(max(bin_low + fraction * (bin_high - bin_low), self.minimum), self.maximum))
+
+
+
+class StreamingStatistics(object):
+	'''
+	Mean, variance and approximate quantiles of a stream of values, the memory does not depend on the number of values.
+	'''
+	def __init__(self, low: float, high: float, bins_count: int = 1000) -> None:
+		self.running_statistics = RunningStatistics()
+		self.histogram = Histogram(low, high, bins_count)
+
+
+	def __len__(self) -> int:
+		return self.running_statistics.count
+
+
+	def add(self, value: float) -> None:
+		self.running_statistics.add(value)
+		self.histogram.add(value)
+
+
+	@property
+	def mean(self) -> float:
+		return self.running_statistics.mean
+
+
+	@property
+	def std(self) -> float:
+		return self.running_statistics.std
+
+
+	def quantile(self, q: float) -> float:
+		return self.histogram.quantile(q)
+
+
+
+class TimeWeightedMean(object):
+	'''
+	Mean of a value which changes in time, every value is weighted by the time it held. The value can be undefined
+	(None) for some time, for example the spread when one side of the orderbook is empty, this time is then left out.
+	'''
+	def __init__(self, start_time: float = 0) -> None:
+		self._last_time = start_time
+		self._last_value: Optional[float] = None
+		self._weighted_sum = 0.
+		self._total_weight = 0.
+
+
+	def update(self, time: float, value: Optional[float]) -> None:
+		'''
+		The :param value: holds from the :param time: until the next update.
+		'''
+		if self._last_value is not None:
+			self._weighted_sum += self._last_value * (time - self._last_time)
+			self._total_weight += time - self._last_time
+		self._last_time, self._last_value = time, value
+
+
+	def get_mean(self, time: float) -> float:
+		'''
+		Returns the mean until the :param time:, the last value is counted up to it.
+		'''
+		weighted_sum, total_weight = self._weighted_sum, self._total_weight
+		if self._last_value is not None:
+			weighted_sum += self._last_value * (time - self._last_time)
+			total_weight += time - self._last_time
+		return weighted_sum / total_weight if total_weight > 0 else float('nan')
+
+
+
+class MarketQuality(object):
+	'''
+	Time-weighted quoted spread and top of the book depth of every exchange. The depth is the number of (unit) orders at
+	the best bid and at the best ask together. The regulator is observed after every event, the statistics are updated
+	only when the exchanges have changed.
+	'''
+	def __init__(self, regulator) -> None:
+		self.regulator = regulator
+		self._book_version: int = None
+		self.quoted_spreads: Dict[str, TimeWeightedMean] = {
+			exchange_name: TimeWeightedMean() for exchange_name in regulator.top_of_book
+		}
+		self.top_of_book_depths: Dict[str, TimeWeightedMean] = {
+			exchange_name: TimeWeightedMean() for exchange_name in regulator.top_of_book
+		}
+
+
+	def observe(self) -> None:
+		regulator = self.regulator
+		if regulator.book_version == self._book_version:
+			return
+		self._book_version = regulator.book_version
+		time = regulator.current_time
+		for exchange_name, top_of_book in regulator.top_of_book.items():
+			has_both_sides = top_of_book.best_bid is not None and top_of_book.best_ask is not None
+			self.quoted_spreads[exchange_name].update(time, top_of_book.best_ask - top_of_book.best_bid if has_both_sides else None)
+			order_lifetimes = regulator.order_lifetimes[exchange_name]
+			self.top_of_book_depths[exchange_name].update(time, sum(
+				order_lifetimes.sides[side].get_depth(best_price, time)
+				for side, best_price in ((1, top_of_book.best_bid), (0, top_of_book.best_ask))
+				if best_price is not None
+			))
+
+
+	def get_summary(self, time: float) -> Dict[str, Tuple[float, float]]:
+		'''
+		Returns the (quoted spread, top of the book depth) pair of every exchange until the :param time:.
+		'''
+		return {
+			exchange_name: (self.quoted_spreads[exchange_name].get_mean(time), self.top_of_book_depths[exchange_name].get_mean(time))
+			for exchange_name in self.quoted_spreads
+		}
+
+
+	def get_means(self, time: float) -> Tuple[float, float]:
+		'''
+		The quoted spread and the top of the book depth averaged over the exchanges, the exchanges which never had both
+		sides quoted are left out of the spread.
+		'''
+		spreads, depths = zip(*self.get_summary(time).values())
+		spreads = [spread for spread in spreads if not math.isnan(spread)]
+		return (float(np.mean(spreads)) if spreads else float('nan'), float(np.mean(depths)))
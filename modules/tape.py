@@ -0,0 +1,192 @@
+from typing import Any, Callable, Iterator, Optional, Tuple
+import enum
+import os
+
+import numpy as np
+
+import modules.misc
+import modules.settings as settings
+
+
+
+class EventCode(enum.IntEnum):
+	ARRIVAL = 0
+	ADD = 1
+	CANCEL = 2
+	FILL = 3
+	ASSET_PRICE = 4
+	NATIONAL_BEST_BID_AND_OFFER = 5
+
+
+
+# Every event is one fixed-width record. The trader type is the position in the settings.TRADER_TYPES and the exchange
+# the position in the names of the exchanges of the config, the fields which do not apply to the event are left at -1.
+# The NBBO is recorded as two records, the bid (side 1) and the ask (side 0), missing prices are -1 as well.
+TAPE_DTYPE = np.dtype([
+	('time', np.float64),
+	('order_id', np.int64),
+	('price', np.int64),
+	('trader_idx', np.int32),
+	('event', np.int8),
+	('trader_type', np.int8),
+	('exchange', np.int8),
+	('side', np.int8),
+])
+TAPE_SUFFIX = '.tape'
+
+
+
+class TapeRecorder(object):
+	'''
+	Writes the events of one session to the tape file. The records are collected in a buffer, which is appended to the
+	file as raw bytes whenever it gets full, the file can then be mapped into the memory as one array by the Tape.
+	'''
+	def __init__(self, path: str, names_of_exchanges: Tuple[str, ...], buffer_size: int = 2 ** 16) -> None:
+		self.path = path
+		self._exchange_codes = {exchange_name: code for code, exchange_name in enumerate(names_of_exchanges)}
+		self._buffer = np.full(buffer_size, -1, dtype = TAPE_DTYPE)
+		self._buffered_count = 0
+		self.records_count = 0
+		directory = os.path.dirname(os.path.abspath(path))
+		os.makedirs(directory, exist_ok = True)
+		self._file = open(path, 'wb')
+
+
+	def record(self, time: float, event: EventCode, exchange_name: Optional[str] = None, side: int = -1,
+	owner: Optional[modules.misc.TraderIdx] = None, order_id: int = -1, price: Optional[int] = -1) -> None:
+		if self._buffered_count == len(self._buffer):
+			self.flush()
+		self._buffer[self._buffered_count] = (
+			time,
+			order_id,
+			price if price is not None else -1,
+			owner.idx if owner is not None else -1,
+			event,
+			settings.TRADER_TYPES.index(owner.type) if owner is not None else -1,
+			self._exchange_codes[exchange_name] if exchange_name is not None else -1,
+			side,
+		)
+		self._buffered_count += 1
+		self.records_count += 1
+
+
+	def record_arrival(self, time: float, trader_type: int, trader_idx: int) -> None:
+		self.record(time, EventCode.ARRIVAL, owner = modules.misc.TraderIdx(trader_idx, settings.TRADER_TYPES[trader_type]))
+
+
+	def record_national_best_bid_and_offer(self, time: float, national_best_bid_and_offer: modules.misc.NBBO) -> None:
+		self.record(time, EventCode.NATIONAL_BEST_BID_AND_OFFER, national_best_bid_and_offer.bid_exchange, 1,
+			price = national_best_bid_and_offer.bid)
+		self.record(time, EventCode.NATIONAL_BEST_BID_AND_OFFER, national_best_bid_and_offer.ask_exchange, 0,
+			price = national_best_bid_and_offer.ask)
+
+
+	def wrap_arrival(self, handler: Callable[[float, int, int], None]) -> Callable[[float, int, int], None]:
+		'''
+		Returns the arrival handler of the scheduler, which records the arrival before it is handled.
+		'''
+		def recorded_handler(timestamp: float, trader_type: int, trader_idx: int) -> None:
+			self.record_arrival(timestamp, trader_type, trader_idx)
+			handler(timestamp, trader_type, trader_idx)
+		return recorded_handler
+
+
+	def attach_asset(self, asset: Any, clock: Callable[[], float]) -> None:
+		'''
+		Replaces the get_new_price() of the :param asset: (and of this instance only), so that every new price is recorded
+		at the time given by the :param clock:.
+		'''
+		get_new_price = asset.get_new_price
+
+		def recorded_get_new_price() -> None:
+			get_new_price()
+			self.record(clock(), EventCode.ASSET_PRICE, price = asset.last_price)
+		asset.get_new_price = recorded_get_new_price
+
+
+	def flush(self) -> None:
+		self._file.write(self._buffer[:self._buffered_count].tobytes())
+		self._buffer[:self._buffered_count] = -1
+		self._buffered_count = 0
+
+
+	def close(self) -> None:
+		if self._file.closed:
+			return
+		self.flush()
+		self._file.close()
+
+
+
+class Tape(object):
+	'''
+	Read-only access to the recorded session. The file is mapped into the memory, nothing is copied until some array
+	is actually computed from the events.
+	'''
+	def __init__(self, path: str) -> None:
+		self.path = path
+		if os.path.getsize(path):
+			self.events: np.ndarray = np.memmap(path, dtype = TAPE_DTYPE, mode = 'r')
+		else:
+			self.events = np.empty(0, dtype = TAPE_DTYPE)
+
+
+	def __len__(self) -> int:
+		return len(self.events)
+
+
+	def select(self, *events: EventCode) -> np.ndarray:
+		return self.events[np.isin(self.events['event'], events)]
+
+
+	def get_asset_prices(self) -> Tuple[np.ndarray, np.ndarray]:
+		'''
+		Returns the times and the prices of the asset.
+		'''
+		prices = self.select(EventCode.ASSET_PRICE)
+		return prices['time'], prices['price']
+
+
+	def get_national_best_bid_and_offer(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+		'''
+		Returns the times of the changes of the NBBO and the bid and ask after every change, missing prices are -1.
+		'''
+		records = self.select(EventCode.NATIONAL_BEST_BID_AND_OFFER)
+		return records['time'][1::2], records['price'][::2], records['price'][1::2]
+
+
+	def get_order_lifetimes(self) -> np.ndarray:
+		'''
+		Matches every added order with its cancel or fill. The orders which were never removed have the time_removed equal
+		to infinity and the removal event -1.
+		'''
+		added = self.select(EventCode.ADD)
+		removed = self.select(EventCode.CANCEL, EventCode.FILL)
+		removed = removed[np.argsort(removed['order_id'], kind = 'stable')]
+		positions = np.searchsorted(removed['order_id'], added['order_id'])
+		positions_in_range = np.minimum(positions, max(len(removed) - 1, 0))
+		is_removed = (positions < len(removed)) & (removed['order_id'][positions_in_range] == added['order_id']) \
+			if len(removed) else np.zeros(len(added), dtype = bool)
+		lifetimes = np.empty(len(added), dtype = [
+			('order_id', np.int64), ('price', np.int64), ('side', np.int8), ('exchange', np.int8),
+			('trader_type', np.int8), ('time_added', np.float64), ('time_removed', np.float64), ('removal_event', np.int8),
+		])
+		for name in ('order_id', 'price', 'side', 'exchange', 'trader_type'):
+			lifetimes[name] = added[name]
+		lifetimes['time_added'] = added['time']
+		lifetimes['time_removed'] = np.inf
+		lifetimes['removal_event'] = -1
+		if len(removed):
+			lifetimes['time_removed'][is_removed] = removed['time'][positions_in_range[is_removed]]
+			lifetimes['removal_event'][is_removed] = removed['event'][positions_in_range[is_removed]]
+		return lifetimes
+
+
+
+def iterate_tapes(directory: str) -> Iterator[Tape]:
+	'''
+	Opens all the tapes in the :param directory: one by one, only the tape being processed is mapped into the memory.
+	'''
+	for name in sorted(os.listdir(directory)):
+		if name.endswith(TAPE_SUFFIX):
+			yield Tape(os.path.join(directory, name))
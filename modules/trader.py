@@ -1,13 +1,12 @@
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import decimal
 import math
-import operator
-import orderbook
-import sys
 
+import numpy as np
+
+import modules.agentstate
 import modules.misc
 import modules.regulator
-import modules.settings as settings
 
 
 class Trader:
@@ -15,15 +14,40 @@ class Trader:
 	The trader class has functions that every trader type will make use of - mainly sending orders onto the exchange.
 	'''
 
-	def __init__(self, regulator: modules.regulator.Regulator, idx: int) -> None:
+	def __init__(self, regulator: modules.regulator.Regulator, idx: int,
+	national_best_bid_and_offer_delay: Optional[float] = None, random_generator: Optional[np.random.Generator] = None,
+	population_state: Optional[modules.agentstate.PopulationState] = None) -> None:
 		self.regulator = regulator
+		# All traders of one replication share the random generator of the replication.
+		self.random_generator: np.random.Generator = random_generator if random_generator is not None \
+			else np.random.default_rng()
+		# By default the trader sees the NBBO with the delay set by the regulator, but he can also have his own.
+		self.national_best_bid_and_offer_delay = regulator.national_best_bid_and_offer_delay \
+			if national_best_bid_and_offer_delay is None else national_best_bid_and_offer_delay
+		self.regulator.register_national_best_bid_and_offer_delay(self.national_best_bid_and_offer_delay)
 		self._last_order: Dict[str, Any] = None
-		self.current_orders: [modules.misc.CurrentOrder] = []
-		self.trades: List[modules.misc.CurrentOrder] = []
+		# The trader's resting orders indexed by their ids.
+		self.current_orders: Dict[int, modules.misc.CurrentOrder] = {}
 		self.last_entry = 0
-		self.position = 0
 		self.side: int = None
 		self._idx = idx
+		self.trader_idx = modules.misc.TraderIdx(idx, self.__class__.__name__)
+		# The position, cash and private utilities of the trader are kept in the state of his whole population, where
+		# he is the row given by his idx. A trader without population has a state of his own.
+		if population_state is None:
+			population_state, idx = modules.agentstate.PopulationState(1), 0
+		self.population_state = population_state
+		self._population_idx = idx
+
+
+	@property
+	def position(self) -> int:
+		return int(self.population_state.positions[self._population_idx])
+
+
+	@position.setter
+	def position(self, position: int) -> None:
+		self.population_state.positions[self._population_idx] = position
 
 
 	def __str__(self):
@@ -37,29 +61,29 @@ class Trader:
 	def add_limit_order(self, price: int, seconds: int, nanoseconds: int, exchange_name: str) -> None:
 		''''
 		We first check whether the trader has any order on any exchange. If he has, we delete the order.
-		Then the function updates the number of last order on the market as a whole. This should ensure uniqueness of
-		the id per side on all exchanges. It then assigns the order and exchange to the Trader class for future reference.
+		The order is first registered with the regulator, who gives it an id unique on all exchanges. This way once
+		the order is executed, we know which trader to notify that his limit order has been filled.
+		It then assigns the order and exchange to the Trader class for future reference.
 		Finally it submits the order onto the appropriate exchange.
 		'''
-		order_idx = self.increase_last_order_idx(modules.misc.side_to_string(self.side))
-		new_order = modules.misc.CurrentOrder(order_idx, self.side, price, exchange_name)
-		self.current_orders.append(new_order)
 		self.last_entry = seconds + nanoseconds
-		# We also want to share the information about the current trade with the regulator.
-		# This way once the trader executes the trade, we know which trader to notify that his limit order has been filled.
-		self.regulator.meta[new_order] = {
-			'trader_idx': modules.misc.TraderIdx(self._idx, self.__class__.__name__),
-			'time_entry': self.last_entry,
-		}
-		self.regulator.exchanges[exchange_name].add_order(
-			side = modules.misc.side_to_orderbook_type(self.side),
+		order_idx = self.regulator.orders.register(
+			owner = self.trader_idx,
+			side = self.side,
+			price = price,
+			exchange_name = exchange_name,
+			time_entry = self.last_entry,
+		)
+		self.current_orders[order_idx] = modules.misc.CurrentOrder(order_idx, self.side, price, exchange_name)
+		self.regulator.add_order(
+			exchange_name = exchange_name,
+			side = self.side,
 			order_id = order_idx,
 			price = price,
-			quantity = 1,
-			position = None,
 			metadata = {
 				'timestamp': seconds * int(1e9) + nanoseconds * int(1e18)
-			}
+			},
+			owner = self.trader_idx,
 		)
 
 
@@ -70,118 +94,83 @@ class Trader:
 		# mot side transforms True into False and vice versa
 		side = modules.misc.side_to_orderbook_type(not self.side)
 		best_order = self.regulator.exchanges[exchange_name].get_side(side).get_best()
-		self.regulator.exchanges[exchange_name].fill_order(
-			order_id = best_order.id,
-			filled_quantity = 1,
-			side = side
+		# We have to keep track of the trader who initially submitted the order onto the exchange, the registry forgets
+		# about the order once it is filled.
+		passive_side_order = self.regulator.orders.get_order(best_order.id)
+		trader_with_passive_limit_order = self.regulator.orders.get_owner(best_order.id)
+		self.regulator.execution_times.add(self.regulator.current_time - self.regulator.orders.get_entry_time(best_order.id))
+		self.regulator.fill_order(
+			exchange_name = exchange_name,
+			side = int(not self.side),
+			order_id = best_order.id
 		)
-		# We have to keep track of the trader who initially submitted the order onto the exchange.
-		passive_side_order = modules.misc.CurrentOrder(best_order.id, int(not self.side), best_order.price, exchange_name)
-		trader_with_passive_limit_order = self.regulator.meta[
-			passive_side_order
-		]
-		self.regulator.execution_times.append(self.regulator.current_time - trader_with_passive_limit_order['time_entry'])
 		self.update_position_and_trades(
 			order = modules.misc.CurrentOrder(best_order.id, self.side, best_order.price, exchange_name)
 		)
 		return [modules.misc.TraderOrderIdx(
-			trader_idx = trader_with_passive_limit_order['trader_idx'],
+			trader_idx = trader_with_passive_limit_order,
 			order = passive_side_order
 		)]
 
 
-	def delete_order_from_an_exchange(self, order: modules.misc.CurrentOrder, exchange_name: str,
-	exchanges: Dict[str, orderbook.orderbook.NonUniqueIdOrderBook]) -> None:
+	def cancel_order(self, order: modules.misc.CurrentOrder) -> None:
 		'''
-		Given any exchange (be it historical, or real time), this function deletes an existing (!) limit order.
+		Cancels the trader's resting limit order on the exchange.
 		'''
-		exchanges[exchange_name].delete_order(
-			order_id = order.idx,
-			side = modules.misc.side_to_orderbook_type(order.side)
+		self.regulator.delete_order(
+			exchange_name = order.exchange_name,
+			side = order.side,
+			order_id = order.idx
 		)
 
 
 	def update_position_and_trades(self, order: modules.misc.CurrentOrder) -> None:
 		'''
 		Is called only in case of active/passive execution of an order.
-		We add (subtract) 1 from the :param position: in case the trader's' buy (sell) order goes through.
-		Also we add the current order to the list of trades.
-		'''
-		# If the execution is passive
-		self.position += order.side if order.side else -1
-		self.trades.append(order)
-		self.add_private_utility_to_list()
+		We add (subtract) 1 from the :param position: in case the trader's' buy (sell) order goes through, the price
+		is paid (received) and the private utility of the trade is added to the trader's sum.
+		'''
+		self.population_state.record_trade(
+			idx = self._population_idx,
+			side = order.side,
+			price = order.price,
+			private_utility = self.get_private_utility_of_the_trade(),
+		)
 
 
-	def increase_last_order_idx(self, side: str) -> int:
+	def get_private_utility_of_the_trade(self) -> float:
 		'''
-
+		Only ZeroIntelligence traders have a private utility, the sum of these private utilities form the basis of ZI's surplus.
 		'''
-		self.regulator.last_order_idx[side] += 1
-		return self.regulator.last_order_idx[side]
+		return 0
 
 
-	def add_private_utility_to_list(self, active_trade: bool = False) -> None:
+	def get_estimate_of_the_fundamental_value_of_the_asset(self) -> decimal.Decimal:
 		'''
-		ZeroIntelligence traders have a private utility, the sum of these private utilities form the basis of ZI's surplus.
+		The estimate is the same for all traders, it is therefore computed only once per event by the market state.
 		'''
-		if self.__class__.__name__ != 'ZeroIntelligence':
-			return
-		utility_sign = 1 if self.side else -1
-		self.list_private_utility.append(utility_sign * self.private_utility)
+		return self.regulator.market_state.get_estimate_of_the_fundamental_value_of_the_asset()
 
 
-	def get_estimate_of_the_fundamental_value_of_the_asset(self) -> decimal.Decimal:
+	def get_lagged_exchanges(self) -> Dict[str, Any]:
 		'''
-		Represents equation (1), slightly rewritten.
+		Returns the views of the exchanges as the trader sees them, that is lagged by his NBBO delay and without his
+		own orders.
 		'''
-		mean_price = self.regulator.asset.mean_price
-		return mean_price + (self.regulator.asset.last_price - mean_price) * \
-		(1 - settings.MEAN_REVERSION_FACTOR) ** (settings.SESSION_LENGTH - self.regulator.current_time)
+		return self.regulator.get_lagged_exchanges(self.national_best_bid_and_offer_delay, excluded_owner = self.trader_idx)
 
 
-	def get_national_best_bid_and_offer(self) -> str:
+	def get_national_best_bid_and_offer(self) -> modules.misc.NBBO:
 		'''
-		Returns the latest orderbook snapshot, which is stored in the Regulator's historic_exchanges_list.
+		Returns the NBBO computed from the lagged view of the exchanges, without the trader's own orders. Unless the
+		trader has some orders which can be seen in the lagged view, the NBBO is the same for all traders with the same
+		delay and it is taken from the market state.
 		'''
-		return self.get_accurate_national_best_bid_and_offer(
-			exchanges = self.regulator.historic_exchanges_list[-1].exchanges,
-			current_orders = self.current_orders,
-		)
-
-
-	def get_accurate_national_best_bid_and_offer(self, current_orders: modules.misc.CurrentOrder,
-	exchanges: Dict[str, orderbook.orderbook.NonUniqueIdOrderBook]) -> modules.misc.NBBO:
-		'''
-		Gets the best bid and best ask values given a standard dict of exchanges.
-		Works with both current (true) dict of exchanges as well as historic (lagged) dict of exchanges.
-		If we are supplied with trader's current_orders, we first clean the orderbook, by removing his orders only then
-		we take the orderbook snapshot.
-		'''
-		list_exchange_info: List[NamedTuple] = []
-		if self.current_orders and self.last_entry + self.regulator.national_best_bid_and_offer_delay <= self.regulator.current_time:
-			for order in self.current_orders:
-				self.delete_order_from_an_exchange(
-					order = order,
-					exchange_name = order.exchange_name,
-					exchanges = exchanges
-				)
-		for exchange_name, exchange in exchanges.items():
-			best_bid, best_ask = [side.get_best().price if side else None for side in (exchange.bid, exchange.ask)]
-			list_exchange_info.append(modules.misc.ExchangeInfo(
-				best_bid = best_bid, 
-				best_ask = best_ask,
-				exchange = exchange_name,
-			))
-		bid_tuple = sorted([x for x in list_exchange_info if x.best_bid], key = operator.attrgetter('best_bid'), reverse = True)
-		ask_tuple = sorted([x for x in list_exchange_info if x.best_ask], key = operator.attrgetter('best_ask'))
-		bid, bid_exchange = (bid_tuple[0].best_bid, bid_tuple[0].exchange) if bid_tuple else (None, None)
-		ask, ask_exchange = (ask_tuple[0].best_ask, ask_tuple[0].exchange) if ask_tuple else (None, None)
-		return modules.misc.NBBO(
-			bid = bid,
-			ask = ask,
-			bid_exchange = bid_exchange,
-			ask_exchange = ask_exchange
+		if not self.regulator.has_orders_of(self.trader_idx):
+			return self.regulator.market_state.get_lagged_national_best_bid_and_offer(self.national_best_bid_and_offer_delay)
+		return self.regulator.market_state.get_lagged_national_best_bid_and_offer(
+			self.national_best_bid_and_offer_delay,
+			excluded_owner = self.trader_idx,
 		)
 
 
@@ -209,9 +198,7 @@ class Trader:
 		'''
 		This function returns sum of short minus long trades - the position can be non-zero!
 		'''
-		long_trades = sum([trade.price for trade in self.trades if trade.side])
-		short_trades = sum([trade.price for trade in self.trades if not trade.side])
-		return short_trades - long_trades
+		return int(self.population_state.cash[self._population_idx])
 
 
 	def calculate_value_of_final_position(self):
@@ -16,14 +16,37 @@ class ZeroIntelligence(modules.trader.Trader):
 	ZeroIntelligence arrive according to a Poisson process and trade randomly.
 	'''
 	def __init__(self, quantity_max: int, shading_min: int, shading_max: int,
-	default_exchange: str, *args, **kwargs) -> None:
+	default_exchange: str, *args, sigma_utility: float = settings.SIGMA_UTILITY, **kwargs) -> None:
 		super(ZeroIntelligence, self).__init__(*args, **kwargs)
 		self.quantity_max = quantity_max
+		self.sigma_utility = sigma_utility
 		self.utility = []
 		self.shading_min: int = shading_min
 		self.shading_max: int = shading_max
 		self.default_exchange = default_exchange
-		self.list_private_utility: List[float] = []
+		self.private_utility: float = 0
+		# The random decisions of all arrivals can be drawn at once by presample_decisions(), the arrival then only
+		# indexes into them. Until then (or once they run out) they are drawn on every arrival.
+		self._arrival: int = 0
+		self._presampled_arrivals_count: int = 0
+		self._presampled_sides: List[int] = []
+		self._presampled_shadings: List[float] = []
+		self._presampled_private_component_gains: np.ndarray = None
+
+
+	def presample_decisions(self, arrivals_count: int) -> None:
+		'''
+		Draws the side, the shading and the vector of private benefits for each of the :param arrivals_count: arrivals of
+		the trader in the session. Every quantity is drawn in a single call, the private benefits as one 2-D array with
+		one sorted row per arrival.
+		'''
+		self._presampled_sides = self.random_generator.integers(0, 2, arrivals_count).tolist()
+		self._presampled_shadings = self.random_generator.uniform(self.shading_min, self.shading_max, arrivals_count).tolist()
+		private_component_gains = self.random_generator.normal(0, self.sigma_utility, (arrivals_count, 2 * self.quantity_max))
+		private_component_gains.sort(axis = 1)
+		self._presampled_private_component_gains = private_component_gains[:, ::-1]
+		self._presampled_arrivals_count = arrivals_count
+		self._arrival = 0
 
 
 	def generate_private_component_gain(self) -> List[float]:
@@ -31,7 +54,9 @@ class ZeroIntelligence(modules.trader.Trader):
 		Generates a list of private benfits. Comes from a normal distribution and is used for calculting the order's price 
 		at which the trader should submit his order. It is also valuing the position at the end of the trading session.
 		'''
-		return sorted(np.random.normal(0, settings.SIGMA_UTILITY, 2 * self.quantity_max), reverse = True)
+		if self._arrival < self._presampled_arrivals_count:
+			return self._presampled_private_component_gains[self._arrival]
+		return sorted(self.random_generator.normal(0, self.sigma_utility, 2 * self.quantity_max), reverse = True)
 
 
 	def get_private_utility_of_the_asset(self) -> float:
@@ -46,12 +71,22 @@ class ZeroIntelligence(modules.trader.Trader):
 		return self.private_utility
 
 
+	def get_private_utility_of_the_trade(self) -> float:
+		'''
+		The private utility of the asset is gained by buying it and lost by selling it.
+		'''
+		return self.private_utility if self.side else - self.private_utility
+
+
 	def generate_offset(self):
 		'''
 		Given the properties of the uniform distribution, we can compute this part on its own and we'll add (subtract)
 		the number from the sum of the public and private valuation if the trader is a seller (buyer).
 		'''
-		shading = np.random.uniform(self.shading_min, self.shading_max)
+		if self._arrival < self._presampled_arrivals_count:
+			shading = self._presampled_shadings[self._arrival]
+		else:
+			shading = self.random_generator.uniform(self.shading_min, self.shading_max)
 		return - shading if self.side else shading
 
 
@@ -59,7 +94,10 @@ class ZeroIntelligence(modules.trader.Trader):
 		'''
 		In the next trade, the trader is either a buyer or a seller, drawn from binomial distribution.
 		'''
-		self.side = np.random.binomial(1, 0.5)
+		if self._arrival < self._presampled_arrivals_count:
+			self.side = self._presampled_sides[self._arrival]
+		else:
+			self.side = int(self.random_generator.integers(0, 2))
 
 
 	def do(self):
@@ -79,12 +117,8 @@ class ZeroIntelligence(modules.trader.Trader):
 			self.generate_offset()
 		)
 		if self.current_orders:
-			for order in self.current_orders:
-				self.delete_order_from_an_exchange(
-					order = order,
-					exchange_name = order.exchange_name,
-					exchanges = self.regulator.exchanges,
-				)
+			for order in self.current_orders.values():
+				self.cancel_order(order)
 		
 		exchange_name, order_price = self.decide_what_exchange_and_price_to_choose(
 			exchange_name = self.default_exchange,
@@ -94,7 +128,8 @@ class ZeroIntelligence(modules.trader.Trader):
 			exchange_name = exchange_name,
 			order_price = order_price
 		)
-		self.current_orders = []
+		self.current_orders = {}
+		self._arrival += 1
 		return self.process_exchange_response(
 			exchange_name = exchange_name,
 			action = action,
@@ -109,8 +144,9 @@ class ZeroIntelligence(modules.trader.Trader):
 		the direction (long/short) that the trade wants to trade in.
 		'''
 		side_type = modules.misc.side_to_orderbook_type(not self.side)
-		exchanges = self.regulator.historic_exchanges_list[-1].exchanges
+		exchanges = self.get_lagged_exchanges()
 		exchange_name = self.default_exchange
+		# The trader's own orders are hidden from the views, so the best price on the default exchange ignores them too.
 		national_best_bid_and_offer = self.get_national_best_bid_and_offer()
 		
 		# The default exchange does not have to have orders on one side, that is when the OrderSideEmpty exceptions
@@ -150,6 +186,6 @@ class ZeroIntelligence(modules.trader.Trader):
 		'''
 		payoff = self.calculate_profit_from_trading()
 		payoff += self.calculate_value_of_final_position()
-		payoff += sum(self.list_private_utility)
+		payoff += float(self.population_state.private_utility_sums[self._population_idx])
 		return payoff
 		
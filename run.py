@@ -1,57 +1,349 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import argparse
+import collections
+import itertools
+import json
 import logwood
 import multiprocessing
+import multiprocessing.pool
 import os
-import random
+import queue
+import secrets
 import pandas as pd
 
+import modules.arrowstore
+import modules.config
 import modules.database
 import modules.god
+import modules.profiler
+import modules.replications
 import modules.settings as settings
+import modules.tape
 
 
 
 logwood.basic_config(level = logwood.INFO)
-		
-
-def set_parameters_value(parameters: pd.DataFrame) -> None:
-	parameters = parameters.to_dict('records')[0]
-	settings.ZERO_INTELLIGENCE_COUNT = int(parameters['zero_intelligence_count'])
-	settings.INTENSITY_ZERO_INTELLIGENCE = parameters['zero_intelligence_intensity']
-	settings.SHADING_MIN = int(parameters['zero_intelligence_shading_min'])
-	settings.SHADING_MAX = int(parameters['zero_intelligence_shading_max'])
-	settings.MARKET_MAKERS_COUNT = int(parameters['market_maker_count'])
-	settings.INTENSITY_MARKET_MAKER = parameters['market_maker_intensity']
-	settings.MARKET_MAKER_NUMBER_ORDERS = int(parameters['market_maker_number_orders'])
-	settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS = int(parameters['market_maker_number_of_ticks_between_orders'])
-	settings.MARKET_MAKER_SPREAD_AROUND_ASSET = int(parameters['market_maker_spread_around_asset'])
-	settings.NATIONAL_BEST_BID_AND_OFFER_DELAY = int(parameters['national_best_bid_and_offer_delay'])
-	settings.SESSION_LENGTH = int(parameters['session_length'])
+# Every worker of the pool gets its own copy of the configs of all parameters sets on start.
+configs: Dict[int, modules.config.SimulationConfig] = None
+# If set, every replication is profiled and its report is written into this directory.
+profile_directory: Optional[str] = None
+# If set, the events of every replication are recorded to a tape in this directory.
+tape_directory: Optional[str] = None
 
 
-def main() -> None:
+def get_configs(parameters: pd.DataFrame) -> Dict[int, modules.config.SimulationConfig]:
+	'''
+	Creates the immutable config of every parameters set, indexed by the id of the parameters set.
+	'''
+	return {
+		int(parameters_set['id']): modules.config.SimulationConfig.from_parameters(parameters_set)
+		for parameters_set in parameters.to_dict('records')
+	}
+
+
+def get_parameters_dataframe(backend: Any) -> pd.DataFrame:
 	'''
-	We get the set of parameters from which we select some set and we simulate it 10 times.
-	After the simulation, we save the 10 results and continue with the simulation.
+	Gets the table of all parameters sets from the database, the headers are taken from the csv file.
+	The Arrow files store only the responses, the parameters sets are then read from the csv file itself.
 	'''
-	parameters_table = modules.database.get_parameters_table()
+	if isinstance(backend, modules.arrowstore.ArrowBackend):
+		return pd.read_csv(settings.PARAMETERS_SET)
+	parameters_table = modules.database.get_parameters_table(backend)
 	headers = pd.read_csv(settings.PARAMETERS_SET).columns.values
-	parameters_dataframe = pd.DataFrame(parameters_table, columns = headers)
-	list_ids_to_be_processed = [500]
-	while True:
-		parameters_set_id = random.choice(list_ids_to_be_processed)
-		parameters = parameters_dataframe[parameters_dataframe['id'] == parameters_set_id].drop('id', 1)
-		set_parameters_value(parameters)
-		list_responses = []
-		for i in range(10):
-			GOD = modules.god.God()
-			list_responses.append(GOD.run_simulation())
-		modules.database.insert_new_results(
-			parameters_set_id = parameters_set_id,
-			list_responses = list_responses
+	return pd.DataFrame(parameters_table, columns = headers)
+
+
+def get_completed_replications(backend: Any) -> List[Tuple[int, int, int]]:
+	'''
+	Returns the (parameters_set_id, replication, seed) triple of every stored response.
+	'''
+	if isinstance(backend, modules.arrowstore.ArrowBackend):
+		return backend.get_completed_replications()
+	return modules.database.get_completed_replications(backend)
+
+
+def group_completed_replications(completed_replications: Iterable[Tuple[int, int, int]],
+parameters_set_ids: List[int]) -> Dict[int, Set[int]]:
+	'''
+	Returns the stored replications of every of the :param parameters_set_ids:.
+	'''
+	grouped_replications: Dict[int, Set[int]] = {parameters_set_id: set() for parameters_set_id in parameters_set_ids}
+	for parameters_set_id, replication, _ in completed_replications:
+		if parameters_set_id in grouped_replications:
+			grouped_replications[parameters_set_id].add(replication)
+	return grouped_replications
+
+
+def get_root_seed(seed: Optional[int], completed_replications: Iterable[Tuple[int, int, int]]) -> int:
+	'''
+	The resumed sweep has to continue with the root seed of the stored replications, otherwise it would mix the
+	replications of two seed trees. The stored seed is therefore reused, a fresh one is drawn only for a new sweep.
+	'''
+	stored_seeds = {stored_seed for _, _, stored_seed in completed_replications}
+	if len(stored_seeds) > 1:
+		raise ValueError(f'The stored replications come from several root seeds {sorted(stored_seeds)}, they cannot be resumed.')
+	if not stored_seeds:
+		return seed if seed is not None else secrets.randbits(63)
+	stored_seed = stored_seeds.pop()
+	if seed is not None and seed != stored_seed:
+		raise ValueError(f'The stored replications were run with the root seed {stored_seed}, not {seed}.')
+	return stored_seed
+
+
+def iterate_missing_replications(completed_replications: Set[int]) -> Iterator[int]:
+	'''
+	Yields the replications which are not stored yet, from the lowest one. The results come back in any order, an
+	interrupted sweep can therefore leave gaps, which are filled first.
+	'''
+	return (replication for replication in itertools.count() if replication not in completed_replications)
+
+
+def get_stored_responses(backend: Any, fields: Tuple[str, ...]) -> List[Tuple[Any, ...]]:
+	'''
+	Returns the id of the parameters set along with the :param fields: of every stored response.
+	'''
+	if isinstance(backend, modules.arrowstore.ArrowBackend):
+		responses = backend.read_responses().to_pandas()
+		return list(responses[['settings_id', *fields]].itertuples(index = False, name = None))
+	return modules.database.get_responses(fields, backend)
+
+
+def save_stopping_decisions(backend: Any, rows: List[Tuple[Any, ...]]) -> None:
+	if isinstance(backend, modules.arrowstore.ArrowBackend):
+		backend.insert_rows('stopping_decision', rows)
+		return
+	modules.database.insert_stopping_decisions(rows, backend)
+
+
+def get_backend(arguments: argparse.Namespace) -> Any:
+	'''
+	The results are stored in the Postgres database, unless the SQLite database or the directory of the Arrow files is given.
+	'''
+	if arguments.arrow:
+		return modules.arrowstore.ArrowBackend(arguments.arrow)
+	if arguments.sqlite:
+		backend = modules.database.SQLiteBackend(arguments.sqlite)
+		if not modules.database.get_parameters_table(backend):
+			modules.database.fill_parameters_table(backend)
+		return backend
+	return modules.database.PostgresBackend()
+
+
+def initialize_worker(parameters: pd.DataFrame, profile: Optional[str] = None, tape: Optional[str] = None) -> None:
+	global configs, profile_directory, tape_directory
+	configs = get_configs(parameters)
+	profile_directory = profile
+	tape_directory = tape
+
+
+def save_profile_report(report: modules.profiler.ProfileReport, parameters_set_id: int, replication: int) -> None:
+	'''
+	The report is stored as a json file next to the results, one file per replication.
+	'''
+	os.makedirs(profile_directory, exist_ok = True)
+	path = os.path.join(profile_directory, f'profile-{parameters_set_id}-{replication}.json')
+	with open(path, 'w') as profile_file:
+		json.dump({'parameters_set_id': parameters_set_id, 'replication': replication, **report.to_dict()}, profile_file, indent = '\t')
+
+
+def run_replication(task: Tuple[int, int, int]) -> Tuple[int, int, modules.god.GodResponse]:
+	'''
+	Simulates one replication of the given parameters set. The task is the triple of (parameters_set_id, replication, seed),
+	the random generator of the replication is spawned from the root seed.
+	'''
+	parameters_set_id, replication, seed = task
+	tape_path = None
+	if tape_directory is not None:
+		tape_path = os.path.join(tape_directory, f'tape-{parameters_set_id}-{replication}{modules.tape.TAPE_SUFFIX}')
+	GOD = modules.god.God(
+		config = configs[parameters_set_id],
+		seed = seed,
+		replication = replication,
+		profile = profile_directory is not None,
+		tape_path = tape_path,
+	)
+	response = GOD.run_simulation()
+	if GOD.profiler is not None:
+		save_profile_report(GOD.profiler.get_report(), parameters_set_id, replication)
+	return (parameters_set_id, replication, response)
+
+
+def get_pending_tasks(parameters_set_ids: List[int], replications: int,
+completed_replications: Dict[int, Set[int]], seed: int) -> List[Tuple[int, int, int]]:
+	'''
+	Returns the (parameters_set_id, replication, seed) triples, which have not been completed yet. The tasks are ordered by
+	the parameters set, so that one chunk of tasks mostly shares the same parameters.
+	'''
+	return [
+		(parameters_set_id, replication, seed)
+		for parameters_set_id in parameters_set_ids
+		for replication in range(replications)
+		if replication not in completed_replications.get(parameters_set_id, ())
+	]
+
+
+def run_adaptive_replications(pool: multiprocessing.pool.Pool, controller: modules.replications.ReplicationController,
+parameters_set_ids: List[int], completed_replications: Dict[int, Set[int]], seed: int,
+results_writer: modules.database.ResultsWriter) -> Dict[int, modules.replications.StoppingDecision]:
+	'''
+	Every parameters set gets the minimum number of replications first. Once all replications of the parameters set are
+	finished, the controller decides whether one more is needed, so the replications of all parameters sets run side by
+	side and each of them stops on its own. The stored responses (given to the controller beforehand) count as well.
+	Returns the stopping decision of every parameters set.
+	'''
+	finished_replications: queue.Queue = queue.Queue()
+	pending_replications: Dict[int, int] = collections.Counter()
+	missing_replications: Dict[int, Iterator[int]] = {}
+	decisions: Dict[int, modules.replications.StoppingDecision] = {}
+
+	def submit(parameters_set_id: int, count: int) -> None:
+		for _ in range(count):
+			task = (parameters_set_id, next(missing_replications[parameters_set_id]), seed)
+			pending_replications[parameters_set_id] += 1
+			pool.apply_async(run_replication, (task, ), callback = finished_replications.put,
+				error_callback = finished_replications.put)
+
+	def decide(parameters_set_id: int) -> None:
+		decision = controller.get_decision(parameters_set_id)
+		if decision.reason is None:
+			submit(parameters_set_id, 1)
+			return
+		decisions[parameters_set_id] = decision
+		logwood.get_logger('run').info(
+			f'Parameters set {parameters_set_id} stopped after {decision.replications} replications ({decision.reason}).'
+		)
+
+	for parameters_set_id in parameters_set_ids:
+		stored_replications = completed_replications.get(parameters_set_id, set())
+		missing_replications[parameters_set_id] = iterate_missing_replications(stored_replications)
+		missing_count = controller.min_replications - len(stored_replications)
+		if missing_count > 0:
+			submit(parameters_set_id, missing_count)
+		else:
+			decide(parameters_set_id)
+	while sum(pending_replications.values()):
+		result = finished_replications.get()
+		if isinstance(result, BaseException):
+			raise result
+		parameters_set_id, replication, response = result
+		results_writer.put(parameters_set_id = parameters_set_id, list_responses = [response])
+		controller.add_response(parameters_set_id, response)
+		pending_replications[parameters_set_id] -= 1
+		if not pending_replications[parameters_set_id]:
+			decide(parameters_set_id)
+	return decisions
+
+
+def parse_arguments() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description = 'Simulates the parameters sets stored in the database.')
+	parser.add_argument('--parameters-set-ids', type = int, nargs = '+', default = None,
+		help = 'ids of the parameters sets to be simulated, all of them by default')
+	parser.add_argument('--replications', type = int, default = 10,
+		help = 'number of replications of every parameters set, with the --precision the maximum number of them')
+	parser.add_argument('--precision', type = float, default = None,
+		help = 'target half width of the confidence intervals relative to the means, the replications of every parameters '
+		'set then go on only until it is reached, all replications are run by default')
+	parser.add_argument('--fields', type = str, nargs = '+', default = modules.replications.DEFAULT_FIELDS,
+		help = 'fields of the response whose confidence intervals are checked against the --precision')
+	parser.add_argument('--confidence', type = float, default = 0.95,
+		help = 'confidence level of the intervals checked against the --precision')
+	parser.add_argument('--min-replications', type = int, default = 3,
+		help = 'minimum number of replications of every parameters set with the --precision')
+	parser.add_argument('--processes', type = int, default = os.cpu_count(),
+		help = 'number of the worker processes, the number of CPUs by default')
+	parser.add_argument('--chunksize', type = int, default = 1,
+		help = 'number of tasks sent to a worker at once')
+	parser.add_argument('--seed', type = int, default = None,
+		help = 'root seed of the sweep, it is stored with every response, the resumed sweep reuses the stored one and '
+		'a new sweep draws a fresh one by default')
+	parser.add_argument('--sqlite', type = str, default = None,
+		help = 'path to the SQLite database to be used instead of the Postgres one')
+	parser.add_argument('--arrow', type = str, default = None,
+		help = 'directory of the Arrow files to store the results in instead of the database')
+	parser.add_argument('--profile', type = str, default = None,
+		help = 'directory to write the timings of the phases of every replication to, nothing is timed by default')
+	parser.add_argument('--tape', type = str, default = None,
+		help = 'directory to record the events of every replication to, nothing is recorded by default')
+	return parser.parse_args()
+
+
+def main() -> None:
+	'''
+	We get the set of parameters and spread the (parameters set, replication) tasks across the pool of workers.
+	Replications which are already stored in the database are skipped, so an interrupted sweep can be simply resumed,
+	it continues with the root seed of the stored replications.
+	Every result is handed over to the results writer as soon as its simulation is finished, the writer then saves
+	them in bulk in its own thread.
+	With the --precision, the number of replications of every parameters set is decided adaptively by the replication
+	controller, whose stopping decisions are stored along with the responses.
+	'''
+	arguments = parse_arguments()
+	backend = get_backend(arguments)
+	parameters = get_parameters_dataframe(backend)
+	parameters_set_ids = arguments.parameters_set_ids or parameters['id'].astype(int).tolist()
+	# Only the stored replications of the simulated parameters sets matter, the other ones might come from another sweep.
+	selected_parameters_set_ids = set(parameters_set_ids)
+	stored_replications = [
+		stored_replication for stored_replication in get_completed_replications(backend)
+		if stored_replication[0] in selected_parameters_set_ids
+	]
+	seed = get_root_seed(arguments.seed, stored_replications)
+	completed_replications = group_completed_replications(stored_replications, parameters_set_ids)
+	logwood.get_logger('run').info(f'Root seed of the sweep is {seed}.')
+	controller = None
+	if arguments.precision is not None:
+		controller = modules.replications.ReplicationController(
+			fields = arguments.fields,
+			target_precision = arguments.precision,
+			confidence = arguments.confidence,
+			min_replications = arguments.min_replications,
+			max_replications = arguments.replications,
+		)
+		for parameters_set_id, *values in get_stored_responses(backend, controller.fields):
+			controller.add_values(int(parameters_set_id), values)
+		logwood.get_logger('run').info(f'Replications of {len(parameters_set_ids)} parameters sets to be simulated adaptively.')
+	else:
+		tasks = get_pending_tasks(
+			parameters_set_ids = parameters_set_ids,
+			replications = arguments.replications,
+			completed_replications = completed_replications,
+			seed = seed,
 		)
+		logwood.get_logger('run').info(f'{len(tasks)} replications to be simulated.')
+	pool = multiprocessing.Pool(
+		processes = arguments.processes,
+		initializer = initialize_worker,
+		initargs = (parameters, arguments.profile, arguments.tape),
+	)
+	results_writer = modules.database.ResultsWriter(backend)
+	results_writer.start()
+	decisions: Dict[int, modules.replications.StoppingDecision] = {}
+	try:
+		if controller is not None:
+			decisions = run_adaptive_replications(pool, controller, parameters_set_ids, completed_replications, seed, results_writer)
+		else:
+			for parameters_set_id, replication, response in pool.imap_unordered(run_replication, tasks, arguments.chunksize):
+				results_writer.put(
+					parameters_set_id = parameters_set_id,
+					list_responses = [response]
+				)
+		pool.close()
+	except BaseException:
+		pool.terminate()
+		raise
+	finally:
+		pool.join()
+		try:
+			results_writer.close()
+			# The decisions are stored once all the responses are, so that they never refer to missing responses.
+			if decisions:
+				save_stopping_decisions(backend, [
+					controller.convert_decision_to_row(parameters_set_id, decision)
+					for parameters_set_id, decision in sorted(decisions.items())
+				])
+		finally:
+			backend.close()
 
 
 if __name__ == '__main__':
-	for process in range(4):
-		process = multiprocessing.Process(target = main)
-		process.start()
+	main()
@@ -0,0 +1,398 @@
+'''
+Benchmarks of the hot paths of the simulation. The end-to-end benchmarks run God on a few representative rows of the
+parameters.csv and report the arrivals processed per second, the micro benchmarks time the single operations the
+simulation spends most of its time in. The scaling benchmark runs one parameters set with growing session lengths,
+the time per arrival should stay flat, if it grows with the session length, some step of the simulation is quadratic.
+
+	python -m tests.benchmarks.benchmark --save       stores the results as the new baseline
+	python -m tests.benchmarks.benchmark --compare    compares the results against the stored baseline
+
+The timing tests of the pytest suite are skipped unless the RUN_BENCHMARKS environment variable is set.
+'''
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import modules.asset
+import modules.config
+import modules.god
+import modules.misc
+import modules.regulator
+import modules.settings as settings
+
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PARAMETERS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'parameters.csv')
+SEED = 20190101
+# The benchmark is the fastest of the repeats, which filters out most of the noise of the machine.
+REPEATS = 3
+SCALING_SESSION_LENGTHS = (25000, 50000, 100000, 200000)
+# The shortest scaling run needs this many arrivals, with fewer of them the fitted exponent is only the noise.
+SCALING_MINIMUM_ARRIVALS = 1000
+# The exponent of the time per arrival in the session length above which we report the super-linear scaling.
+SCALING_EXPONENT_LIMIT = 0.5
+MICRO_ORDERS_COUNT = 2000
+
+
+
+class BenchmarkResult(NamedTuple):
+	'''
+	The rate is the number of operations (arrivals for the end-to-end benchmarks) per second, the higher the better.
+	'''
+	name: str
+	seconds: float
+	operations: int
+	rate: float
+
+
+
+class Scenario(NamedTuple):
+	'''
+	Picks the first row of the parameters.csv which matches all the :param conditions: and optionally overrides some
+	parameters of the resulting config.
+	'''
+	name: str
+	conditions: Dict[str, Any]
+	overrides: Dict[str, Any] = {}
+
+
+
+SCENARIOS = (
+	Scenario('short_session', {'zero_intelligence_count': 25, 'session_length': 1000, 'national_best_bid_and_offer_delay': 0}),
+	Scenario('long_session', {'zero_intelligence_count': 25, 'session_length': 24000, 'national_best_bid_and_offer_delay': 0}),
+	Scenario('many_zero_intelligence', {'zero_intelligence_count': 66, 'zero_intelligence_intensity': 0.001, 'session_length': 4000}),
+	Scenario('delayed_nbbo', {'zero_intelligence_count': 66, 'session_length': 4000, 'national_best_bid_and_offer_delay': 1000}),
+	Scenario('limit_orderbook', {'zero_intelligence_count': 66, 'session_length': 4000, 'national_best_bid_and_offer_delay': 1000},
+		{'orderbook': 'LimitOrderBook'}),
+)
+
+
+
+# The densest parameters set, so that even the shortest scaling run has thousands of arrivals.
+SCALING_SCENARIO = Scenario('scaling', {'zero_intelligence_count': 66, 'zero_intelligence_intensity': 0.001, 'session_length': 4000})
+
+
+
+def get_config(scenario: Scenario, parameters: Optional[pd.DataFrame] = None) -> modules.config.SimulationConfig:
+	if parameters is None:
+		parameters = pd.read_csv(PARAMETERS_PATH)
+	mask = np.ones(len(parameters), dtype = bool)
+	for column, value in scenario.conditions.items():
+		mask &= parameters[column].values == value
+	if not mask.any():
+		raise ValueError(f'No parameters set matches the scenario {scenario.name}.')
+	config = modules.config.SimulationConfig.from_parameters(parameters[mask].iloc[0].to_dict())
+	return config._replace(**scenario.overrides)
+
+
+def measure(function: Callable[[], int], repeats: int = REPEATS) -> Tuple[float, int]:
+	'''
+	Calls the :param function:, which returns the number of operations it did, :param repeats: times and returns the
+	shortest time along with the number of operations.
+	'''
+	best_seconds, operations = float('inf'), 0
+	for _ in range(repeats):
+		start = time.perf_counter()
+		operations = function()
+		best_seconds = min(best_seconds, time.perf_counter() - start)
+	return best_seconds, operations
+
+
+def measure_prepared(prepare: Callable[[], Any], function: Callable[[Any], int], repeats: int = REPEATS) -> Tuple[float, int]:
+	'''
+	Same as measure(), but the state returned by the :param prepare: is passed to the :param function: and only the
+	:param function: itself is timed.
+	'''
+	best_seconds, operations = float('inf'), 0
+	for _ in range(repeats):
+		state = prepare()
+		start = time.perf_counter()
+		operations = function(state)
+		best_seconds = min(best_seconds, time.perf_counter() - start)
+	return best_seconds, operations
+
+
+def to_result(name: str, seconds: float, operations: int) -> BenchmarkResult:
+	return BenchmarkResult(name = name, seconds = seconds, operations = operations, rate = operations / seconds if seconds else 0.)
+
+
+def run_god(config: modules.config.SimulationConfig, seed: int = SEED) -> Callable[[], int]:
+	'''
+	Returns the function which builds God and runs the whole session, the arrivals are the operations.
+	'''
+	def run() -> int:
+		god = modules.god.God(config = config, seed = seed)
+		god.run_simulation()
+		return len(god._summarized_entries)
+	return run
+
+
+def run_simulation(god: modules.god.God) -> int:
+	god.run_simulation()
+	return len(god._summarized_entries)
+
+
+def benchmark_end_to_end(repeats: int = REPEATS) -> List[BenchmarkResult]:
+	parameters = pd.read_csv(PARAMETERS_PATH)
+	results = []
+	for scenario in SCENARIOS:
+		seconds, operations = measure(run_god(get_config(scenario, parameters)), repeats)
+		results.append(to_result(f'end_to_end.{scenario.name}', seconds, operations))
+	return results
+
+
+def create_regulator(orderbook_name: str) -> modules.regulator.Regulator:
+	config = modules.config.SimulationConfig(orderbook = orderbook_name, national_best_bid_and_offer_delay = 100)
+	asset = modules.asset.Asset(
+		initial_price = config.initial_asset_price,
+		mean_reversion_factor = config.mean_reversion_factor,
+		sigma = config.sigma_asset,
+		random_generator = np.random.default_rng(SEED),
+	)
+	return modules.regulator.Regulator(asset = asset, config = config)
+
+
+def add_orders(regulator: modules.regulator.Regulator, prices: Sequence[int], side: int) -> List[int]:
+	'''
+	Adds one order at every price to the first exchange, the orders are added at growing times.
+	'''
+	owner = modules.misc.TraderIdx(0, 'ZeroIntelligence')
+	exchange_name = regulator.config.names_of_exchanges[0]
+	order_ids = []
+	for price in prices:
+		regulator.current_time += 1
+		order_id = regulator.orders.register(owner, side, price, exchange_name, regulator.current_time)
+		regulator.add_order(exchange_name, side, order_id, price, metadata = {}, owner = owner)
+		order_ids.append(order_id)
+	return order_ids
+
+
+def get_prices(count: int) -> List[int]:
+	'''
+	Bid prices spread around the initial price of the asset, in a random order.
+	'''
+	random_generator = np.random.default_rng(SEED)
+	return (int(settings.INITIAL_ASSET_PRICE) - 500 + random_generator.integers(0, 500, count)).tolist()
+
+
+def benchmark_orders(orderbook_name: str, repeats: int = REPEATS) -> List[BenchmarkResult]:
+	'''
+	Adding, cancelling and filling the orders through the regulator, which also keeps the order lifetimes, the registry
+	and the top of the books up to date.
+	'''
+	exchange_name = settings.NAMES_OF_EXCHANGES[0]
+	prices = get_prices(MICRO_ORDERS_COUNT)
+
+	def add() -> int:
+		add_orders(create_regulator(orderbook_name), prices, side = 1)
+		return len(prices)
+
+	def prepare() -> Tuple[modules.regulator.Regulator, List[int]]:
+		regulator = create_regulator(orderbook_name)
+		order_ids = add_orders(regulator, prices, side = 1)
+		# The orders are removed from the best one, as they would be in the market.
+		return regulator, [order_id for _, order_id in sorted(zip(prices, order_ids), reverse = True)]
+
+	def remove(method_name: str) -> Callable[[Any], int]:
+		def run(state: Tuple[modules.regulator.Regulator, List[int]]) -> int:
+			regulator, order_ids = state
+			method = getattr(regulator, method_name)
+			for order_id in order_ids:
+				regulator.current_time += 1
+				method(exchange_name, 1, order_id)
+			return len(order_ids)
+		return run
+
+	return [
+		to_result(f'orders.add.{orderbook_name}', *measure(add, repeats)),
+		to_result(f'orders.cancel.{orderbook_name}', *measure_prepared(prepare, remove('delete_order'), repeats)),
+		to_result(f'orders.fill.{orderbook_name}', *measure_prepared(prepare, remove('fill_order'), repeats)),
+	]
+
+
+def benchmark_national_best_bid_and_offer(repeats: int = REPEATS) -> List[BenchmarkResult]:
+	'''
+	The lagged NBBO is computed from the order lifetimes, we invalidate the cache before every call by moving the time,
+	so that the consolidation is measured, not the cache lookup. The snapshot is the lagged view of the exchanges alone.
+	'''
+	regulator = create_regulator(settings.ORDERBOOK)
+	prices = get_prices(MICRO_ORDERS_COUNT)
+	order_ids = add_orders(regulator, prices, side = 1)
+	add_orders(regulator, [price + 600 for price in prices], side = 0)
+	for order_id in order_ids[::2]:
+		regulator.current_time += 1
+		regulator.delete_order(regulator.config.names_of_exchanges[0], 1, order_id)
+	calls_count = MICRO_ORDERS_COUNT
+
+	def lagged_national_best_bid_and_offer() -> int:
+		for i in range(calls_count):
+			regulator.current_time += 1e-6
+			regulator.market_state.get_lagged_national_best_bid_and_offer(regulator.national_best_bid_and_offer_delay)
+		return calls_count
+
+	def snapshot() -> int:
+		for i in range(calls_count):
+			regulator.get_lagged_exchanges()
+		return calls_count
+
+	return [
+		to_result('national_best_bid_and_offer.lagged', *measure(lagged_national_best_bid_and_offer, repeats)),
+		to_result('national_best_bid_and_offer.snapshot', *measure(snapshot, repeats)),
+	]
+
+
+def benchmark_asset(repeats: int = REPEATS) -> List[BenchmarkResult]:
+	'''
+	The price of the asset moves once per arrival, either along the pre-generated path, or step by step.
+	'''
+	steps_count = 20 * MICRO_ORDERS_COUNT
+
+	def create_asset() -> modules.asset.Asset:
+		return modules.asset.Asset(
+			initial_price = settings.INITIAL_ASSET_PRICE,
+			mean_reversion_factor = settings.MEAN_REVERSION_FACTOR,
+			sigma = settings.SIGMA_ASSET,
+			random_generator = np.random.default_rng(SEED),
+		)
+
+	def step_by_step() -> int:
+		asset = create_asset()
+		for _ in range(steps_count):
+			asset.get_new_price()
+		return steps_count
+
+	def pregenerated() -> int:
+		asset = create_asset()
+		asset.generate_price_path(steps_count)
+		for _ in range(steps_count):
+			asset.get_new_price()
+		return steps_count
+
+	return [
+		to_result('asset.get_new_price', *measure(step_by_step, repeats)),
+		to_result('asset.get_new_price.pregenerated', *measure(pregenerated, repeats)),
+	]
+
+
+def benchmark_micro(repeats: int = REPEATS) -> List[BenchmarkResult]:
+	results = []
+	for orderbook_name in modules.regulator.ORDERBOOKS:
+		results.extend(benchmark_orders(orderbook_name, repeats))
+	results.extend(benchmark_national_best_bid_and_offer(repeats))
+	results.extend(benchmark_asset(repeats))
+	return results
+
+
+def benchmark_scaling(config: Optional[modules.config.SimulationConfig] = None,
+session_lengths: Sequence[int] = SCALING_SESSION_LENGTHS, repeats: int = REPEATS) -> Tuple[List[BenchmarkResult], float]:
+	'''
+	Runs the simulation with growing session lengths and fits the exponent of the time per arrival in the session length
+	(the slope of the log-log line). It is about 0 when the simulation is linear and about 1 when it is quadratic.
+	Only the run_simulation() is timed, God is built beforehand.
+	'''
+	if config is None:
+		config = get_config(SCALING_SCENARIO)
+	results = []
+	for session_length in session_lengths:
+		seconds, operations = measure_prepared(
+			lambda: modules.god.God(config = config._replace(session_length = session_length), seed = SEED),
+			run_simulation,
+			repeats,
+		)
+		results.append(to_result(f'scaling.session_length_{session_length}', seconds, operations))
+	arrivals_count = min(result.operations for result in results)
+	if arrivals_count < SCALING_MINIMUM_ARRIVALS:
+		raise ValueError(f'The shortest scaling run has only {arrivals_count} arrivals, at least {SCALING_MINIMUM_ARRIVALS} '
+			'are needed for the fitted exponent to mean anything.')
+	seconds_per_arrival = [result.seconds / max(result.operations, 1) for result in results]
+	exponent = float(np.polyfit(np.log(session_lengths), np.log(seconds_per_arrival), 1)[0])
+	return results, exponent
+
+
+def save_baseline(results: List[BenchmarkResult], path: str = BASELINE_PATH) -> None:
+	baseline = {
+		'python': platform.python_version(),
+		'machine': platform.machine(),
+		'results': {result.name: result._asdict() for result in results},
+	}
+	with open(path, 'w') as baseline_file:
+		json.dump(baseline, baseline_file, indent = '\t', sort_keys = True)
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, BenchmarkResult]:
+	with open(path) as baseline_file:
+		return {name: BenchmarkResult(**result) for name, result in json.load(baseline_file)['results'].items()}
+
+
+def compare_with_baseline(results: List[BenchmarkResult], baseline: Dict[str, BenchmarkResult],
+tolerance: float) -> List[str]:
+	'''
+	Returns the names of the benchmarks whose rate dropped by more than the :param tolerance: (a fraction) against
+	the baseline. Benchmarks missing in the baseline are skipped.
+	'''
+	regressions = []
+	for result in results:
+		baseline_result = baseline.get(result.name)
+		if baseline_result is None:
+			continue
+		if result.rate < baseline_result.rate * (1 - tolerance):
+			regressions.append(result.name)
+	return regressions
+
+
+def print_results(results: List[BenchmarkResult], baseline: Optional[Dict[str, BenchmarkResult]] = None) -> None:
+	for result in results:
+		line = f'{result.name:<50} {result.seconds:>10.4f} s {result.rate:>14.1f} ops/s'
+		if baseline and result.name in baseline:
+			line += f' {result.rate / baseline[result.name].rate:>8.2f}x'
+		print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description = 'Benchmarks of the simulation.')
+	parser.add_argument('--save', action = 'store_true', help = 'Store the results as the new baseline.')
+	parser.add_argument('--compare', action = 'store_true', help = 'Compare the results against the baseline.')
+	parser.add_argument('--baseline', default = BASELINE_PATH, help = 'Path to the JSON baseline.')
+	parser.add_argument('--tolerance', type = float, default = 0.2, help = 'Allowed relative drop of the rate.')
+	parser.add_argument('--repeats', type = int, default = REPEATS)
+	parser.add_argument('--skip-end-to-end', action = 'store_true', help = 'Run only the micro and scaling benchmarks.')
+	arguments = parser.parse_args(argv)
+
+	results = benchmark_micro(arguments.repeats)
+	if not arguments.skip_end_to_end:
+		results.extend(benchmark_end_to_end(arguments.repeats))
+	scaling_results, exponent = benchmark_scaling(repeats = arguments.repeats)
+	results.extend(scaling_results)
+
+	baseline = load_baseline(arguments.baseline) if arguments.compare and os.path.exists(arguments.baseline) else None
+	print_results(results, baseline)
+	print(f'Exponent of the time per arrival in the session length: {exponent:.2f}')
+	exit_code = 0
+	if exponent > SCALING_EXPONENT_LIMIT:
+		print('The time per arrival grows with the session length, the simulation scales super-linearly.')
+		exit_code = 1
+	if arguments.compare:
+		if baseline is None:
+			print(f'No baseline found at {arguments.baseline}.')
+			exit_code = 1
+		else:
+			regressions = compare_with_baseline(results, baseline, arguments.tolerance)
+			for name in regressions:
+				print(f'Regression: {name}')
+			exit_code = exit_code or int(bool(regressions))
+	if arguments.save:
+		save_baseline(results, arguments.baseline)
+	return exit_code
+
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+import modules.config
+import tests.benchmarks.benchmark as benchmark
+
+
+
+def test_baseline_round_trip_and_comparison(tmp_path):
+	path = str(tmp_path / 'baseline.json')
+	results = [benchmark.to_result('fast', 1., 1000), benchmark.to_result('slow', 2., 1000)]
+	benchmark.save_baseline(results, path)
+	baseline = benchmark.load_baseline(path)
+	assert baseline['fast'] == results[0]
+	new_results = [
+		benchmark.to_result('fast', 1.1, 1000),
+		benchmark.to_result('slow', 4., 1000),
+		benchmark.to_result('new', 1., 1000),
+	]
+	assert benchmark.compare_with_baseline(new_results, baseline, tolerance = 0.2) == ['slow']
+
+
+def test_scenarios_match_parameters_sets():
+	for scenario in benchmark.SCENARIOS + (benchmark.SCALING_SCENARIO, ):
+		config = benchmark.get_config(scenario)
+		for name, value in scenario.conditions.items():
+			if name in modules.config.SimulationConfig._fields:
+				assert getattr(config, name) == value
+
+
+def test_session_length_scaling_needs_enough_arrivals():
+	with pytest.raises(ValueError):
+		benchmark.benchmark_scaling(session_lengths = (100, 200), repeats = 1)
+
+
+@pytest.mark.skipif(not os.environ.get('RUN_BENCHMARKS'), reason = 'Timing tests run only with RUN_BENCHMARKS set.')
+def test_session_length_scaling():
+	'''
+	The time per arrival must not grow with the session length, otherwise some step of the simulation is quadratic.
+	'''
+	_, exponent = benchmark.benchmark_scaling(session_lengths = (25000, 100000), repeats = 1)
+	assert exponent < benchmark.SCALING_EXPONENT_LIMIT
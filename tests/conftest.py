@@ -79,10 +79,7 @@ def basic_asset() -> modules.asset.Asset:
 
 @pytest.fixture
 def basic_regulator(basic_asset):
-	return modules.regulator.Regulator(
-		national_best_bid_and_offer_delay = settings.NATIONAL_BEST_BID_AND_OFFER_DELAY,
-		asset = basic_asset,
-	)
+	return modules.regulator.Regulator(asset = basic_asset)
 
 
 @pytest.fixture
@@ -20,15 +20,14 @@ new_york_ask, chicago_bid, chicago_ask) -> None:
 	that is it removes orders which would be executed immediately.
 	'''
 	mock_estimate_of_asset.return_value = estimate_of_asset_price
-	settings.MARKET_MAKER_NUMBER_ORDERS = orders_count
-	settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS = ticks_between_orders
-	settings.MARKET_MAKER_SPREAD_AROUND_ASSET = spread_around_asset
-	basic_regulator.exchanges = {
+	basic_marketmaker.number_of_orders = orders_count
+	basic_marketmaker.ticks_between_orders = ticks_between_orders
+	basic_marketmaker.spread_around_asset = spread_around_asset
+	basic_regulator.current_time = 1
+	basic_regulator.load_exchanges({
 		settings.NAMES_OF_EXCHANGES[0]: new_york_orderbook,
 		settings.NAMES_OF_EXCHANGES[1]: chicago_orderbook
-	}
-	basic_regulator.current_time = 1
-	basic_regulator.add_current_exchanges_to_historic_exchanges()
+	})
 	basic_regulator.remove_redundant_historic_exchanges()
 	basic_marketmaker.trade()
 
@@ -0,0 +1,26 @@
+import numpy as np
+
+import modules.agentstate
+
+
+def test_population_surplus():
+	'''
+	The surplus of the population is the sum of the surpluses of its traders.
+	'''
+	population_state = modules.agentstate.PopulationState(3, keep_trade_log = True)
+	population_state.record_trade(idx = 0, side = 1, price = 100, private_utility = 5)
+	population_state.record_trade(idx = 0, side = 0, price = 120, private_utility = -2)
+	population_state.record_trade(idx = 2, side = 0, price = 90)
+	assert population_state.positions.tolist() == [0, 0, -1]
+	assert population_state.cash.tolist() == [20, 0, 90]
+	assert population_state.trades_counts.tolist() == [2, 0, 1]
+	surpluses = population_state.calculate_surpluses(last_price = 110)
+	assert np.allclose(surpluses, [23, 0, -20])
+	assert population_state.calculate_total_surplus(last_price = 110) == surpluses.sum()
+	assert population_state.trade_log == [(0, 1, 100), (0, 0, 120), (2, 0, 90)]
+
+
+def test_population_without_trade_log():
+	population_state = modules.agentstate.PopulationState(1)
+	population_state.record_trade(idx = 0, side = 1, price = 100)
+	assert population_state.trade_log is None
@@ -0,0 +1,30 @@
+import modules.arbitrageur
+import modules.misc
+import modules.settings as settings
+
+
+def test_sweeping_crossed_levels(basic_regulator):
+	'''
+	The arbitrageur trades all crossed levels at once, but only once the NBBO got crossed.
+	'''
+	new_york, chicago = settings.NAMES_OF_EXCHANGES
+	arbitrageur = modules.arbitrageur.Arbitrageur(regulator = basic_regulator, idx = 1)
+	assert arbitrageur.hunt_and_kill() == []
+	for trader_idx, (exchange_name, side, price) in enumerate((
+		(chicago, 1, 1000), (chicago, 1, 900), (chicago, 1, 700), (new_york, 0, 800), (new_york, 0, 850),
+	)):
+		order_id = basic_regulator.orders.register(
+			owner = modules.misc.TraderIdx(trader_idx, 'ZeroIntelligence'),
+			side = side,
+			price = price,
+			exchange_name = exchange_name,
+			time_entry = 0,
+		)
+		basic_regulator.add_order(exchange_name = exchange_name, side = side, order_id = order_id, price = price, metadata = {})
+	assert arbitrageur.market_is_crossed
+	list_traders_orders = arbitrageur.hunt_and_kill()
+	assert sorted(trader_order.order.price for trader_order in list_traders_orders) == [800, 850, 900, 1000]
+	assert arbitrageur.calculate_total_surplus() == 250
+	assert basic_regulator.accurate_national_best_bid_and_offer == modules.misc.NBBO(700, None, chicago, None)
+	assert not arbitrageur.market_is_crossed
+	assert arbitrageur.hunt_and_kill() == []
@@ -0,0 +1,38 @@
+import pytest
+
+import modules.arrowstore
+import modules.database
+
+pa = pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def arrow_backend(tmp_path):
+	return modules.arrowstore.ArrowBackend(str(tmp_path / 'results'))
+
+
+def test_arrow_backend_partitions(arrow_backend):
+	'''
+	Every batch is written into the partition of its parameters set and all of them are read back.
+	'''
+	arrow_backend.insert_rows('response', [(1, 1.5, 10, 20, 30, 7, 0, 1, 1.5, 3, 20, 2), (2, 2.5, 11, 21, 31, 7, 0, 1, 2.5, 4, 20, 2)])
+	arrow_backend.insert_rows('response', [(1, 3.5, 12, 22, 32, 7, 1, 1, 3.5, 5, 20, 2)])
+	assert sorted(arrow_backend.get_completed_replications()) == [(1, 0, 7), (1, 1, 7), (2, 0, 7)]
+	responses = arrow_backend.read_responses(parameters_set_ids = [1]).to_pandas()
+	assert sorted(responses['replication'].tolist()) == [0, 1]
+	assert arrow_backend.read_responses().num_rows == 3
+
+
+def test_arrow_backend_empty(arrow_backend):
+	assert arrow_backend.get_completed_replications() == []
+	assert arrow_backend.read_responses().num_rows == 0
+	with pytest.raises(ValueError):
+		arrow_backend.insert_rows('settings', [(1, )])
+
+
+def test_results_writer_with_arrow_backend(arrow_backend):
+	results_writer = modules.database.ResultsWriter(arrow_backend, batch_size = 10)
+	results_writer.start()
+	results_writer.put(parameters_set_id = 3, list_responses = [(1.5, 10, 20, 30, 7, 0, 1, 1.5, 3, 20, 2), (1.5, 10, 20, 30, 7, 1, 1, 1.5, 3, 20, 2)])
+	results_writer.close()
+	assert sorted(arrow_backend.get_completed_replications()) == [(3, 0, 7), (3, 1, 7)]
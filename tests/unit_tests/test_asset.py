@@ -7,20 +7,59 @@ import modules.settings as settings
 
 def test_asset_last_price(basic_asset) -> None:
     '''Tests that after init() the latest price equals that of the mean (there is only one)'''
-    assert basic_asset.last_price == np.mean(basic_asset.price_series)
+    assert basic_asset.last_price == basic_asset.mean_price
 
 
-@mock.patch('numpy.random.normal')
-def test_asset_new_price(mock_random_normal, basic_asset) -> None:
+def test_asset_new_price(basic_asset) -> None:
     '''
     Tests that a new positive (negative) price shock is reflected in the Asset's attributes.
     '''
-    mock_random_normal.return_value = 10
+    basic_asset.random_generator = mock.Mock()
+    basic_asset.random_generator.normal.return_value = 10
     basic_asset.get_new_price()
     assert basic_asset.last_price == settings.INITIAL_ASSET_PRICE + 10
     assert basic_asset.mean_price == (2 * settings.INITIAL_ASSET_PRICE + 10) / 2
     
-    mock_random_normal.return_value = -20
+    basic_asset.random_generator.normal.return_value = -20
     basic_asset.get_new_price()
     assert basic_asset.last_price == 9985
-    assert basic_asset.mean_price == (2 * settings.INITIAL_ASSET_PRICE + 10 + 9985) / 3
\ No newline at end of file
+    assert basic_asset.mean_price == (2 * settings.INITIAL_ASSET_PRICE + 10 + 9985) / 3
+
+
+def test_asset_pregenerated_price_path() -> None:
+    '''
+    Tests that the pre-generated path gives the same prices as the step by step calculation.
+    '''
+    random_generator = mock.Mock()
+    random_generator.normal.return_value = np.array([10, -20])
+    asset = modules.asset.Asset(
+        initial_price = settings.INITIAL_ASSET_PRICE,
+        mean_reversion_factor = settings.MEAN_REVERSION_FACTOR,
+        sigma = settings.SIGMA_ASSET,
+        keep_price_series = True,
+        random_generator = random_generator,
+    )
+    asset.generate_price_path(2)
+    asset.get_new_price()
+    asset.get_new_price()
+    assert asset.price_series == [settings.INITIAL_ASSET_PRICE, settings.INITIAL_ASSET_PRICE + 10, 9985]
+    assert asset.mean_price == np.mean(asset.price_series)
+
+
+def test_asset_seeded_price_path() -> None:
+    '''
+    Two assets with the same seed give the same prices.
+    '''
+    prices = []
+    for _ in range(2):
+        asset = modules.asset.Asset(
+            initial_price = settings.INITIAL_ASSET_PRICE,
+            mean_reversion_factor = settings.MEAN_REVERSION_FACTOR,
+            sigma = settings.SIGMA_ASSET,
+            keep_price_series = True,
+            random_generator = np.random.default_rng(np.random.SeedSequence(entropy = 1, spawn_key = (0, ))),
+        )
+        for _ in range(5):
+            asset.get_new_price()
+        prices.append(asset.price_series)
+    assert prices[0] == prices[1]
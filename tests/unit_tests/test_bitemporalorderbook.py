@@ -0,0 +1,56 @@
+import pytest
+
+import modules.bitemporalorderbook
+
+
+@pytest.fixture
+def bitemporal_orderbook():
+	book = modules.bitemporalorderbook.BitemporalOrderBook()
+	book.add_order(side = 1, order_id = 1, price = 500, time_added = 1)
+	book.add_order(side = 1, order_id = 2, price = 1000, time_added = 2)
+	book.add_order(side = 0, order_id = 1, price = 1500, time_added = 2)
+	book.remove_order(side = 1, order_id = 2, time_removed = 4)
+	return book
+
+
+@pytest.mark.parametrize('as_of,expected_best_bid,expected_best_ask', [
+	(0, None, None),
+	(1, 500, None),
+	(2, 1000, 1500),
+	(3.9, 1000, 1500),
+	(4, 500, 1500),
+])
+def test_best_price_as_of(bitemporal_orderbook, as_of, expected_best_bid, expected_best_ask):
+	best_bid, best_ask = [
+		bitemporal_orderbook.sides[side].get_best(as_of) for side in (1, 0)
+	]
+	assert (best_bid.price if best_bid else None) == expected_best_bid
+	assert (best_ask.price if best_ask else None) == expected_best_ask
+
+
+def test_discarding_removed_orders(bitemporal_orderbook):
+	bitemporal_orderbook.discard_orders_removed_before(3)
+	assert bitemporal_orderbook.sides[1].prices == [500, 1000]
+	bitemporal_orderbook.discard_orders_removed_before(4)
+	assert bitemporal_orderbook.sides[1].prices == [500]
+	assert bitemporal_orderbook.sides[1].get_best(3).price == 500
+
+
+def test_best_price_without_owner():
+	'''
+	The levels holding only the orders of the excluded owner are skipped, the owner is forgotten once his orders are discarded.
+	'''
+	book = modules.bitemporalorderbook.BitemporalOrderBook()
+	book.add_order(side = 0, order_id = 1, price = 500, time_added = 1, owner = 'A')
+	book.add_order(side = 0, order_id = 2, price = 600, time_added = 1, owner = 'A')
+	book.add_order(side = 0, order_id = 3, price = 600, time_added = 1, owner = 'B')
+	assert book.sides[0].get_best(1).id == 1
+	assert book.sides[0].get_best(1, excluded_owner = 'A').id == 3
+	assert book.sides[0].get_best(1, excluded_owner = 'B').id == 1
+	assert book.sides[0].level_owners[600] == {'A': 1, 'B': 1}
+	for order_id in (1, 2):
+		book.remove_order(side = 0, order_id = order_id, time_removed = 2)
+	assert book.has_orders_of('A')
+	book.discard_orders_removed_before(2)
+	assert not book.has_orders_of('A')
+	assert book.sides[0].level_owners == {600: {'B': 1}}
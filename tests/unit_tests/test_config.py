@@ -0,0 +1,25 @@
+import pandas as pd
+
+import modules.config
+import modules.settings as settings
+
+
+def test_config_from_parameters() -> None:
+	'''
+	The parameters which are in the csv file are taken from the row, all the others keep their defaults.
+	'''
+	parameters = pd.read_csv(settings.PARAMETERS_SET).to_dict('records')[0]
+	config = modules.config.SimulationConfig.from_parameters(parameters)
+	assert config.zero_intelligence_count == 25
+	assert config.shading_max == 250
+	assert config.market_maker_spread_around_asset == 128
+	assert config.session_length == 1000
+	assert config.quantity_max == settings.QUANTITY_MAX
+	assert config.names_of_exchanges == settings.NAMES_OF_EXCHANGES
+
+
+def test_config_defaults() -> None:
+	config = modules.config.SimulationConfig()
+	assert config.session_length == settings.SESSION_LENGTH
+	assert config._replace(session_length = 10).session_length == 10
+	assert config.session_length == settings.SESSION_LENGTH
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+import modules.database
+import modules.god
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+	backend = modules.database.SQLiteBackend(str(tmp_path / 'results.sqlite'))
+	modules.database.fill_parameters_table(backend)
+	yield backend
+	backend.close()
+
+
+def test_parameters_table(sqlite_backend):
+	parameters_table = modules.database.get_parameters_table(sqlite_backend)
+	assert len(parameters_table) == 768
+	assert parameters_table[0] == (1, 25, 0.0005, 0, 250, 2, 0.005, 3, 25, 128, 0, 1000)
+
+
+def test_results_writer(sqlite_backend):
+	'''
+	All results put into the writer are stored once it is closed, no matter the batch size.
+	'''
+	results_writer = modules.database.ResultsWriter(sqlite_backend, batch_size = 2, flush_interval = 60)
+	results_writer.start()
+	for replication in range(3):
+		results_writer.put(
+			parameters_set_id = 1,
+			list_responses = [modules.god.GodResponse(1.5, 10, 20, 30, 7, replication, 1, 1.5, 3, 20, 2)]
+		)
+	results_writer.close()
+	assert sorted(modules.database.get_completed_replications(sqlite_backend)) == [(1, 0, 7), (1, 1, 7), (1, 2, 7)]
+	assert sqlite_backend.execute('SELECT * FROM response ORDER BY replication')[0] == (1, 1.5, 10, 20, 30, 7, 0, 1, 1.5, 3, 20, 2)
+
+
+def test_results_writer_failure(sqlite_backend):
+	'''
+	The failed insert stops the writer, its error is raised to the caller instead of the results being lost silently.
+	'''
+	results_writer = modules.database.ResultsWriter(sqlite_backend, batch_size = 1, flush_interval = 60)
+	results_writer.start()
+	results_writer.put(parameters_set_id = 1, list_responses = [(1.5, 10)])
+	results_writer.join()
+	with pytest.raises(sqlite3.Error):
+		results_writer.put(parameters_set_id = 1, list_responses = [(1.5, 10)])
+	with pytest.raises(sqlite3.Error):
+		results_writer.close()
+
+
+def test_response_columns(sqlite_backend):
+	'''
+	The response table has a column for every field of the GodResponse, the older tables get the added ones.
+	'''
+	table_columns = tuple(row[1] for row in sqlite_backend.execute('PRAGMA table_info(response)'))
+	assert table_columns == modules.database.RESPONSE_COLUMNS
+	assert table_columns[-len(modules.database.ADDED_RESPONSE_COLUMNS):] == tuple(
+		column for column, _ in modules.database.ADDED_RESPONSE_COLUMNS
+	)
+
+
+def test_responses_inserted_by_column_names(tmp_path):
+	'''
+	The responses land in the right columns, even if the columns of the existing table are in another order.
+	'''
+	path = str(tmp_path / 'results.sqlite')
+	connection = sqlite3.connect(path)
+	connection.execute(f'CREATE TABLE response({", ".join(reversed(modules.database.RESPONSE_COLUMNS))})')
+	connection.close()
+	backend = modules.database.SQLiteBackend(path)
+	modules.database.insert_new_results(1, [modules.god.GodResponse(1.5, 10, 20, 30, 7, 0, 1, 1.5, 3, 20, 2)], backend)
+	assert backend.execute('SELECT settings_id, mean_execution_time, seed, top_of_book_depth FROM response') == [(1, 1.5, 7, 2)]
+	backend.close()
+
+
+def test_stopping_decisions(sqlite_backend):
+	modules.database.insert_stopping_decisions([(1, 5, 'precision', 0.95, 0.05, '{"marketmaker_surplus": 0.01}')], sqlite_backend)
+	assert sqlite_backend.execute(f'SELECT {", ".join(modules.database.STOPPING_DECISION_COLUMNS)} FROM stopping_decision') == [
+		(1, 5, 'precision', 0.95, 0.05, '{"marketmaker_surplus": 0.01}')
+	]
@@ -0,0 +1,45 @@
+import pytest
+
+import modules.config
+import modules.fork
+import modules.god
+
+
+@pytest.fixture
+def config():
+	return modules.config.SimulationConfig(session_length = 4000, zero_intelligence_count = 25, market_maker_count = 2,
+		national_best_bid_and_offer_delay = 0)
+
+
+def test_unchanged_fork_continues_the_session(config) -> None:
+	'''
+	The continuation without any change gives the same response as the session simulated at once.
+	'''
+	response = modules.god.God(config = config, seed = 1).run_simulation()
+	checkpoint = modules.fork.simulate_prefix(config, seed = 1, replication = 0, fork_time = 2000)
+	assert modules.fork.run_forks(checkpoint, [{}, {}], processes = 1) == [response, response]
+
+
+def test_forks_with_changed_delay(config) -> None:
+	checkpoint = modules.fork.simulate_prefix(config, seed = 1, replication = 0, fork_time = 2000,
+		list_changes = [{'national_best_bid_and_offer_delay': 500}])
+	GOD = modules.god.God.from_checkpoint(checkpoint, national_best_bid_and_offer_delay = 500)
+	assert GOD.config.national_best_bid_and_offer_delay == GOD._regulator.national_best_bid_and_offer_delay == 500
+	assert all(trader.national_best_bid_and_offer_delay == 500 for trader in GOD._market_makers)
+	assert GOD._regulator.maximum_national_best_bid_and_offer_delay == 500
+	# The checkpoint itself stays untouched.
+	assert modules.god.God.from_checkpoint(checkpoint).config.national_best_bid_and_offer_delay == 0
+	assert GOD.run_simulation().seed == 1
+
+
+def test_fork_into_batch_auction(config) -> None:
+	checkpoint = modules.fork.simulate_prefix(config, seed = 1, replication = 0, fork_time = 2000)
+	GOD = modules.god.God.from_checkpoint(checkpoint, batch_auction_interval = 100)
+	GOD.run_simulation()
+	assert GOD._regulator.current_time == config.session_length
+	with pytest.raises(ValueError):
+		GOD.change_config(batch_auction_interval = None)
+	with pytest.raises(ValueError):
+		modules.god.God.from_checkpoint(checkpoint, session_length = 100)
+	with pytest.raises(ValueError):
+		modules.god.God(config = config, profile = True).checkpoint()
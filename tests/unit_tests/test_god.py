@@ -0,0 +1,58 @@
+import numpy as np
+
+import modules.config
+import modules.god
+import modules.scheduler
+import modules.settings as settings
+
+
+def test_generate_entries() -> None:
+	'''
+	The entries have to be sorted by time, lie within the session and point to existing traders of the given type.
+	'''
+	GOD = modules.god.God()
+	entries = GOD.generate_entries(
+		intensities_of_poisson_processes = np.array([0, 0.01, 0.1]),
+		traders_counts = np.array([0, 2, 5]),
+	)
+	assert entries.dtype == modules.scheduler.ENTRIES_DTYPE
+	assert np.all(np.diff(entries['timestamp']) >= 0)
+	assert np.all((entries['timestamp'] >= 0) & (entries['timestamp'] <= settings.SESSION_LENGTH))
+	assert set(entries['trader_type']) <= {1, 2}
+	assert np.all(entries['trader_idx'][entries['trader_type'] == 1] < 2)
+	assert np.all(entries['trader_idx'][entries['trader_type'] == 2] < 5)
+
+
+def test_generate_entries_without_traders() -> None:
+	GOD = modules.god.God()
+	entries = GOD.generate_entries(
+		intensities_of_poisson_processes = np.array([0, 0.01, 0.1]),
+		traders_counts = np.array([0, 0, 0]),
+	)
+	assert len(entries) == 0
+
+
+def test_replaying_replication() -> None:
+	'''
+	The replication with the same seed gives the same entries and the same response of the whole session.
+	'''
+	config = modules.config.SimulationConfig(session_length = 1000, zero_intelligence_count = 5, market_maker_count = 1)
+	gods = [modules.god.God(config = config, seed = 1, replication = 3) for _ in range(2)]
+	assert np.array_equal(gods[0]._summarized_entries, gods[1]._summarized_entries)
+	responses = [god.run_simulation() for god in gods]
+	assert responses[0].replication == 3
+	np.testing.assert_equal(tuple(responses[0]), tuple(responses[1]))
+
+
+def test_configs_side_by_side() -> None:
+	'''
+	Two simulations with different configs can live in one process, neither of them changes the other one.
+	'''
+	short_config = modules.config.SimulationConfig(session_length = 100, zero_intelligence_count = 3, market_maker_count = 1)
+	long_config = short_config._replace(session_length = 1000, zero_intelligence_count = 5)
+	short_god, long_god = modules.god.God(config = short_config, seed = 1), modules.god.God(config = long_config, seed = 1)
+	assert np.all(short_god._summarized_entries['timestamp'] <= 100)
+	assert len(long_god._list_zero_intelligence_traders) == 5
+	assert long_god._regulator.config.session_length == 1000
+	short_response, long_response = short_god.run_simulation(), long_god.run_simulation()
+	assert short_response.seed == long_response.seed == 1
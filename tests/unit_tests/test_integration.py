@@ -12,11 +12,10 @@ def test_regulator_process_long_order_where_nbbo_ask_is_traders_order(basic_regu
 	If the NBBO is formed out of current trader's limit order, we need to check that he will ignore this order and trade
 	as if the order were not there.
 	'''
-	basic_regulator.exchanges = {
+	basic_regulator.load_exchanges({
 		settings.NAMES_OF_EXCHANGES[0]: orderbook.orderbook.NonUniqueIdOrderBook(),
 		settings.NAMES_OF_EXCHANGES[1]: orderbook_with_best_bid_and_ask
-	}
-	basic_regulator.add_current_exchanges_to_historic_exchanges()
+	})
 	regulator_response = basic_regulator.process_order(
 		side = 0,
 		order_price = 1000,
@@ -0,0 +1,57 @@
+import numpy as np
+import orderbook
+import pytest
+
+import modules.limitorderbook
+
+
+def get_best_order(book, side):
+	try:
+		best_order = book.get_side(side).get_best()
+	except orderbook.exceptions.OrderSideEmpty:
+		return None
+	return (best_order.id, best_order.price)
+
+
+def test_price_time_priority():
+	book = modules.limitorderbook.LimitOrderBook()
+	book.add_orders(orderbook.OrderSide.BID, order_ids = [1, 2, 3], prices = [500, 600, 600])
+	book.add_order(side = orderbook.OrderSide.ASK, order_id = 4, price = 700, quantity = 1, position = None, metadata = {})
+	assert book.bid.get_best().id == 2
+	assert list(book.bid.get_prices()) == [600, 500]
+	assert [order.id for order in book.bid] == [2, 3, 1]
+	book.fill_order(order_id = 2, filled_quantity = 1, side = orderbook.OrderSide.BID)
+	assert book.bid.get_best().id == 3
+	book.delete_orders(orderbook.OrderSide.BID, order_ids = [1, 3])
+	assert not book.bid and book.bid.get_best_price() is None
+	with pytest.raises(orderbook.exceptions.OrderSideEmpty):
+		book.bid.get_best()
+	assert book.get_side(orderbook.OrderSide.ASK).get_best().price == 700
+
+
+def test_equivalence_with_orderbook_package():
+	'''
+	The random sequence of adds, cancels and fills leaves the same best orders in both implementations.
+	'''
+	random_generator = np.random.default_rng(1)
+	books = [orderbook.orderbook.NonUniqueIdOrderBook(), modules.limitorderbook.LimitOrderBook()]
+	resting_orders = {orderbook.OrderSide.BID: [], orderbook.OrderSide.ASK: []}
+	for order_id in range(1, 2001):
+		side = (orderbook.OrderSide.BID, orderbook.OrderSide.ASK)[random_generator.integers(2)]
+		if resting_orders[side] and random_generator.uniform() < 0.4:
+			removed_order_id = resting_orders[side].pop(random_generator.integers(len(resting_orders[side])))
+			for book in books:
+				book.delete_order(order_id = removed_order_id, side = side)
+		elif resting_orders[side] and random_generator.uniform() < 0.2:
+			best_order_id = books[0].get_side(side).get_best().id
+			resting_orders[side].remove(best_order_id)
+			for book in books:
+				book.fill_order(order_id = best_order_id, filled_quantity = 1, side = side)
+		else:
+			price = int(random_generator.integers(90, 110))
+			resting_orders[side].append(order_id)
+			for book in books:
+				book.add_order(side = side, order_id = order_id, price = price, quantity = 1, position = None, metadata = {})
+		for book_side in (orderbook.OrderSide.BID, orderbook.OrderSide.ASK):
+			best_orders = [get_best_order(book, book_side) for book in books]
+			assert best_orders[0] == best_orders[1]
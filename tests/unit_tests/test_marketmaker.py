@@ -15,7 +15,7 @@ import modules.settings as settings
 def test_generation_of_central_ladder_prices(mock_estimate_of_asset, estimate_of_asset_price,
 spread_around_asset, expected_highest_bid, expected_lowest_ask, basic_marketmaker):
 	mock_estimate_of_asset.return_value = estimate_of_asset_price
-	settings.MARKET_MAKER_SPREAD_AROUND_ASSET = spread_around_asset
+	basic_marketmaker.spread_around_asset = spread_around_asset
 	highest_bid, lowest_ask = basic_marketmaker.get_central_ladder_prices()
 	assert highest_bid == expected_highest_bid
 	assert lowest_ask == expected_lowest_ask
@@ -29,8 +29,8 @@ expected_ladder_bids,expected_ladder_asks', [
 ])
 def test_generation_ladder_of_orders(highest_bid, lowest_ask, number_of_orders,
 number_of_ticks_between_orders, expected_ladder_bids, expected_ladder_asks, basic_marketmaker):
-	settings.MARKET_MAKER_NUMBER_ORDERS = number_of_orders
-	settings.MARKET_MAKER_NUMBER_OF_TICKS_BETWEEN_ORDERS = number_of_ticks_between_orders
+	basic_marketmaker.number_of_orders = number_of_orders
+	basic_marketmaker.ticks_between_orders = number_of_ticks_between_orders
 	ladder_bids, ladder_asks = basic_marketmaker.generate_order_ladders(
 		highest_bid = highest_bid,
 		lowest_ask = lowest_ask
@@ -52,15 +52,13 @@ expected_trimmed_ladder_bids, expected_trimmed_ladder_asks, set_global_delay) ->
 	We are testing that the function trims correctly the order ladders that it generates in self.generate_order_ladders(),
 	that is it removes orders which would be executed immediately.
 	'''
-	settings.NATIONAL_BEST_BID_AND_OFFER_DELAY = set_global_delay
-	print(settings.NATIONAL_BEST_BID_AND_OFFER_DELAY)
+	basic_marketmaker.national_best_bid_and_offer_delay = set_global_delay
 	basic_marketmaker.exchange_name = settings.NAMES_OF_EXCHANGES[1]
-	basic_regulator.exchanges = {
+	basic_regulator.current_time = 1
+	basic_regulator.load_exchanges({
 		settings.NAMES_OF_EXCHANGES[0]: new_york_orderbook,
 		settings.NAMES_OF_EXCHANGES[1]: chicago_orderbook
-	}
-	basic_regulator.current_time = 1
-	basic_regulator.add_current_exchanges_to_historic_exchanges()
+	})
 	basic_regulator.remove_redundant_historic_exchanges()
 	trimmed_ladder_bids, trimmed_ladder_asks = basic_marketmaker.trim_orders_ladder(
 		ladder_bids = ladder_bids,
@@ -0,0 +1,36 @@
+import modules.settings as settings
+
+
+def test_estimate_of_the_fundamental_value(basic_regulator):
+	'''
+	The estimate is recomputed only once the time or the asset moves.
+	'''
+	market_state = basic_regulator.market_state
+	basic_regulator.current_time = settings.SESSION_LENGTH
+	assert market_state.get_estimate_of_the_fundamental_value_of_the_asset() == basic_regulator.asset.last_price
+	basic_regulator.current_time = 0
+	expected_estimate = basic_regulator.asset.mean_price + (basic_regulator.asset.last_price - basic_regulator.asset.mean_price) * \
+		(1 - settings.MEAN_REVERSION_FACTOR) ** settings.SESSION_LENGTH
+	assert market_state.get_estimate_of_the_fundamental_value_of_the_asset() == expected_estimate
+
+
+def test_lagged_national_best_bid_and_offer(basic_regulator):
+	'''
+	The lagged NBBO is cached for every delay, until the exchanges change or the time moves.
+	'''
+	new_york, chicago = settings.NAMES_OF_EXCHANGES
+	basic_regulator.current_time = 1
+	basic_regulator.add_order(exchange_name = new_york, side = 1, order_id = 2, price = 500, metadata = {})
+	basic_regulator.add_order(exchange_name = new_york, side = 0, order_id = 5, price = 1000, metadata = {})
+	market_state = basic_regulator.market_state
+	assert market_state.get_lagged_national_best_bid_and_offer(0) == (500, 1000, new_york, new_york)
+	assert market_state.get_lagged_national_best_bid_and_offer(5) == (None, None, None, None)
+	basic_regulator.current_time = 3
+	basic_regulator.add_order(exchange_name = chicago, side = 1, order_id = 10, price = 600, metadata = {})
+	assert market_state.get_lagged_national_best_bid_and_offer(0) == (600, 1000, chicago, new_york)
+	assert market_state.get_lagged_national_best_bid_and_offer(5) == (None, None, None, None)
+	basic_regulator.current_time = 6
+	assert market_state.get_lagged_national_best_bid_and_offer(5) == (500, 1000, new_york, new_york)
+	basic_regulator.current_time = 8
+	assert market_state.get_lagged_national_best_bid_and_offer(5) == (600, 1000, chicago, new_york)
+	assert market_state.accurate_national_best_bid_and_offer == (600, 1000, chicago, new_york)
@@ -18,3 +18,12 @@ def test_side_to_string() -> None:
 	assert side_buyer == 'bid'
 	assert side_seller == 'ask'
 
+
+
+def test_consolidate_national_best_bid_and_offer() -> None:
+	national_best_bid_and_offer = modules.misc.consolidate_national_best_bid_and_offer([
+		modules.misc.ExchangeInfo(best_bid = 500, best_ask = None, exchange = 'New York'),
+		modules.misc.ExchangeInfo(best_bid = 500, best_ask = 700, exchange = 'Chicago'),
+		modules.misc.ExchangeInfo(best_bid = 400, best_ask = 600, exchange = 'Boston'),
+	])
+	assert national_best_bid_and_offer == modules.misc.NBBO(500, 600, 'New York', 'Boston')
@@ -0,0 +1,26 @@
+import modules.misc
+import modules.orderregistry
+import modules.settings as settings
+
+
+def test_registering_and_releasing_orders():
+	'''
+	The ids are unique and never reused, the slots of the filled or cancelled orders are reused by the new ones.
+	'''
+	registry = modules.orderregistry.OrderRegistry(settings.NAMES_OF_EXCHANGES, capacity = 2)
+	owner = modules.misc.TraderIdx(3, 'MarketMaker')
+	order_ids = [
+		registry.register(owner = owner, side = side, price = 100 * side, exchange_name = settings.NAMES_OF_EXCHANGES[1], time_entry = 1.5)
+		for side in (0, 1, 1)
+	]
+	assert order_ids == [1, 2, 3]
+	assert len(registry.prices) == 4
+	assert registry.get_owner(2) == owner
+	assert registry.get_entry_time(2) == 1.5
+	assert registry.get_order(3) == modules.misc.CurrentOrder(3, 1, 100, settings.NAMES_OF_EXCHANGES[1])
+	registry.release(1)
+	registry.release(1)
+	assert 1 not in registry and len(registry) == 2
+	assert registry.register(owner = owner, side = 0, price = 50, exchange_name = settings.NAMES_OF_EXCHANGES[0], time_entry = 2) == 4
+	assert len(registry.prices) == 4
+	assert registry.get_order(4).exchange_name == settings.NAMES_OF_EXCHANGES[0]
@@ -0,0 +1,43 @@
+import modules.config
+import modules.god
+import modules.profiler
+
+
+def test_record_arrival() -> None:
+	profiler = modules.profiler.Profiler()
+	profiler.record_arrival('ZeroIntelligence', 0, 1, 3, 6, 10, 15)
+	profiler.record_arrival('ZeroIntelligence', 0, 1, 1, 2, 2, 2)
+	report = profiler.get_report()
+	assert report.events_count == 2
+	assert report.phases['asset'] == modules.profiler.PhaseStatistics(count = 2, seconds = 2, mean_seconds = 1)
+	assert report.phases['trader'].seconds == 4
+	assert report.phases['settlement'].seconds == 5
+	assert report.agents['ZeroIntelligence'] == modules.profiler.PhaseStatistics(count = 2, seconds = 4, mean_seconds = 2)
+
+
+def test_instrumented_method_is_timed_for_one_instance_only() -> None:
+	class Counter(object):
+		def increase(self, value: int) -> int:
+			return value + 1
+
+	profiler = modules.profiler.Profiler()
+	counter, other_counter = Counter(), Counter()
+	profiler.instrument(counter, 'increase', 'increase')
+	assert counter.increase(1) == other_counter.increase(1) == 2
+	assert profiler.get_report().phases['increase'].count == 1
+	assert profiler.get_report().events_count == 0
+
+
+def test_profiled_simulation_gives_the_same_response() -> None:
+	'''
+	The profiler only measures the simulation, the response of the replication stays the same.
+	'''
+	config = modules.config.SimulationConfig(session_length = 4000, zero_intelligence_count = 25, market_maker_count = 2)
+	response = modules.god.God(config = config, seed = 1).run_simulation()
+	GOD = modules.god.God(config = config, seed = 1, profile = True)
+	assert GOD.run_simulation() == response
+	report = GOD.profiler.get_report()
+	assert report.phases['asset'].count == len(GOD._summarized_entries)
+	assert sum(agent.count for agent in report.agents.values()) == len(GOD._summarized_entries)
+	assert report.events_count >= len(GOD._summarized_entries)
+	assert report.total_seconds >= report.phases['trader'].seconds
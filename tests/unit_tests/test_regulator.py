@@ -1,48 +1,155 @@
 import mock
+import numpy as np
 import orderbook
 import pytest
 
+import modules.config
+import modules.misc
 import modules.regulator
 import modules.settings as settings
 
 
 
 
-def test_copying_exchange(basic_regulator, orderbook_with_normal_bid_and_ask, empty_orderbook):
+def test_loading_exchanges(basic_regulator, orderbook_with_normal_bid_and_ask, empty_orderbook):
 	'''
-	Testing of copying both an orderbook with and without orders.
+	Testing that the orders of the loaded exchanges are visible in the lagged views from the current time on.
 	'''
-	old_exchange = orderbook_with_normal_bid_and_ask
-	old_exchange_empty = empty_orderbook
-	new_exchange = basic_regulator.copy_all_orders_from_one_exchange_to_another(old_exchange)
-	new_exchange_empty = basic_regulator.copy_all_orders_from_one_exchange_to_another(old_exchange_empty)
-	for exchange_side in zip(old_exchange.bid, new_exchange.bid), zip(old_exchange.ask, new_exchange.ask):
-		for order_old_exchange, order_new_exchange in exchange_side:
-			assert order_old_exchange == order_new_exchange
-	assert list(new_exchange_empty.bid) == list(new_exchange_empty.ask) == []
+	basic_regulator.current_time = 1
+	basic_regulator.load_exchanges({
+		settings.NAMES_OF_EXCHANGES[0]: orderbook_with_normal_bid_and_ask,
+		settings.NAMES_OF_EXCHANGES[1]: empty_orderbook,
+	})
+	lagged_exchanges = basic_regulator.get_lagged_exchanges(0)
+	assert lagged_exchanges[settings.NAMES_OF_EXCHANGES[0]].bid.get_best().price == 500
+	assert lagged_exchanges[settings.NAMES_OF_EXCHANGES[0]].ask.get_best().price == 1000
+	assert not lagged_exchanges[settings.NAMES_OF_EXCHANGES[1]].bid
+	assert not lagged_exchanges[settings.NAMES_OF_EXCHANGES[1]].ask
 
 
-def test_converting_order_into_dictionary(basic_regulator):
-	order = orderbook.types.Order(
-		id = 1,
-		price = 500,
-		quantity = 1,
-		side = orderbook.OrderSide.BID,
-		metadata = {
-			'seconds': 1,
-			'nanoseconds': 1
-		}
+def test_lagged_exchanges(basic_regulator):
+	'''
+	Orders added and removed after the time the slow traders look at must not change their view of the exchange.
+	'''
+	exchange_name = settings.NAMES_OF_EXCHANGES[0]
+	basic_regulator.current_time = 1
+	basic_regulator.add_order(exchange_name = exchange_name, side = 1, order_id = 1, price = 500, metadata = {})
+	basic_regulator.current_time = 3
+	basic_regulator.add_order(exchange_name = exchange_name, side = 1, order_id = 2, price = 600, metadata = {})
+	basic_regulator.delete_order(exchange_name = exchange_name, side = 1, order_id = 1)
+	assert basic_regulator.get_lagged_exchanges(1)[exchange_name].bid.get_best().price == 500
+	assert basic_regulator.get_lagged_exchanges(0)[exchange_name].bid.get_best().price == 600
+	with pytest.raises(orderbook.exceptions.OrderSideEmpty):
+		basic_regulator.get_lagged_exchanges(2.5)[exchange_name].bid.get_best()
+
+
+def test_lagged_exchange_without_owner(basic_regulator):
+	'''
+	The orders of the excluded owner are hidden only in his view, the live exchange is left untouched.
+	'''
+	exchange_name = settings.NAMES_OF_EXCHANGES[0]
+	owner = modules.misc.TraderIdx(1, 'ZeroIntelligence')
+	basic_regulator.add_order(exchange_name = exchange_name, side = 0, order_id = 1, price = 500, metadata = {}, owner = owner)
+	basic_regulator.add_order(exchange_name = exchange_name, side = 0, order_id = 2, price = 700, metadata = {})
+	assert basic_regulator.has_orders_of(owner)
+	assert basic_regulator.get_lagged_exchanges(0, excluded_owner = owner)[exchange_name].ask.get_best().price == 700
+	assert basic_regulator.get_lagged_exchanges(0)[exchange_name].ask.get_best().price == 500
+	assert basic_regulator.exchanges[exchange_name].ask.get_best().price == 500
+	assert basic_regulator.market_state.get_lagged_national_best_bid_and_offer(0, excluded_owner = owner).ask == 700
+
+
+def test_top_of_book_and_national_best_bid_and_offer(basic_regulator):
+	'''
+	The best prices are updated on every add, fill and delete, the subscribers are notified only when the NBBO changes.
+	'''
+	new_york, chicago = settings.NAMES_OF_EXCHANGES
+	list_national_best_bid_and_offer = []
+	basic_regulator.subscribe_to_national_best_bid_and_offer(list_national_best_bid_and_offer.append)
+	basic_regulator.add_order(exchange_name = new_york, side = 1, order_id = 1, price = 500, metadata = {})
+	basic_regulator.add_order(exchange_name = chicago, side = 1, order_id = 2, price = 400, metadata = {})
+	basic_regulator.add_order(exchange_name = chicago, side = 0, order_id = 1, price = 600, metadata = {})
+	assert basic_regulator.top_of_book[chicago] == modules.misc.ExchangeInfo(400, 600, chicago)
+	assert basic_regulator.accurate_national_best_bid_and_offer == modules.misc.NBBO(500, 600, new_york, chicago)
+	basic_regulator.fill_order(exchange_name = new_york, side = 1, order_id = 1)
+	assert basic_regulator.top_of_book[new_york] == modules.misc.ExchangeInfo(None, None, new_york)
+	assert basic_regulator.accurate_national_best_bid_and_offer == modules.misc.NBBO(400, 600, chicago, chicago)
+	assert list_national_best_bid_and_offer == [
+		modules.misc.NBBO(500, None, new_york, None),
+		modules.misc.NBBO(500, 600, new_york, chicago),
+		modules.misc.NBBO(400, 600, chicago, chicago),
+	]
+
+
+@pytest.mark.parametrize('bid_prices,ask_prices,expected_clearing_price,expected_executed_count', [
+	([1000, 900, 800], [700, 850, 950], 875, 2),
+	([1000, 900], [700], 950, 1),
+	([1000], [700, 800, 900], 750, 1),
+	([500], [700], None, 0),
+	([], [700], None, 0),
+])
+def test_uniform_clearing_price(bid_prices, ask_prices, expected_clearing_price, expected_executed_count):
+	clearing_price, executed_count = modules.regulator.Regulator.calculate_uniform_clearing_price(
+		np.array(bid_prices, dtype = np.int64),
+		np.array(ask_prices, dtype = np.int64),
+	)
+	assert clearing_price == expected_clearing_price
+	assert executed_count == expected_executed_count
+
+
+def test_batch_auction(basic_asset):
+	'''
+	Orders are not executed on arrival, the crossing orders are executed at the uniform price once the auction clears,
+	the rest stays in the orderbook.
+	'''
+	regulator = modules.regulator.Regulator(
+		asset = basic_asset,
+		config = modules.config.SimulationConfig(national_best_bid_and_offer_delay = 0, batch_auction_interval = 10),
+	)
+	exchange_name = settings.NAMES_OF_EXCHANGES[0]
+	assert regulator.process_order(side = 1, order_price = 1000, exchange_name = exchange_name).action == 'A'
+	for trader_idx, (side, price) in enumerate(((1, 1000), (1, 900), (1, 800), (0, 700), (0, 850), (0, 950))):
+		order_id = regulator.orders.register(
+			owner = modules.misc.TraderIdx(trader_idx, 'ZeroIntelligence'),
+			side = side,
+			price = price,
+			exchange_name = exchange_name,
+			time_entry = 0,
+		)
+		regulator.add_order(exchange_name = exchange_name, side = side, order_id = order_id, price = price, metadata = {})
+	regulator.current_time = 10
+	list_traders_orders = regulator.do()
+	assert sorted(trader_order.order.price for trader_order in list_traders_orders) == [700, 850, 900, 1000]
+	assert {trader_order.execution_price for trader_order in list_traders_orders} == {875}
+	assert regulator.top_of_book[exchange_name] == modules.misc.ExchangeInfo(800, 950, exchange_name)
+	assert len(regulator.execution_times) == 4
+	assert regulator.execution_times.mean == regulator.execution_times.quantile(0.5) == 10
+	assert len(regulator.orders) == 2
+
+
+@pytest.mark.parametrize('orderbook_implementation', ['NonUniqueIdOrderBook', 'LimitOrderBook'])
+def test_replacing_quotes(basic_asset, orderbook_implementation):
+	'''
+	Only the quotes which changed are cancelled and added, the unchanged ones keep their ids (and time priority).
+	'''
+	regulator = modules.regulator.Regulator(
+		asset = basic_asset,
+		config = modules.config.SimulationConfig(orderbook = orderbook_implementation, national_best_bid_and_offer_delay = 0),
 	)
-	order_dictionary = basic_regulator.convert_order_to_dictionary(order)
-	expected_dictionary = {
-		'side': orderbook.OrderSide.BID,
-		'order_id': 1,
-		'price': 500,
-		'quantity': 1,
-		'position': None,
-		'metadata': {
-			'seconds': 1,
-			'nanoseconds': 1
-		}
-	}
-	assert order_dictionary == expected_dictionary
\ No newline at end of file
+	exchange_name = settings.NAMES_OF_EXCHANGES[0]
+	owner = modules.misc.TraderIdx(1, 'MarketMaker')
+	current_orders, new_quotes = regulator.replace_quotes(owner, exchange_name, {}, ([600, 700], [500, 400]))
+	assert new_quotes == ([], [])
+	assert sorted((order.side, order.price) for order in current_orders.values()) == [(0, 600), (0, 700), (1, 400), (1, 500)]
+	assert regulator.top_of_book[exchange_name] == modules.misc.ExchangeInfo(500, 600, exchange_name)
+	kept_order_ids = {order_id for order_id, order in current_orders.items() if order.price in (600, 500)}
+	current_orders, new_quotes = regulator.replace_quotes(owner, exchange_name, current_orders, ([600, 650], [500, 450]))
+	assert new_quotes == ([], [])
+	assert kept_order_ids <= set(current_orders)
+	assert sorted(order.price for order in current_orders.values()) == [450, 500, 600, 650]
+	assert len(regulator.orders) == 4
+	assert regulator.top_of_book[exchange_name] == modules.misc.ExchangeInfo(500, 600, exchange_name)
+	regulator.add_order(exchange_name = settings.NAMES_OF_EXCHANGES[1], side = 0, order_id = 100, price = 540, metadata = {})
+	regulator.add_order(exchange_name = exchange_name, side = 0, order_id = 101, price = 540, metadata = {})
+	current_orders, new_quotes = regulator.replace_quotes(owner, exchange_name, current_orders, ([], [550]))
+	assert current_orders == {} and new_quotes == ([], [550])
+	assert regulator.top_of_book[exchange_name] == modules.misc.ExchangeInfo(None, 540, exchange_name)
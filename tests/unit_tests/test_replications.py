@@ -0,0 +1,45 @@
+import math
+import pytest
+
+import modules.god
+import modules.replications
+
+
+@pytest.mark.parametrize('degrees_of_freedom,expected_quantile', [
+	(1, 12.706),
+	(2, 4.303),
+	(4, 2.776),
+	(9, 2.262),
+	(29, 2.045),
+])
+def test_student_t_quantile(degrees_of_freedom, expected_quantile) -> None:
+	assert modules.replications.student_t_quantile(0.975, degrees_of_freedom) == pytest.approx(expected_quantile, abs = 5e-3)
+
+
+def test_stopping_on_precision() -> None:
+	'''
+	The replications stop once the relative half width is below the target, but never before the minimum of them.
+	'''
+	controller = modules.replications.ReplicationController(
+		fields = ('zero_intelligence_surplus', ), target_precision = 0.05, min_replications = 3, max_replications = 10)
+	for value in (100, 101):
+		controller.add_values(1, [value])
+	assert controller.get_decision(1).reason is None
+	controller.add_values(1, [100])
+	decision = controller.get_decision(1)
+	assert (decision.replications, decision.reason) == (3, 'precision')
+	assert decision.half_widths['zero_intelligence_surplus'] == pytest.approx(4.303 * math.sqrt(1 / 3 / 3) / (301 / 3), rel = 1e-3)
+	row = controller.convert_decision_to_row(1, decision)
+	assert row[:5] == (1, 3, 'precision', 0.95, 0.05)
+
+
+def test_stopping_on_budget() -> None:
+	controller = modules.replications.ReplicationController(
+		fields = ('marketmaker_surplus', 'arbitrageur_profit'), target_precision = 0.01, max_replications = 4)
+	for replication, value in enumerate((10, -10, 20, -20)):
+		controller.add_response(2, modules.god.GodResponse(1, 1, value, 0, 1, replication, 1, 1, 1, 1, 1))
+		assert controller.get_decision(2).reason == (None if replication < 3 else 'budget')
+	# The field without any variance is always precise enough.
+	assert controller.get_decision(2).half_widths['arbitrageur_profit'] == 0
+	with pytest.raises(ValueError):
+		modules.replications.ReplicationController(fields = ('surplus', ), target_precision = 0.01)
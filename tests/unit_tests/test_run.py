@@ -0,0 +1,28 @@
+import pytest
+
+import run
+
+
+def test_resuming_with_gaps() -> None:
+	'''
+	The results come back in any order, the interrupted sweep can therefore store the replications with a gap. Exactly
+	the missing ones are run on resume, with the root seed of the stored ones.
+	'''
+	stored_replications = [(1, 0, 7), (1, 1, 7), (1, 3, 7), (2, 1, 7), (5, 0, 7)]
+	completed_replications = run.group_completed_replications(stored_replications, [1, 2])
+	assert completed_replications == {1: {0, 1, 3}, 2: {1}}
+	seed = run.get_root_seed(None, stored_replications)
+	assert seed == 7
+	tasks = run.get_pending_tasks([1, 2], 4, completed_replications, seed)
+	assert tasks == [(1, 2, 7), (2, 0, 7), (2, 2, 7), (2, 3, 7)]
+	missing_replications = run.iterate_missing_replications(completed_replications[1])
+	assert [next(missing_replications) for _ in range(3)] == [2, 4, 5]
+
+
+def test_root_seed_of_resumed_sweep() -> None:
+	assert run.get_root_seed(11, []) == 11
+	assert run.get_root_seed(7, [(1, 0, 7)]) == 7
+	with pytest.raises(ValueError):
+		run.get_root_seed(11, [(1, 0, 7)])
+	with pytest.raises(ValueError):
+		run.get_root_seed(None, [(1, 0, 7), (1, 1, 8)])
@@ -0,0 +1,30 @@
+import numpy as np
+
+import modules.scheduler
+
+
+def test_scheduler_order_of_events() -> None:
+	'''
+	Arrivals and timed events are handled in the order of their timestamps, the session ends last and no event
+	is handled after it.
+	'''
+	entries = np.array([(1, 2, 0), (3, 1, 1), (5, 2, 3)], dtype = modules.scheduler.ENTRIES_DTYPE)
+	scheduler = modules.scheduler.Scheduler(entries)
+	handled_events = []
+	scheduler.register_handler(
+		modules.scheduler.EventType.ARRIVAL,
+		lambda timestamp, trader_type, trader_idx: handled_events.append((timestamp, trader_type, trader_idx))
+	)
+	scheduler.register_handler(
+		modules.scheduler.EventType.BATCH_AUCTION_CLEAR,
+		lambda timestamp: handled_events.append((timestamp, 'clear'))
+	)
+	def end_session(timestamp):
+		handled_events.append((timestamp, 'end'))
+		scheduler.stop()
+	scheduler.register_handler(modules.scheduler.EventType.END_OF_SESSION, end_session)
+	scheduler.schedule(4, modules.scheduler.EventType.END_OF_SESSION)
+	scheduler.schedule(3, modules.scheduler.EventType.BATCH_AUCTION_CLEAR)
+	scheduler.schedule(2, modules.scheduler.EventType.BATCH_AUCTION_CLEAR)
+	scheduler.run()
+	assert handled_events == [(1, 2, 0), (2, 'clear'), (3, 1, 1), (3, 'clear'), (4, 'end')]
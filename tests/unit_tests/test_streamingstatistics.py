@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import modules.streamingstatistics
+
+
+def test_running_statistics() -> None:
+	values = np.random.default_rng(1).normal(100, 20, 1000)
+	running_statistics = modules.streamingstatistics.RunningStatistics()
+	for value in values:
+		running_statistics.add(value)
+	assert running_statistics.count == 1000
+	assert running_statistics.mean == pytest.approx(values.mean())
+	assert running_statistics.variance == pytest.approx(values.var(ddof = 1))
+
+
+def test_histogram_quantiles() -> None:
+	'''
+	The quantiles are off by at most one bin width, the values outside of the range are kept within the observed ones.
+	'''
+	values = np.random.default_rng(1).uniform(0, 1000, 10000)
+	histogram = modules.streamingstatistics.Histogram(low = 0, high = 1000, bins_count = 100)
+	for value in values:
+		histogram.add(value)
+	for q in (0.05, 0.5, 0.95):
+		assert abs(histogram.quantile(q) - np.quantile(values, q)) <= histogram.bin_width
+	histogram.add(5000)
+	assert histogram.quantile(1) == 5000
+	assert np.isnan(modules.streamingstatistics.Histogram(low = 0, high = 1).quantile(0.5))
+
+
+def test_time_weighted_mean() -> None:
+	time_weighted_mean = modules.streamingstatistics.TimeWeightedMean()
+	time_weighted_mean.update(0, 10)
+	time_weighted_mean.update(1, None)
+	time_weighted_mean.update(2, 40)
+	assert time_weighted_mean.get_mean(3) == 25
+	assert np.isnan(modules.streamingstatistics.TimeWeightedMean().get_mean(3))
+
+
+def test_market_quality(basic_regulator) -> None:
+	'''
+	The spread of 100 holds for 10 units of time and the spread of 50 for 30, the depth grows from 2 to 3 orders.
+	'''
+	exchange_name = basic_regulator.config.names_of_exchanges[0]
+	for order_id, (side, price, time) in enumerate(((1, 900, 0), (0, 1000, 0), (1, 950, 10), (1, 950, 10)), start = 1):
+		basic_regulator.current_time = time
+		basic_regulator.add_order(exchange_name = exchange_name, side = side, order_id = order_id, price = price, metadata = {})
+		basic_regulator.market_quality.observe()
+	quoted_spread, top_of_book_depth = basic_regulator.market_quality.get_summary(40)[exchange_name]
+	assert quoted_spread == (100 * 10 + 50 * 30) / 40
+	assert top_of_book_depth == (2 * 10 + 3 * 30) / 40
@@ -0,0 +1,48 @@
+import numpy as np
+
+import modules.config
+import modules.god
+import modules.misc
+import modules.tape
+
+
+def test_recording_and_reading_tape(tmp_path) -> None:
+	'''
+	The records outlive the buffer, the lifetimes of the orders are matched with their removals.
+	'''
+	path = str(tmp_path / 'session.tape')
+	recorder = modules.tape.TapeRecorder(path, ('New York', 'Chicago'), buffer_size = 2)
+	owner = modules.misc.TraderIdx(3, 'ZeroIntelligence')
+	recorder.record_arrival(1, 2, 3)
+	recorder.record(1, modules.tape.EventCode.ADD, 'Chicago', 1, owner, order_id = 7, price = 900)
+	recorder.record(1, modules.tape.EventCode.ADD, 'Chicago', 0, owner, order_id = 8, price = 1100)
+	recorder.record(2, modules.tape.EventCode.FILL, 'Chicago', 1, owner, order_id = 7, price = 900)
+	recorder.record_national_best_bid_and_offer(2, modules.misc.NBBO(None, 1100, None, 'Chicago'))
+	recorder.close()
+	tape = modules.tape.Tape(path)
+	assert len(tape) == recorder.records_count == 6
+	assert tape.events['trader_idx'][0] == 3 and tape.events['exchange'][0] == -1
+	lifetimes = tape.get_order_lifetimes()
+	assert lifetimes['order_id'].tolist() == [7, 8]
+	assert lifetimes['time_removed'].tolist() == [2, np.inf]
+	assert lifetimes['removal_event'].tolist() == [modules.tape.EventCode.FILL, -1]
+	times, bids, asks = tape.get_national_best_bid_and_offer()
+	assert (times.tolist(), bids.tolist(), asks.tolist()) == ([2], [-1], [1100])
+
+
+def test_recorded_session(tmp_path) -> None:
+	'''
+	Every arrival moves the asset once and every filled order was added before.
+	'''
+	config = modules.config.SimulationConfig(session_length = 4000, zero_intelligence_count = 25, market_maker_count = 2)
+	response = modules.god.God(config = config, seed = 1).run_simulation()
+	GOD = modules.god.God(config = config, seed = 1, tape_path = str(tmp_path / 'session.tape'))
+	assert GOD.run_simulation() == response
+	tape = next(modules.tape.iterate_tapes(str(tmp_path)))
+	arrivals_count = len(GOD._summarized_entries)
+	assert len(tape.select(modules.tape.EventCode.ARRIVAL)) == arrivals_count
+	assert len(tape.get_asset_prices()[1]) == arrivals_count
+	assert np.all(np.diff(tape.events['time']) >= 0)
+	lifetimes = tape.get_order_lifetimes()
+	assert len(lifetimes) == len(tape.select(modules.tape.EventCode.ADD))
+	assert np.all(lifetimes['time_removed'] >= lifetimes['time_added'])
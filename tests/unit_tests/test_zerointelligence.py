@@ -6,9 +6,9 @@ import pytest
 import modules.zerointelligence
 
 
-@mock.patch('numpy.random.normal')
-def test_private_component_gain(mock_random_normal, basic_zerointelligence):
-	mock_random_normal.return_value = [-3, 2, 3, 1, -1, 0, -2, 4]
+def test_private_component_gain(basic_zerointelligence):
+	basic_zerointelligence.random_generator = mock.Mock()
+	basic_zerointelligence.random_generator.normal.return_value = [-3, 2, 3, 1, -1, 0, -2, 4]
 	private_gain = basic_zerointelligence.generate_private_component_gain()
 	assert private_gain == [4, 3, 2, 1, 0, -1, -2, -3]
 
@@ -26,3 +26,22 @@ def test_private_utility_of_the_asset(mock_private_component_gain, basic_zeroint
 	
 	assert private_utility_buyer == -2 
 	assert private_utility_seller == 3 
+
+
+def test_presampled_decisions(basic_zerointelligence):
+	'''
+	Presampled decisions are used one arrival after another, the private benefits of every arrival are sorted.
+	'''
+	basic_zerointelligence.presample_decisions(arrivals_count = 3)
+	private_gains = basic_zerointelligence.generate_private_component_gain()
+	assert len(private_gains) == 2 * basic_zerointelligence.quantity_max
+	assert list(private_gains) == sorted(private_gains, reverse = True)
+	for arrival in range(3):
+		basic_zerointelligence._arrival = arrival
+		basic_zerointelligence.decide_direction()
+		assert basic_zerointelligence.side == basic_zerointelligence._presampled_sides[arrival]
+	basic_zerointelligence._arrival = 3
+	basic_zerointelligence.random_generator = mock.Mock()
+	basic_zerointelligence.random_generator.integers.return_value = 1
+	basic_zerointelligence.decide_direction()
+	assert basic_zerointelligence.side == 1